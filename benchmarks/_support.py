@@ -0,0 +1,93 @@
+# Utilidades compartidas por los benchmarks locales de los handlers
+import json
+import os
+import statistics
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# load_handler es el mismo de los scripts de operación
+sys.path.insert(0, os.path.join(ROOT, "scripts"))
+from _handlers import HANDLERS_DIR, load_handler  # noqa: E402,F401
+
+
+def setup_env(**overrides):
+    """Variables de entorno por defecto para ejecutar contra un mongod local"""
+    defaults = {
+        "PLANTILLAS_CRUD_HOST": "localhost",
+        "PLANTILLAS_CRUD_PORT": "27017",
+        "PLANTILLAS_CRUD_DB": "plantillas_crud_bench",
+        "TIMEZONE": "America/Bogota",
+    }
+    defaults.update(overrides)
+    for k, v in defaults.items():
+        os.environ.setdefault(k, str(v))
+
+
+def use_mongomock():
+    """Sustituye pymongo.MongoClient por un cliente en memoria (mongomock) compartido; llamar antes de load_handler"""
+    import bson
+    import mongomock
+    import mongomock.collection
+    import pymongo
+    from bson.codec_options import CodecOptions
+
+    codec_options = CodecOptions(uuid_representation=bson.binary.UuidRepresentation.STANDARD)
+    client = mongomock.MongoClient()
+
+    # mongomock codifica con la representación UUID por defecto y no acepta sort en UpdateOne (pymongo >= 4.11)
+    class StandardBSON:
+        @staticmethod
+        def encode(document, check_keys=False, codec_options=codec_options):
+            return bson.encode(document, check_keys, codec_options)
+
+    add_update = mongomock.collection.BulkOperationBuilder.add_update
+
+    def add_update_without_sort(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+
+    mongomock.collection.BSON = StandardBSON
+    mongomock.collection.Collection.codec_options = property(lambda self: codec_options)
+    mongomock.collection.BulkOperationBuilder.add_update = add_update_without_sort
+    pymongo.MongoClient = lambda *args, **kwargs: client
+    return client
+
+
+def api_event(method: str, path: str, resource: str = None, path_parameters: dict = None,
+              query: dict = None, body=None, headers: dict = None) -> dict:
+    """Genera un evento sintético de API Gateway (proxy REST)"""
+    return {
+        "httpMethod": method,
+        "path": path,
+        "resource": resource or path,
+        "pathParameters": path_parameters,
+        "queryStringParameters": query,
+        "headers": headers or {},
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+
+
+def timed(fn, *args, **kwargs) -> tuple:
+    start = time.perf_counter()
+    result = fn(*args, **kwargs)
+    return result, (time.perf_counter() - start) * 1000
+
+
+def summarize(samples_ms: list) -> dict:
+    ordered = sorted(samples_ms)
+
+    def pct(p):
+        if not ordered:
+            return None
+        k = min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))
+        return round(ordered[k], 4)
+
+    return {
+        "n": len(ordered),
+        "mean_ms": round(statistics.fmean(ordered), 4) if ordered else None,
+        "p50_ms": pct(50),
+        "p95_ms": pct(95),
+        "p99_ms": pct(99),
+        "max_ms": round(ordered[-1], 4) if ordered else None,
+    }
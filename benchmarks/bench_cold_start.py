@@ -0,0 +1,131 @@
+# Arranque en frío: tiempo de importación (python -X importtime) y primera invocación por ruta
+#
+# Cada muestra se toma en un proceso nuevo, como un contenedor Lambda recién creado.
+# La primera invocación requiere un mongod local, por ejemplo:
+#   docker run --rm -p 27017:27017 mongo:7
+#   python benchmarks/bench_cold_start.py --runs 10 --output cold_start.json
+#   python benchmarks/bench_cold_start.py --import-only
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from _support import HANDLERS_DIR, ROOT, setup_env, summarize
+
+HANDLERS = ["crud_plantilla", "crud_tipo_plantilla", "crud_router"]
+
+# Ruta -> argumentos de api_event, por handler
+ROUTES = {
+    "crud_plantilla": {
+        "get_all": {"method": "GET", "path": "/plantilla", "query": {"limit": "10"}},
+        "get_one": {"method": "GET", "path": "/plantilla/000000000000000000000000", "resource": "/plantilla/{id}",
+                    "path_parameters": {"id": "000000000000000000000000"}},
+        "post": {"method": "POST", "path": "/plantilla",
+                 "body": {"tipo_plantilla_id": "bench", "sistema_id": 1, "nombre": "cold-start", "contenido": "x"}},
+    },
+    "crud_tipo_plantilla": {
+        "get_all": {"method": "GET", "path": "/tipo_plantilla", "query": {"limit": "10"}},
+        "get_one": {"method": "GET", "path": "/tipo_plantilla/000000000000000000000000",
+                    "resource": "/tipo_plantilla/{id}", "path_parameters": {"id": "000000000000000000000000"}},
+        "post": {"method": "POST", "path": "/tipo_plantilla",
+                 "body": {"nombre": "cold-start", "descripcion": "bench", "codigo_abreviacion": "CS"}},
+    },
+}
+# El router atiende las rutas de ambos recursos
+ROUTES["crud_router"] = {
+    f"{handler}.{name}": route for handler in HANDLERS[:2] for name, route in ROUTES[handler].items()
+}
+
+# Proceso hijo: importa el handler e invoca la ruta dos veces (fría y caliente)
+INVOKE_SCRIPT = """
+import json, sys, time
+sys.path.insert(0, {benchmarks!r})
+from _support import api_event, load_handler, timed
+start = time.perf_counter()
+app = load_handler({handler!r})
+import_ms = (time.perf_counter() - start) * 1000
+event = api_event(**{route!r})
+first, first_ms = timed(app.lambda_handler, event, None)
+second, second_ms = timed(app.lambda_handler, event, None)
+print(json.dumps({{"import_ms": import_ms, "first_ms": first_ms, "second_ms": second_ms,
+                  "status": first["statusCode"]}}))
+"""
+
+
+def parse_importtime(stderr: str, module: str = "app") -> dict:
+    """Total del módulo y coste acumulado de sus importaciones directas"""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "imported package" in line:
+            continue
+        # "import time:   self [us] | cumulative | <indentación>módulo"
+        self_us, cumulative_us, name = line[len("import time:"):].split("|")
+        rows.append((len(name) - len(name.lstrip()), name.strip(), int(self_us), int(cumulative_us)))
+    index = next(i for i, row in enumerate(rows) if row[1] == module)
+    indent = rows[index][0]
+    children = {}
+    for row in reversed(rows[:index]):
+        if row[0] <= indent:
+            break
+        if row[0] == indent + 2:
+            children[row[1]] = row[3] / 1000
+    return {"total_ms": rows[index][3] / 1000, "self_ms": rows[index][2] / 1000, "imports_ms": children}
+
+
+def import_time(handler: str, runs: int) -> dict:
+    # Como en el despliegue: CodeUri src/handlers/ y Handler <handler>.app.lambda_handler
+    module, cwd = f"{handler}.app", HANDLERS_DIR
+    totals = []
+    imports = {}
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-X", "importtime", "-c", f"import {module}"],
+                                cwd=cwd, env=os.environ.copy(), capture_output=True, text=True, check=True)
+        parsed = parse_importtime(result.stderr, module)
+        totals.append(parsed["total_ms"])
+        for name, ms in parsed["imports_ms"].items():
+            imports.setdefault(name, []).append(ms)
+    top = sorted(((summarize(ms)["p50_ms"], name) for name, ms in imports.items()), reverse=True)[:10]
+    return {"total": summarize(totals), "top_imports_p50_ms": {name: ms for ms, name in top}}
+
+
+def first_invocation(handler: str, route: dict, runs: int) -> dict:
+    samples = {"import_ms": [], "first_ms": [], "second_ms": []}
+    script = INVOKE_SCRIPT.format(benchmarks=os.path.join(ROOT, "benchmarks"), handler=handler, route=route)
+    for _ in range(runs):
+        result = subprocess.run([sys.executable, "-c", script], env=os.environ.copy(),
+                                capture_output=True, text=True, check=True)
+        sample = json.loads(result.stdout.strip().splitlines()[-1])
+        if sample["status"] >= 500:
+            raise SystemExit(f"Unexpected response in {handler}: {result.stdout}")
+        for key in samples:
+            samples[key].append(sample[key])
+    return {key: summarize(values) for key, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold-start import time and first invocation per route")
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--handler", choices=HANDLERS, action="append")
+    parser.add_argument("--import-only", action="store_true", help="Skip first invocation (no mongod needed)")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    args = parser.parse_args()
+
+    setup_env()
+    results = {"python": sys.version.split()[0]}
+    for handler in args.handler or HANDLERS:
+        results[handler] = {"import": import_time(handler, args.runs)}
+        if not args.import_only:
+            results[handler]["first_invocation"] = {
+                name: first_invocation(handler, route, args.runs) for name, route in ROUTES[handler].items()
+            }
+
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, "w") as f:
+            f.write(output + "\n")
+    print(output)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,49 @@
+# Latencia por petición: cliente nuevo por invocación vs cliente reutilizado (warm)
+#
+# Requiere un mongod local, por ejemplo:
+#   docker run --rm -p 27017:27017 mongo:7
+#   python benchmarks/bench_db_client.py --requests 200
+import argparse
+import json
+
+from _support import api_event, load_handler, setup_env, summarize, timed
+
+
+def run(handler_name: str, requests: int) -> dict:
+    app = load_handler(handler_name)
+    event = api_event("GET", f"/{app.COLLECTION}", query={"limit": "1"})
+
+    def fresh():
+        # Comportamiento anterior: un MongoClient por petición
+        app.engine.close_connect_db(app.engine._db_client)
+        return app.lambda_handler(event, None)
+
+    def reused():
+        return app.lambda_handler(event, None)
+
+    results = {}
+    for label, fn in (("fresh_client", fresh), ("reused_client", reused)):
+        fn()  # warm-up
+        samples = []
+        for _ in range(requests):
+            response, elapsed = timed(fn)
+            if response["statusCode"] != 200:
+                raise SystemExit(f"Unexpected response: {response}")
+            samples.append(elapsed)
+        results[label] = summarize(samples)
+    app.engine.close_connect_db(app.engine._db_client)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fresh vs reused MongoClient latency")
+    parser.add_argument("--requests", type=int, default=100)
+    parser.add_argument("--handler", choices=["crud_plantilla", "crud_tipo_plantilla"], default="crud_plantilla")
+    args = parser.parse_args()
+
+    setup_env()
+    print(json.dumps({args.handler: run(args.handler, args.requests)}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,272 @@
+# Carga local: latencia y throughput por endpoint y forma de consulta, invocando lambda_handler en proceso
+#
+# Usa el router (template.yaml), que atiende /plantilla y /tipo_plantilla. Contra un mongod local:
+#   docker run --rm -p 27017:27017 mongo:7
+#   python benchmarks/bench_load.py --seed 2000 --contenido-bytes 20000 --requests 200 --output load.json
+# O en memoria (pip install mongomock), sin mongod:
+#   python benchmarks/bench_load.py --backend mongomock --seed 500 --requests 100
+# Comparar con una ejecución anterior (p50/p95 actual / anterior):
+#   python benchmarks/bench_load.py --baseline load.json
+# Los GET /plantilla repetidos se sirven desde la caché de get_all; para medir la consulta a la BD:
+#   python benchmarks/bench_load.py --query-cache off
+# Con --backend mongomock se omiten search= y expand= ($text y $lookup con pipeline requieren mongod)
+import argparse
+import itertools
+import json
+import os
+import platform
+import subprocess
+import time
+import uuid
+from collections import Counter
+from datetime import datetime
+
+from _support import ROOT, api_event, load_handler, setup_env, summarize, timed, use_mongomock
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except Exception:
+        return None
+
+
+def build_plantilla(i: int, tipo_ids: list, contenido: str, grupo_id: str = None, version: int = 0) -> dict:
+    return {
+        "tipo_plantilla_id": tipo_ids[i % len(tipo_ids)],
+        "sistema_id": i % 5 + 1,
+        "nombre": f"Plantilla {i}",
+        "codigo_abreviacion": f"PL{i}",
+        "contenido": contenido,
+        "grupo_id": grupo_id,
+        "version": version,
+        "metadatos": {"autor": "bench", "indice": i},
+    }
+
+
+def grupo_uuid(n: int) -> uuid.UUID:
+    return uuid.UUID(int=n + 1)
+
+
+def check(response: dict, expected: int = 300) -> dict:
+    if response["statusCode"] >= expected:
+        raise SystemExit(f"Unexpected response: {response['statusCode']} {response['body'][:500]}")
+    return response
+
+
+def response_data(response: dict):
+    return json.loads(check(response)["body"])["Data"]
+
+
+def seed(app, plantillas: int, tipos: int, contenido_bytes: int, batch_size: int, backend: str = "mongod") -> dict:
+    """Crea los índices, tipos y plantillas por los endpoints (POST /tipo_plantilla y POST /plantilla/bulk)"""
+    client = app.engine.connect_db_client()
+    client.drop_database(os.environ["PLANTILLAS_CRUD_DB"])
+    # Como en un despliegue (scripts/ensure_indexes.py); search= necesita el índice de texto
+    for resource in app.engine.RESOURCES.values():
+        resource.ensure_indexes(client[os.environ["PLANTILLAS_CRUD_DB"]])
+    if backend == "mongomock":
+        # mongomock ignores partialFilterExpression: the unique index would reject the PUTs without grupo_id
+        client[os.environ["PLANTILLAS_CRUD_DB"]]["plantilla"].drop_index("grupo_id_1_version_1")
+    tipo_ids = []
+    for i in range(tipos):
+        body = {"nombre": f"Tipo {i}", "descripcion": "bench", "codigo_abreviacion": f"T{i}"}
+        tipo_ids.append(response_data(app.lambda_handler(api_event("POST", "/tipo_plantilla", body=body), None))["_id"])
+
+    contenido = ("<p>Plantilla {{ nombre }} á</p>" * (contenido_bytes // 30 + 1))[:contenido_bytes]
+    # Un grupo de versiones cada 4 plantillas: versiones 0..3 del mismo grupo_id
+    items = [build_plantilla(i, tipo_ids, contenido, grupo_id=str(grupo_uuid(i // 4)), version=i % 4)
+             for i in range(plantillas)]
+    ids = []
+    for start in range(0, len(items), batch_size):
+        event = api_event("POST", "/plantilla/bulk", body=items[start:start + batch_size])
+        ids.extend(item["Id"] for item in response_data(app.lambda_handler(event, None)))
+    return {"tipo_ids": tipo_ids, "plantilla_ids": ids, "contenido": contenido}
+
+
+# Escenarios que mongomock no implementa: $text (search=) y $lookup con let/pipeline (expand=)
+MONGOD_ONLY = [
+    "GET /plantilla?search=Plantilla",
+    "GET /plantilla?expand=tipo_plantilla",
+    "GET /plantilla/{id}?expand=tipo_plantilla",
+]
+
+
+def scenarios(app, data: dict, requests: int, backend: str = "mongod") -> dict:
+    """Nombre -> función sin argumentos que genera el evento de cada petición"""
+    plantilla_ids = itertools.cycle(data["plantilla_ids"])
+    tipo_ids = itertools.cycle(data["tipo_ids"])
+    counter = itertools.count()
+    first_id = data["plantilla_ids"][0]
+    one = api_event("GET", f"/plantilla/{first_id}", resource="/plantilla/{id}", path_parameters={"id": first_id})
+    etag = app.lambda_handler(one, None)["headers"].get("ETag")
+
+    def by_id(method, resource, ids, suffix="", **kwargs):
+        def event():
+            _id = next(ids)
+            return api_event(method, f"/{resource}/{_id}{suffix}", resource=f"/{resource}/{{id}}{suffix}",
+                             path_parameters={"id": _id}, **kwargs)
+        return event
+
+    def put_plantilla():
+        i = next(counter)
+        body = build_plantilla(i, data["tipo_ids"], data["contenido"])
+        return by_id("PUT", "plantilla", plantilla_ids, body=body)()
+
+    def bulk_ids(size: int) -> list:
+        return list(itertools.islice(plantilla_ids, size))
+
+    def put_bulk():
+        return api_event("PUT", "/plantilla/bulk", body=[
+            dict(build_plantilla(next(counter), data["tipo_ids"], data["contenido"]), _id=_id) for _id in bulk_ids(50)])
+
+    def put_tipo():
+        # Un PUT sin cambios responde 400: cada petición cambia nombre
+        body = {"nombre": f"Tipo actualizado {next(counter)}", "descripcion": "bench", "codigo_abreviacion": "TA"}
+        return by_id("PUT", "tipo_plantilla", tipo_ids, body=body)()
+
+    # Los DELETE de tipo_plantilla son físicos: se borran tipos creados para el benchmark
+    deletable_tipos = []
+    for i in range(requests + 1):
+        body = {"nombre": f"Borrable {i}", "descripcion": "bench", "codigo_abreviacion": f"B{i}"}
+        event = api_event("POST", "/tipo_plantilla", body=body)
+        deletable_tipos.append(response_data(app.lambda_handler(event, None))["_id"])
+
+    events = {
+        "GET /plantilla": lambda: api_event("GET", "/plantilla"),
+        "GET /plantilla?limit=100": lambda: api_event("GET", "/plantilla", query={"limit": "100"}),
+        "GET /plantilla?query=sistema_id:1": lambda: api_event("GET", "/plantilla", query={"query": "sistema_id:1"}),
+        "GET /plantilla?sortby=nombre&order=desc": lambda: api_event(
+            "GET", "/plantilla", query={"sortby": "nombre", "order": "desc"}),
+        "GET /plantilla?include=contenido": lambda: api_event("GET", "/plantilla", query={"include": "contenido"}),
+        "GET /plantilla?include=contenido (gzip)": lambda: api_event(
+            "GET", "/plantilla", query={"include": "contenido"}, headers={"Accept-Encoding": "gzip"}),
+        "GET /plantilla?fields=nombre,version": lambda: api_event(
+            "GET", "/plantilla", query={"fields": "nombre,version"}),
+        "GET /plantilla?cursor=true": lambda: api_event("GET", "/plantilla", query={"cursor": "true"}),
+        "GET /plantilla?offset=1000": lambda: api_event("GET", "/plantilla", query={"offset": "1000"}),
+        "GET /plantilla?latest=true": lambda: api_event("GET", "/plantilla", query={"latest": "true"}),
+        "GET /plantilla?count=exact&facets=sistema_id": lambda: api_event(
+            "GET", "/plantilla", query={"count": "exact", "facets": "sistema_id"}),
+        "GET /plantilla?history=<grupo_id>": lambda: api_event(
+            "GET", "/plantilla", query={"history": str(grupo_uuid(0))}),
+        "GET /plantilla?ids=<20 ids>": lambda: api_event(
+            "GET", "/plantilla", query={"ids": ",".join(bulk_ids(20))}),
+        "GET /plantilla?search=Plantilla": lambda: api_event("GET", "/plantilla", query={"search": "Plantilla"}),
+        "GET /plantilla?expand=tipo_plantilla": lambda: api_event(
+            "GET", "/plantilla", query={"expand": "tipo_plantilla"}),
+        "GET /plantilla/{id}": by_id("GET", "plantilla", plantilla_ids),
+        "GET /plantilla/{id}?content=only": by_id("GET", "plantilla", plantilla_ids, query={"content": "only"}),
+        "GET /plantilla/{id}?expand=tipo_plantilla": by_id("GET", "plantilla", plantilla_ids,
+                                                           query={"expand": "tipo_plantilla"}),
+        "GET /plantilla/{id} If-None-Match": lambda: dict(one, headers={"If-None-Match": etag}),
+        "GET /plantilla/export": lambda: api_event("GET", "/plantilla/export"),
+        "POST /plantilla": lambda: api_event(
+            "POST", "/plantilla", body=build_plantilla(next(counter), data["tipo_ids"], data["contenido"])),
+        "POST /plantilla/version?deactivate_previous=true": lambda: api_event(
+            "POST", "/plantilla/version", resource="/plantilla/version", query={"deactivate_previous": "true"},
+            body=build_plantilla(next(counter), data["tipo_ids"], data["contenido"], grupo_id=str(grupo_uuid(0)))),
+        "PUT /plantilla/{id}": put_plantilla,
+        "DELETE /plantilla/{id}": by_id("DELETE", "plantilla", plantilla_ids),
+        "POST /plantilla/{id}/render": by_id("POST", "plantilla", plantilla_ids, suffix="/render",
+                                             body={"variables": {"nombre": "Bench"}}),
+        "POST /plantilla/bulk (50)": lambda: api_event("POST", "/plantilla/bulk", body=[
+            build_plantilla(next(counter), data["tipo_ids"], data["contenido"]) for _ in range(50)]),
+        "PUT /plantilla/bulk (50)": put_bulk,
+        "DELETE /plantilla/bulk (50)": lambda: api_event("DELETE", "/plantilla/bulk", body=bulk_ids(50)),
+        "GET /tipo_plantilla": lambda: api_event("GET", "/tipo_plantilla"),
+        "GET /tipo_plantilla/{id}": by_id("GET", "tipo_plantilla", tipo_ids),
+        "POST /tipo_plantilla": lambda: api_event("POST", "/tipo_plantilla", body={
+            "nombre": f"Nuevo {next(counter)}", "descripcion": "bench", "codigo_abreviacion": "N"}),
+        "PUT /tipo_plantilla/{id}": put_tipo,
+        "DELETE /tipo_plantilla/{id}": by_id("DELETE", "tipo_plantilla", iter(deletable_tipos)),
+    }
+    if backend == "mongomock":
+        print(f"Skipped with --backend mongomock: {', '.join(MONGOD_ONLY)}")
+        for name in MONGOD_ONLY:
+            events.pop(name)
+    return events
+
+
+def run(app, events: dict, requests: int, only: str = None) -> dict:
+    results = {}
+    for name, make_event in events.items():
+        if only and only not in name:
+            continue
+        app.lambda_handler(make_event(), None)  # warm-up
+        samples = []
+        statuses = Counter()
+        start = time.perf_counter()
+        for _ in range(requests):
+            response, elapsed = timed(app.lambda_handler, make_event(), None)
+            check(response, expected=500)
+            statuses[response["statusCode"]] += 1
+            samples.append(elapsed)
+        total = time.perf_counter() - start
+        results[name] = dict(summarize(samples), throughput_rps=round(requests / total, 2),
+                             status=dict(statuses))
+        print(f"{name:50} p50={results[name]['p50_ms']:9.3f} ms  p95={results[name]['p95_ms']:9.3f} ms  "
+              f"{results[name]['throughput_rps']:9.1f} req/s")
+    return results
+
+
+def compare(results: dict, baseline_path: str) -> dict:
+    """Cociente actual / anterior de p50 y p95 por escenario (> 1 es más lento)"""
+    with open(baseline_path) as f:
+        baseline = json.load(f)["results"]
+    return {
+        name: {key: round(result[key] / baseline[name][key], 3) for key in ("p50_ms", "p95_ms")
+               if baseline[name].get(key)}
+        for name, result in results.items() if name in baseline
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="In-process load test of the CRUD handlers")
+    parser.add_argument("--backend", choices=["mongod", "mongomock"], default="mongod")
+    parser.add_argument("--seed", type=int, default=1000, help="Plantillas created before measuring")
+    parser.add_argument("--tipos", type=int, default=10, help="Tipos de plantilla created before measuring")
+    parser.add_argument("--contenido-bytes", type=int, default=5000)
+    parser.add_argument("--requests", type=int, default=100, help="Requests per scenario")
+    parser.add_argument("--query-cache", choices=["memory", "tmp", "off"], default="memory",
+                        help="get_all response cache backend (PLANTILLAS_CRUD_QUERY_CACHE)")
+    parser.add_argument("--scenario", help="Only run scenarios whose name contains this text")
+    parser.add_argument("--output", help="Write the JSON results to this file")
+    parser.add_argument("--baseline", help="Previous --output file to compare p50/p95 against")
+    args = parser.parse_args()
+
+    setup_env(PLANTILLAS_CRUD_DB="plantillas_crud_load", PLANTILLAS_CRUD_QUERY_CACHE=args.query_cache)
+    if args.backend == "mongomock":
+        use_mongomock()
+    app = load_handler("crud_router")
+
+    from crud_plantilla.bulk import PLANTILLAS_CRUD_BULK_MAX_ITEMS
+
+    data = seed(app, args.seed, args.tipos, args.contenido_bytes, PLANTILLAS_CRUD_BULK_MAX_ITEMS, args.backend)
+    results = run(app, scenarios(app, data, args.requests, args.backend), args.requests, args.scenario)
+    output = {
+        "meta": {
+            "commit": git_commit(),
+            "date": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "backend": args.backend,
+            "query_cache": args.query_cache,
+            "seed": args.seed,
+            "tipos": args.tipos,
+            "contenido_bytes": args.contenido_bytes,
+            "requests": args.requests,
+        },
+        "results": results,
+    }
+    if args.baseline:
+        output["comparison"] = compare(results, args.baseline)
+        print(json.dumps(output["comparison"], indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(output, f, indent=2)
+            f.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+# POST /plantilla/{id}/render: latencia con la caché de plantillas compiladas vacía (cold) vs en caché
+#
+#   docker run --rm -p 27017:27017 mongo:7
+#   python benchmarks/bench_render.py --contenido-bytes 50000 --placeholders 200 --requests 200
+#   python benchmarks/bench_render.py --backend mongomock --batch 100
+import argparse
+import json
+
+from _support import api_event, load_handler, setup_env, summarize, timed, use_mongomock
+
+
+def build_contenido(size: int, placeholders: int) -> str:
+    block = "<p>Texto de la plantilla á é í ó ú</p>" * max(1, size // (placeholders + 1) // 38)
+    return block + "".join(f"<b>{{{{ var{i} }}}}</b>{block}" for i in range(placeholders))
+
+
+def run(app, plantilla_id: str, variables, requests: int) -> dict:
+    event = api_event("POST", f"/plantilla/{plantilla_id}/render", resource="/plantilla/{id}/render",
+                      path_parameters={"id": plantilla_id}, body={"variables": variables})
+
+    # El paquete del handler se importa de nuevo en cada load_handler
+    from crud_plantilla.render import template_cache
+
+    def cold():
+        template_cache.clear()
+        return app.lambda_handler(event, None)
+
+    def cached():
+        return app.lambda_handler(event, None)
+
+    results = {}
+    for label, fn in (("cold", cold), ("cached", cached)):
+        fn()  # warm-up
+        samples = []
+        for _ in range(requests):
+            response, elapsed = timed(fn)
+            if response["statusCode"] != 200:
+                raise SystemExit(f"Unexpected response: {response}")
+            samples.append(elapsed)
+        results[label] = summarize(samples)
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render latency: cold vs cached compiled template")
+    parser.add_argument("--backend", choices=["mongod", "mongomock"], default="mongod")
+    parser.add_argument("--contenido-bytes", type=int, default=20000)
+    parser.add_argument("--placeholders", type=int, default=50)
+    parser.add_argument("--batch", type=int, default=1, help="Variable sets per request (batch mode when > 1)")
+    parser.add_argument("--requests", type=int, default=100)
+    args = parser.parse_args()
+
+    setup_env(PLANTILLAS_CRUD_DB="plantillas_crud_bench")
+    if args.backend == "mongomock":
+        use_mongomock()
+    app = load_handler("crud_plantilla")
+
+    body = {"tipo_plantilla_id": "bench", "sistema_id": 1, "nombre": "render",
+            "contenido": build_contenido(args.contenido_bytes, args.placeholders)}
+    created = app.lambda_handler(api_event("POST", "/plantilla", body=body), None)
+    plantilla_id = json.loads(created["body"])["Data"]["_id"]
+    variable_set = {f"var{i}": f"valor {i}" for i in range(args.placeholders)}
+    variables = [variable_set] * args.batch if args.batch > 1 else variable_set
+
+    results = run(app, plantilla_id, variables, args.requests)
+    print(json.dumps({"contenido_bytes": len(body["contenido"]), "placeholders": args.placeholders,
+                      "batch": args.batch, "results": results}, indent=2))
+    app.lambda_handler(api_event("DELETE", f"/plantilla/{plantilla_id}", resource="/plantilla/{id}",
+                                 path_parameters={"id": plantilla_id}), None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,103 @@
+# Micro-benchmark de serialización de respuestas: format_specific_values + json.dumps (anterior) vs format_response
+#
+#   python benchmarks/bench_serialization.py --items 100 --contenido-bytes 20000
+import argparse
+import copy
+import json
+import os
+import time
+import uuid
+from datetime import datetime
+
+from bson import ObjectId
+
+from _support import load_handler, setup_env, summarize
+
+
+def legacy_format_specific_values(result):
+    if result.get("_id"):
+        result["_id"] = str(result["_id"])
+    if result.get("fecha_creacion"):
+        result["fecha_creacion"] = str(result["fecha_creacion"])
+    if result.get("grupo_id"):
+        result["grupo_id"] = str(result["grupo_id"])
+    return result
+
+
+def legacy_format_response(result, message: str, status_code: int, success: bool) -> dict:
+    body = {
+        "Success": success,
+        "Status": status_code,
+        "Message": message
+    }
+    if success and result is not None:
+        if isinstance(result, dict):
+            body["Data"] = legacy_format_specific_values(result)
+        elif isinstance(result, list):
+            body["Data"] = [legacy_format_specific_values(item) for item in result]
+        else:
+            body["Data"] = result
+    return {"statusCode": status_code, "body": json.dumps(body)}
+
+
+def build_page(items: int, contenido_bytes: int) -> list:
+    contenido = ("<p>Plantilla {{ nombre }} á</p>" * (contenido_bytes // 30 + 1))[:contenido_bytes]
+    return [{
+        "_id": ObjectId(),
+        "tipo_plantilla_id": str(ObjectId()),
+        "sistema_id": 1,
+        "nombre": f"Plantilla {i}",
+        "codigo_abreviacion": f"PL{i}",
+        "contenido": contenido,
+        "grupo_id": uuid.uuid4(),
+        "version": i % 5,
+        "uid": None,
+        "metadatos": {"autor": "bench", "tags": ["a", "b"]},
+        "activo": True,
+        "fecha_creacion": datetime.now().replace(microsecond=123000),
+    } for i in range(items)]
+
+
+def measure(candidates: dict, repeat: int) -> dict:
+    """Ejecuta los candidatos intercalados para que el ruido de la máquina afecte a todos por igual"""
+    samples = {label: [] for label in candidates}
+    for i in range(repeat):
+        for label, (fn, pages) in candidates.items():
+            page = pages[i]
+            start = time.perf_counter()
+            fn(page, "Request successful", 200, True)
+            samples[label].append((time.perf_counter() - start) * 1000)
+    return {label: summarize(values) for label, values in samples.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Response serialization micro-benchmark")
+    parser.add_argument("--items", type=int, default=100)
+    parser.add_argument("--contenido-bytes", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    setup_env()
+    page = build_page(args.items, args.contenido_bytes)
+    candidates = {}
+    for library in ("json", "orjson"):
+        os.environ["PLANTILLAS_CRUD_JSON_LIBRARY"] = library
+        app = load_handler("crud_plantilla")
+        if library == "orjson" and app.engine.get_orjson() is None:
+            continue
+        current = app.engine.format_response(page, "Request successful", 200, True)
+        legacy = legacy_format_response(copy.deepcopy(page), "Request successful", 200, True)
+        if library == "json":
+            assert current["body"] == legacy["body"], "Output is not byte-compatible"
+        else:
+            assert json.loads(current["body"]) == json.loads(legacy["body"]), "Output is not equivalent"
+        candidates[f"format_response[{library}]"] = (app.engine.format_response, [page] * args.repeat)
+
+    # The legacy path mutates the documents, each repetition gets its own copy (copied outside the timing)
+    candidates["legacy"] = (legacy_format_response, [copy.deepcopy(page) for _ in range(args.repeat)])
+    results = measure(candidates, args.repeat)
+    print(json.dumps({"items": args.items, "contenido_bytes": args.contenido_bytes, "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
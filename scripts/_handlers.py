@@ -0,0 +1,17 @@
+# Carga de los handlers de src/handlers para los scripts de operación y los benchmarks locales
+import importlib
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+HANDLERS_DIR = os.path.join(ROOT, "src", "handlers")
+
+
+def load_handler(name: str):
+    """Importa src/handlers/<name>/app.py como en el despliegue (CodeUri src/handlers/, Handler <name>.app),
+    con un motor (crud_common) nuevo: como en un contenedor nuevo, con las variables de entorno actuales"""
+    if HANDLERS_DIR not in sys.path:
+        sys.path.insert(0, HANDLERS_DIR)
+    for module_name in [m for m in sys.modules if m.split(".")[0].startswith("crud_")]:
+        del sys.modules[module_name]
+    return importlib.import_module(f"{name}.app")
@@ -0,0 +1,26 @@
+# Aplica los índices declarados en cada handler (INDEXES de su recurso). Es idempotente, se puede ejecutar en cada
+# despliegue.
+#
+#   PLANTILLAS_CRUD_HOST=... PLANTILLAS_CRUD_PORT=... PLANTILLAS_CRUD_DB=... python scripts/ensure_indexes.py
+import sys
+
+from _handlers import load_handler
+
+HANDLERS = ["crud_plantilla", "crud_tipo_plantilla"]
+
+
+def main() -> int:
+    failed = False
+    for name in HANDLERS:
+        app = load_handler(name)
+        client = app.engine.connect_db_client()
+        if not client:
+            return 1
+        names = app.RESOURCE.ensure_indexes(client[str(app.engine.PLANTILLAS_CRUD_DB)])
+        failed = failed or not names
+        app.engine.close_connect_db(client)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
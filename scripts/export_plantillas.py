@@ -0,0 +1,47 @@
+# Exportación completa de plantillas en NDJSON (respaldos, reindexación), con el mismo código del handler.
+# La memoria se mantiene acotada: el cursor del servidor se itera por lotes y cada bloque se escribe al generarse.
+#
+#   PLANTILLAS_CRUD_HOST=... PLANTILLAS_CRUD_PORT=... PLANTILLAS_CRUD_DB=... \
+#       python scripts/export_plantillas.py --query "sistema_id:1" --output plantillas.ndjson
+import argparse
+import sys
+
+from _handlers import load_handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Export plantillas as NDJSON")
+    parser.add_argument("--query", help="k:v,k2:v2 (same syntax as GET /plantilla)")
+    parser.add_argument("--fields", help="col1,col2 (all fields by default)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--output", help="Output file (stdout by default)")
+    args = parser.parse_args()
+
+    app = load_handler("crud_plantilla")
+    from crud_plantilla.export import export_chunks, parse_export_params
+
+    event = {"queryStringParameters": {"query": args.query, "fields": args.fields}}
+    query, err = parse_export_params(app.RESOURCE, event)
+    if err is not None:
+        print(f"Invalid parameters: {err}", file=sys.stderr)
+        return 1
+    client = app.engine.connect_db_client()
+    if not client:
+        return 1
+
+    output = open(args.output, "w", encoding="utf-8") if args.output else sys.stdout
+    try:
+        total = 0
+        for chunk, _, _ in export_chunks(query, app.RESOURCE.get_collection(client), batch_size=args.batch_size):
+            output.write(chunk)
+            total += chunk.count("\n")
+        print(f"Exported {total} plantillas", file=sys.stderr)
+    finally:
+        if args.output:
+            output.close()
+        app.engine.close_connect_db(client)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,38 @@
+# Migra contenido de las plantillas existentes al almacenamiento por digest (plantilla_contenido)
+# y reporta el espacio ahorrado. Usar --dry-run para ver el reporte sin modificar datos.
+#
+#   PLANTILLAS_CRUD_HOST=... PLANTILLAS_CRUD_PORT=... PLANTILLAS_CRUD_DB=... \
+#       python scripts/migrate_contenido.py --dry-run
+#
+# Después de migrar, desplegar con PLANTILLAS_CRUD_CONTENT_STORE=true para que las nuevas escrituras
+# usen el mismo esquema.
+import argparse
+import json
+import sys
+
+from _handlers import load_handler
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Move plantilla contenido to content-addressed storage")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    app = load_handler("crud_plantilla")
+    from crud_plantilla.content import migrate_contenido
+
+    client = app.engine.connect_db_client()
+    if not client:
+        return 1
+    try:
+        report = migrate_contenido(app.RESOURCE.get_collection(client),
+                                   batch_size=args.batch_size, dry_run=args.dry_run)
+        print(json.dumps(report, indent=2))
+    finally:
+        app.engine.close_connect_db(client)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
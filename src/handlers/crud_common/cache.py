@@ -0,0 +1,177 @@
+# CRUD COMMON - CACHÉ
+# Cachés por contenedor: LRU en memoria del proceso (LruCache) o archivos en un directorio local (TmpCache).
+# Las usan las respuestas de lectura de cada recurso y las plantillas compiladas de /plantilla/{id}/render.
+
+import hashlib
+import json
+import os
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from typing import Optional
+
+from crud_common.metrics import count_metric
+
+
+class Cache(ABC):
+    """Interfaz de los backends: get, set y clear, con contadores de aciertos, fallos y descartes.
+    ttl_seconds y max_bytes en None no acotan; max_bytes mide el body de respuestas HTTP ya serializadas.
+    Con metric_prefix los contadores también se suman a la línea EMF (<prefix>Hits, Misses, Evictions)"""
+
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None, max_bytes: Optional[int] = None,
+                 metric_prefix: Optional[str] = None):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.max_bytes = max_bytes
+        self.metric_prefix = metric_prefix
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    @property
+    def enabled(self) -> bool:
+        return (self.max_entries > 0 and (self.ttl_seconds is None or self.ttl_seconds > 0)
+                and (self.max_bytes is None or self.max_bytes > 0))
+
+    @property
+    def hit_ratio(self) -> float:
+        requests = self.hits + self.misses
+        return self.hits / requests if requests else 0.0
+
+    def count(self, name: str):
+        if self.metric_prefix:
+            count_metric(f"{self.metric_prefix}{name}")
+
+    def hit(self, value):
+        self.hits += 1
+        self.count("Hits")
+        return value
+
+    def miss(self):
+        self.misses += 1
+        self.count("Misses")
+        return None
+
+    def evicted(self):
+        self.evictions += 1
+        self.count("Evictions")
+
+    def fits(self, value) -> bool:
+        return self.max_bytes is None or len(value["body"]) <= self.max_bytes
+
+    @abstractmethod
+    def get(self, key):
+        """Valor guardado con la llave, o None si no existe o expiró"""
+
+    @abstractmethod
+    def set(self, key, value):
+        """Guarda el valor; con max_bytes los que lo superan no se guardan"""
+
+    @abstractmethod
+    def clear(self):
+        """Descarta todos los valores"""
+
+
+class LruCache(Cache):
+    """LRU en memoria del proceso, acotada por entradas y opcionalmente por TTL y bytes de body"""
+
+    def __init__(self, max_entries: int, ttl_seconds: Optional[float] = None, max_bytes: Optional[int] = None,
+                 metric_prefix: Optional[str] = None):
+        super().__init__(max_entries, ttl_seconds, max_bytes, metric_prefix)
+        # llave -> (expira, bytes, valor)
+        self.entries = OrderedDict()
+        self.bytes = 0
+
+    def get(self, key):
+        entry = self.entries.get(key)
+        if entry is not None and (entry[0] is None or entry[0] > time.monotonic()):
+            self.entries.move_to_end(key)
+            return self.hit(entry[2])
+        if entry is not None:
+            self.bytes -= self.entries.pop(key)[1]
+        return self.miss()
+
+    def set(self, key, value):
+        if not self.enabled or not self.fits(value):
+            return
+        if key in self.entries:
+            self.bytes -= self.entries.pop(key)[1]
+        expires = time.monotonic() + self.ttl_seconds if self.ttl_seconds is not None else None
+        size = len(value["body"]) if self.max_bytes is not None else 0
+        self.entries[key] = (expires, size, value)
+        self.bytes += size
+        while len(self.entries) > self.max_entries or (self.max_bytes is not None and self.bytes > self.max_bytes):
+            self.bytes -= self.entries.popitem(last=False)[1][1]
+            self.evicted()
+
+    def clear(self):
+        self.entries.clear()
+        self.bytes = 0
+
+
+class TmpCache(Cache):
+    """Respuestas HTTP en archivos de un directorio local (/tmp): sobreviven a la recarga del módulo y los
+    comparten los procesos del mismo contenedor o equipo (sam local). Se descartan primero los más antiguos"""
+
+    def __init__(self, directory: str, max_entries: int, ttl_seconds: float, max_bytes: int,
+                 metric_prefix: Optional[str] = None):
+        super().__init__(max_entries, ttl_seconds, max_bytes, metric_prefix)
+        self.directory = directory
+
+    def path(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest() + ".json")
+
+    def files(self) -> list:
+        try:
+            return [entry for entry in os.scandir(self.directory) if entry.name.endswith(".json")]
+        except FileNotFoundError:
+            return []
+
+    def get(self, key: str) -> Optional[dict]:
+        path = self.path(key)
+        try:
+            if time.time() - os.path.getmtime(path) < self.ttl_seconds:
+                with open(path, encoding="utf-8") as f:
+                    return self.hit(json.load(f))
+        except (OSError, ValueError):
+            # Missing, removed by another process or partially written
+            pass
+        return self.miss()
+
+    def set(self, key: str, value: dict):
+        if not self.enabled or not self.fits(value):
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(value, f)
+        os.replace(tmp_path, path)
+        self.evict()
+
+    def evict(self):
+        entries = []
+        for entry in self.files():
+            try:
+                stat = entry.stat()
+            except FileNotFoundError:
+                continue
+            entries.append((stat.st_mtime, stat.st_size, entry.path))
+        # Newest first: the oldest files are popped from the end
+        entries.sort(reverse=True)
+        total = sum(size for _, size, _ in entries)
+        while entries and (len(entries) > self.max_entries or total > self.max_bytes):
+            _, size, path = entries.pop()
+            total -= size
+            try:
+                os.remove(path)
+                self.evicted()
+            except FileNotFoundError:
+                pass
+
+    def clear(self):
+        for entry in self.files():
+            try:
+                os.remove(entry.path)
+            except FileNotFoundError:
+                pass
@@ -0,0 +1,873 @@
+# CRUD COMMON
+# Motor compartido por los handlers CRUD: conexión, índices, query=, cursores, respuestas y caché por generación.
+# Cada handler declara su recurso (CrudResource: colección, modelo, tipos de query= y estrategia de borrado)
+# y lo registra; el router despacha por el primer segmento del recurso.
+
+import base64
+import json
+import os
+import re
+import time
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from typing import Optional
+
+import bson
+from bson import ObjectId, json_util
+from bson.binary import UuidRepresentation
+from pymongo import MongoClient, ASCENDING, DESCENDING, ReturnDocument
+
+from crud_common.cache import LruCache
+from crud_common.metrics import count_results, phase, warm_container
+
+# Required environment variables
+PLANTILLAS_CRUD_HOST = os.environ.get('PLANTILLAS_CRUD_HOST')
+PLANTILLAS_CRUD_PORT = os.environ.get('PLANTILLAS_CRUD_PORT')
+PLANTILLAS_CRUD_USERNAME = os.environ.get('PLANTILLAS_CRUD_USERNAME')
+PLANTILLAS_CRUD_PASS = os.environ.get('PLANTILLAS_CRUD_PASS')
+PLANTILLAS_CRUD_DB = os.environ.get('PLANTILLAS_CRUD_DB')
+TIMEZONE = os.environ.get('TIMEZONE')
+
+# Optional environment variables (connection pool)
+PLANTILLAS_CRUD_MAX_POOL_SIZE = int(os.environ.get('PLANTILLAS_CRUD_MAX_POOL_SIZE', 10))
+PLANTILLAS_CRUD_MIN_POOL_SIZE = int(os.environ.get('PLANTILLAS_CRUD_MIN_POOL_SIZE', 0))
+PLANTILLAS_CRUD_MAX_IDLE_TIME_MS = int(os.environ.get('PLANTILLAS_CRUD_MAX_IDLE_TIME_MS', 60000))
+PLANTILLAS_CRUD_CONNECT_TIMEOUT_MS = int(os.environ.get('PLANTILLAS_CRUD_CONNECT_TIMEOUT_MS', 5000))
+PLANTILLAS_CRUD_SOCKET_TIMEOUT_MS = int(os.environ.get('PLANTILLAS_CRUD_SOCKET_TIMEOUT_MS', 30000))
+PLANTILLAS_CRUD_SERVER_SELECTION_TIMEOUT_MS = int(os.environ.get('PLANTILLAS_CRUD_SERVER_SELECTION_TIMEOUT_MS', 5000))
+PLANTILLAS_CRUD_HEALTHCHECK_SECONDS = float(os.environ.get('PLANTILLAS_CRUD_HEALTHCHECK_SECONDS', 30))
+
+# Optional environment variables (indexes and query plans)
+PLANTILLAS_CRUD_ENSURE_INDEXES = os.environ.get('PLANTILLAS_CRUD_ENSURE_INDEXES', 'false').lower() == 'true'
+# off | log | reject
+PLANTILLAS_CRUD_QUERY_GUARD = os.environ.get('PLANTILLAS_CRUD_QUERY_GUARD', 'off').lower()
+
+# Maximum ids per GET /<recurso>?ids=a,b,c
+PLANTILLAS_CRUD_BATCH_MAX_IDS = int(os.environ.get('PLANTILLAS_CRUD_BATCH_MAX_IDS', 100))
+
+# Optional environment variables (response caches, TTL 0 disables them)
+PLANTILLAS_CRUD_CACHE_TTL_SECONDS = float(os.environ.get('PLANTILLAS_CRUD_CACHE_TTL_SECONDS', 300))
+PLANTILLAS_CRUD_CACHE_MAX_ENTRIES = int(os.environ.get('PLANTILLAS_CRUD_CACHE_MAX_ENTRIES', 256))
+# Default of each resource (generation_check_seconds). 0: every cached read checks the write generation
+# (read-after-write across containers)
+PLANTILLAS_CRUD_CACHE_GENERATION_CHECK_SECONDS = float(
+    os.environ.get('PLANTILLAS_CRUD_CACHE_GENERATION_CHECK_SECONDS', 0))
+
+# Optional environment variables (response serialization: json | orjson)
+PLANTILLAS_CRUD_JSON_LIBRARY = os.environ.get('PLANTILLAS_CRUD_JSON_LIBRARY', 'json').lower()
+
+GENERATION_COLLECTION = "cache_generation"
+# Estrategias de borrado: soft marca el registro como inactivo, hard lo elimina
+DELETE_STRATEGIES = ("soft", "hard")
+SOFT_DELETE_FIELDS = {"activo": False}
+
+ORDER_LABEL = {
+    "desc": DESCENDING,
+    "asc": ASCENDING
+}
+
+# Operadores de query=: campo__operador:valor (sin operador es igualdad); __in separa los valores con |
+QUERY_OPERATORS = {
+    "in": "$in",
+    "ne": "$ne",
+    "gt": "$gt",
+    "gte": "$gte",
+    "lt": "$lt",
+    "lte": "$lte",
+    "startswith": "$regex",
+}
+
+CURSOR_JSON_OPTIONS = json_util.CANONICAL_JSON_OPTIONS.with_options(uuid_representation=UuidRepresentation.STANDARD)
+
+
+@lru_cache(maxsize=None)
+def get_timezone():
+    """Timezone configurado, cargado una sola vez por contenedor"""
+    import pytz
+    return pytz.timezone(TIMEZONE)
+
+
+def local_now():
+    """Datetime por Timezone"""
+    return datetime.now(tz=get_timezone())
+
+
+# Recursos registrados por los handlers importados en el contenedor: nombre -> CrudResource
+RESOURCES = {}
+
+
+def register(resource, handler):
+    """Registra el recurso y el lambda_handler que atiende sus rutas"""
+    resource.handler = handler
+    RESOURCES[resource.name] = resource
+    return resource
+
+
+def resource_name(event) -> str:
+    """Recurso de la petición: /tipo_plantilla/{id} -> tipo_plantilla"""
+    resource = event.get("resource") or event.get("path") or ""
+    return resource.strip("/").split("/")[0]
+
+
+def dispatch(event, context):
+    """Atiende la petición con el handler del recurso registrado"""
+    try:
+        resource = RESOURCES.get(resource_name(event))
+        if resource is None:
+            return format_response({}, "Resource not found", 404, False)
+        return resource.handler(event, context)
+    finally:
+        # ColdStart is per container, whichever resource served its first invocation
+        warm_container()
+
+
+# Gestión de conexión con la BD
+# El cliente se crea una sola vez por contenedor y lo comparten todos los recursos en las invocaciones "warm"
+_db_client = None
+_db_client_checked_at = 0.0
+
+
+def build_db_uri() -> str:
+    # With password
+    if PLANTILLAS_CRUD_USERNAME and PLANTILLAS_CRUD_PASS:
+        return f"mongodb://{PLANTILLAS_CRUD_USERNAME}:{PLANTILLAS_CRUD_PASS}@{PLANTILLAS_CRUD_HOST}:{PLANTILLAS_CRUD_PORT}/"
+    # Without password
+    return f"mongodb://{PLANTILLAS_CRUD_HOST}:{PLANTILLAS_CRUD_PORT}/"
+
+
+def new_db_client():
+    """Genera un nuevo cliente con la configuración del pool de conexiones"""
+    return MongoClient(
+        build_db_uri(),
+        uuidRepresentation='standard',
+        maxPoolSize=PLANTILLAS_CRUD_MAX_POOL_SIZE,
+        minPoolSize=PLANTILLAS_CRUD_MIN_POOL_SIZE,
+        maxIdleTimeMS=PLANTILLAS_CRUD_MAX_IDLE_TIME_MS,
+        connectTimeoutMS=PLANTILLAS_CRUD_CONNECT_TIMEOUT_MS,
+        socketTimeoutMS=PLANTILLAS_CRUD_SOCKET_TIMEOUT_MS,
+        serverSelectionTimeoutMS=PLANTILLAS_CRUD_SERVER_SELECTION_TIMEOUT_MS,
+    )
+
+
+def connect_db_client():
+    """Retorna el cliente compartido del contenedor, creándolo o reconectando si es necesario"""
+    global _db_client, _db_client_checked_at
+    try:
+        if _db_client is not None:
+            if time.monotonic() - _db_client_checked_at < PLANTILLAS_CRUD_HEALTHCHECK_SECONDS:
+                return _db_client
+            # Health check: the container may have been frozen and the sockets may be stale
+            try:
+                _db_client.admin.command("ping")
+                _db_client_checked_at = time.monotonic()
+                return _db_client
+            except Exception as ex:
+                print(f"Stale client DB, reconnecting. Detail: {ex}")
+                close_connect_db(_db_client)
+                _db_client = None
+
+        _db_client = new_db_client()
+        _db_client_checked_at = time.monotonic()
+        print("Successful connection to the database")
+        if PLANTILLAS_CRUD_ENSURE_INDEXES:
+            for resource in RESOURCES.values():
+                if not resource.indexes_ensured:
+                    resource.ensure_indexes(_db_client[str(PLANTILLAS_CRUD_DB)])
+        return _db_client
+    except Exception as ex:
+        print(f"Error connecting to the database: {ex}")
+        return None
+
+
+def close_connect_db(client):
+    """Cierra el cliente. Las invocaciones no lo cierran, se mantiene abierto entre invocaciones"""
+    global _db_client
+    try:
+        print("Closing client DB")
+        if client:
+            client.close()
+        if client is _db_client:
+            _db_client = None
+    except Exception as ex:
+        print(f"Error close Client DB. Detail: {ex}")
+
+
+# Planes de consulta
+def filter_shape(value):
+    """Forma del filtro: campos y operadores, sin los valores"""
+    if isinstance(value, dict):
+        return tuple(sorted((k, filter_shape(v) if k.startswith("$") or isinstance(v, dict) else "eq")
+                            for k, v in value.items()))
+    if isinstance(value, list):
+        return tuple(sorted({filter_shape(v) for v in value}, key=repr))
+    return "value"
+
+
+def plan_stages(plan):
+    if isinstance(plan, dict):
+        if "stage" in plan:
+            yield plan["stage"]
+        for v in plan.values():
+            yield from plan_stages(v)
+    elif isinstance(plan, list):
+        for v in plan:
+            yield from plan_stages(v)
+
+
+# Deserialización de parámetros de entrada
+def get_header(event, name: str) -> Optional[str]:
+    """Encabezado de la petición sin distinguir mayúsculas"""
+    name = name.lower()
+    for key, value in (event.get("headers") or {}).items():
+        if key.lower() == name:
+            return value
+    return None
+
+
+# parse_body -> body de las peticiones POST, PUT, DELETE
+def parse_body(event) -> tuple:
+    try:
+        # With BinaryMediaTypes */* API Gateway delivers the body base64 encoded
+        if event.get("isBase64Encoded"):
+            return json.loads(base64.b64decode(event["body"])), None
+        return json.loads(event["body"]), None
+    except Exception as ex:
+        return None, ex
+
+
+def parse_datetime(value: str) -> datetime:
+    """Fecha ISO 8601 (2024-01-31 o 2024-01-31T08:00:00); sin zona horaria se interpreta en TIMEZONE"""
+    parsed = datetime.fromisoformat(value)
+    return get_timezone().localize(parsed) if parsed.tzinfo is None else parsed
+
+
+def coerce_value(field_type, field: str, value: str):
+    """Convierte el valor de query= al tipo del campo"""
+    if field_type in (bool, None) and value in ("true", "false"):
+        return value == "true"
+    if field_type is bool:
+        raise ValueError(f"Invalid boolean for {field}: {value}")
+    if field_type is datetime:
+        return parse_datetime(value)
+    if field_type in (int, ObjectId, uuid.UUID):
+        return field_type(value)
+    return value
+
+
+def compile_query(query_str: str, field_types: dict, prefix_fields: list) -> dict:
+    """Filtro de MongoDB para query=k:v,k2__op:v2"""
+    query_total = {}
+    for cond in query_str.split(","):
+        kv = cond.split(":", 1)
+        if len(kv) != 2:
+            query_total[kv[0]] = None
+            continue
+        key, value = kv
+        field, _, operator = key.partition("__")
+        field_type = field_types.get(field)
+        if not operator:
+            if isinstance(query_total.get(field), dict):
+                query_total[field]["$eq"] = coerce_value(field_type, field, value)
+            else:
+                query_total[field] = coerce_value(field_type, field, value)
+            continue
+        if operator not in QUERY_OPERATORS:
+            raise ValueError(f"Unsupported query operator: {operator}")
+        if operator == "in":
+            condition = {"$in": [coerce_value(field_type, field, v) for v in value.split("|")]}
+        elif operator == "startswith":
+            if field not in prefix_fields:
+                raise ValueError(f"startswith is only supported on {', '.join(prefix_fields)}")
+            condition = {"$regex": f"^{re.escape(value)}"}
+        else:
+            condition = {QUERY_OPERATORS[operator]: coerce_value(field_type, field, value)}
+        if field in query_total and not isinstance(query_total[field], dict):
+            # Igualdad y operador sobre el mismo campo
+            query_total[field] = {"$eq": query_total[field]}
+        query_total.setdefault(field, {}).update(condition)
+    return query_total
+
+
+def get_sort_by(query_params) -> list:
+    sort_by_total = []
+    if query_params.get("sortby"):
+        sort_by_list = str(query_params.get("sortby")).split(",")
+        if query_params.get("order"):
+            order_list = str(query_params.get("order")).split(",")
+            if len(order_list) == 1:
+                # Default ASCENDING
+                order_label = ORDER_LABEL.get(query_params.get("order"), ASCENDING)
+                sort_by_total = [(e, order_label) for e in sort_by_list]
+            elif len(order_list) == len(sort_by_list):
+                for i, e in enumerate(sort_by_list):
+                    order_label = ORDER_LABEL.get(order_list[i], ASCENDING)
+                    sort_by_total.append((e, order_label))
+            else:
+                # Default ASCENDING
+                sort_by_total = [(e, ASCENDING) for e in sort_by_list]
+    return sort_by_total
+
+
+# Paginación por cursor (keyset)
+# El token codifica el orden activo (sortby/order + _id) y los valores de esas llaves en el último registro
+def encode_cursor(sort: list, values: list) -> str:
+    raw = json_util.dumps({"s": sort, "v": values}, json_options=CURSOR_JSON_OPTIONS)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(token: str) -> tuple:
+    raw = base64.urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+    cursor = json_util.loads(raw, json_options=CURSOR_JSON_OPTIONS)
+    sort = [(str(k), int(d)) for k, d in cursor["s"]]
+    if len(sort) != len(cursor["v"]):
+        raise ValueError("Invalid cursor")
+    return sort, cursor["v"]
+
+
+def get_path_value(document: dict, path: str):
+    value = document
+    for key in path.split("."):
+        if not isinstance(value, dict):
+            return None
+        value = value.get(key)
+    return value
+
+
+def keyset_filter(sort: list, values: list) -> dict:
+    """Predicado de rango que continúa después de `values` según el orden `sort`"""
+    clauses = []
+    for i, (key, direction) in enumerate(sort):
+        clause = {k: v for (k, _), v in zip(sort[:i], values[:i])}
+        value = values[i]
+        # null sorts before any other value
+        if value is None:
+            if direction == DESCENDING:
+                continue
+            clause[key] = {"$ne": None}
+        elif direction == ASCENDING:
+            clause[key] = {"$gt": value}
+        else:
+            # null values come last in descending order
+            after = {"$or": [{key: {"$lt": value}}, {key: None}]}
+            clause = {"$and": [clause, after]} if clause else after
+        clauses.append(clause)
+    if not clauses:
+        # Last possible position, nothing after it
+        return {"_id": {"$in": []}}
+    return clauses[0] if len(clauses) == 1 else {"$or": clauses}
+
+
+def apply_cursor(query: dict, token: str):
+    """Convierte la consulta de get_all en paginación keyset"""
+    sort = list(query.get("sort") or [])
+    if not any(key == "_id" for key, _ in sort):
+        sort.append(("_id", ASCENDING))
+    if token and token != "true":
+        token_sort, values = decode_cursor(token)
+        if query.get("sort") and token_sort != sort:
+            raise ValueError("The cursor does not match sortby/order")
+        sort = token_sort
+        range_filter = keyset_filter(sort, values)
+        query["filter"] = {"$and": [query["filter"], range_filter]} if query.get("filter") else range_filter
+    query["sort"] = sort
+    query["keyset"] = True
+
+
+def next_cursor(data: list, query: dict, limit) -> Optional[str]:
+    if not data or not limit or len(data) < limit:
+        return None
+    return encode_cursor(query["sort"], [get_path_value(data[-1], key) for key, _ in query["sort"]])
+
+
+# Formato de respuestas
+def json_default(value):
+    """ObjectId, datetime y UUID se serializan como str() en una sola pasada, sin modificar los documentos"""
+    if isinstance(value, (ObjectId, datetime, uuid.UUID)):
+        return str(value)
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+JSON_ENCODER = json.JSONEncoder(default=json_default)
+
+
+@lru_cache(maxsize=None)
+def get_orjson():
+    """orjson, importado en la primera respuesta con PLANTILLAS_CRUD_JSON_LIBRARY=orjson; None si no está instalado"""
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def dumps(body) -> str:
+    # orjson output is equivalent JSON but compact and without ASCII escaping
+    if PLANTILLAS_CRUD_JSON_LIBRARY == "orjson":
+        orjson = get_orjson()
+        if orjson is not None:
+            return orjson.dumps(body, default=json_default, option=orjson.OPT_PASSTHROUGH_DATETIME).decode()
+    return JSON_ENCODER.encode(body)
+
+
+def format_response(result, message: str, status_code: int, success: bool, extra: dict = None) -> dict:
+    """Formats the HTTP response and records ResultCount and SerializeMs."""
+    body = {
+        "Success": success,
+        "Status": status_code,
+        "Message": message
+    }
+    if success and result is not None:
+        body["Data"] = result
+        count_results(result)
+    if extra:
+        body.update(extra)
+    with phase("serialize"):
+        return {"statusCode": status_code, "body": dumps(body)}
+
+
+def as_stored(document: dict, collection) -> dict:
+    """Documento con los tipos que retorna la BD (BSON round trip local, sin consultarla)"""
+    codec_options = collection.codec_options
+    return bson.decode(bson.encode(document, codec_options=codec_options), codec_options=codec_options)
+
+
+def is_modified(previous: dict, changes: dict) -> bool:
+    return any(k not in previous or previous[k] != v for k, v in changes.items())
+
+
+def cache_key(query: dict) -> str:
+    return json_util.dumps(query, sort_keys=True, json_options=CURSOR_JSON_OPTIONS)
+
+
+# Argumentos de collection.find en las consultas de parse_query_params; los demás son opciones del recurso
+FIND_ARGS = ("filter", "projection", "sort", "skip", "limit")
+
+
+class CrudResource:
+    """Recurso CRUD sobre una colección: tipos de query=, índices, estrategia de borrado (soft | hard) y caché.
+    model_factory retorna el modelo pydantic de PUT y creation_model_factory el de POST (por defecto el mismo);
+    se invocan solo en las escrituras. Los recursos con lecturas propias extienden los hooks de lectura
+    (parse_params, projection, find, after_read, read_response) y declaran sus rutas adicionales en routes"""
+
+    # Opciones de parse_query_params que también aplican a GET por _id y a ids=
+    batch_options = ()
+
+    def __init__(self, name: str, model_factory, field_types: dict, delete_strategy: str = "hard",
+                 indexes: dict = None, prefix_fields: list = None, cache=None, creation_model_factory=None,
+                 heavy_fields: list = None, routes: dict = None, generation_check_seconds: float = None):
+        if delete_strategy not in DELETE_STRATEGIES:
+            raise ValueError(f"delete_strategy must be one of {', '.join(DELETE_STRATEGIES)}")
+        self.name = name
+        self.model_factory = model_factory
+        self.creation_model_factory = creation_model_factory or model_factory
+        self.field_types = field_types
+        self.delete_strategy = delete_strategy
+        # Colección -> índices (IndexModel) que crea ensure_indexes
+        self.indexes = indexes if indexes is not None else {}
+        self.prefix_fields = prefix_fields or []
+        self.cache = cache if cache is not None else LruCache(0)
+        # Campos pesados que get_all excluye salvo include=campo o fields=campo
+        self.heavy_fields = heavy_fields or []
+        # (resource, método HTTP) -> función(recurso, event) de las rutas propias del recurso
+        self.routes = routes or {}
+        self.handler = None
+        self.indexes_ensured = False
+        # Veredicto por forma de consulta: None (usa índice) o el motivo del rechazo
+        self.query_plan_verdicts = {}
+        # Generación de escrituras conocida por el contenedor (documento compartido en GENERATION_COLLECTION)
+        self.cache_generation = None
+        self.cache_generation_checked_at = 0.0
+        # Segundos entre consultas de la generación (0: en cada lectura en caché)
+        self.generation_check_seconds = (generation_check_seconds if generation_check_seconds is not None
+                                         else PLANTILLAS_CRUD_CACHE_GENERATION_CHECK_SECONDS)
+        # Filtro compilado una vez por cadena de query=
+        self.compile_query = lru_cache(maxsize=256)(self._compile_query)
+
+    def get_collection(self, client):
+        return client[str(PLANTILLAS_CRUD_DB)][self.name]
+
+    # Gestión de índices y planes de consulta
+    def ensure_indexes(self, db) -> list:
+        """Crea los índices declarados. Es idempotente: los índices existentes con la misma definición se omiten"""
+        try:
+            names = []
+            for name, indexes in self.indexes.items():
+                created = db[name].create_indexes(indexes)
+                print(f"Indexes ensured on {name}: {created}")
+                names += created
+            self.indexes_ensured = True
+            return names
+        except Exception as ex:
+            print(f"Error ensuring indexes on {self.name}. Detail: {ex}")
+            return []
+
+    def check_query_plan(self, query: dict, collection) -> Optional[str]:
+        """Guarda opcional: ejecuta explain una vez por forma de consulta y detecta COLLSCAN"""
+        if PLANTILLAS_CRUD_QUERY_GUARD not in ("log", "reject") or not (query.get("filter") or query.get("sort")):
+            return None
+        shape = (filter_shape(query.get("filter") or {}), tuple(key for key, _ in query.get("sort") or []))
+        if shape not in self.query_plan_verdicts:
+            try:
+                explain = collection.find(**query).explain()
+                winning_plan = explain.get("queryPlanner", {}).get("winningPlan", {})
+                verdict = "The query would do a COLLSCAN" if "COLLSCAN" in plan_stages(winning_plan) else None
+            except Exception as ex:
+                print(f"Error in check_query_plan. Detail: {ex}")
+                verdict = None
+            self.query_plan_verdicts[shape] = verdict
+            if verdict:
+                print(f"Query shape without index on {collection.name}: {shape}")
+        verdict = self.query_plan_verdicts[shape]
+        return verdict if PLANTILLAS_CRUD_QUERY_GUARD == "reject" else None
+
+    # query=
+    def _compile_query(self, query_str: str) -> dict:
+        return compile_query(query_str, self.field_types, self.prefix_fields)
+
+    def get_query(self, query_str: str) -> dict:
+        # Copia del filtro compilado: get_all y apply_cursor lo extienden
+        return {k: dict(v) if isinstance(v, dict) else v for k, v in self.compile_query(query_str).items()}
+
+    # Invalidación de la caché entre contenedores
+    def sync_cache_generation(self, db):
+        """Vacía la caché si otro contenedor escribió en la colección; consulta la BD en cada lectura en caché,
+        o como máximo cada generation_check_seconds si es mayor que 0"""
+        now = time.monotonic()
+        if not self.cache.enabled:
+            return
+        if now - self.cache_generation_checked_at < self.generation_check_seconds:
+            return
+        try:
+            doc = db[GENERATION_COLLECTION].find_one({"_id": self.name})
+            generation = doc.get("generation", 0) if doc else 0
+            if generation != self.cache_generation:
+                self.cache.clear()
+                self.cache_generation = generation
+            self.cache_generation_checked_at = now
+        except Exception as ex:
+            self.cache.clear()
+            print(f"Error in sync_cache_generation. Detail: {ex}")
+
+    def bump_cache_generation(self, db):
+        """Invalida la caché local y la de los demás contenedores"""
+        if not self.cache.enabled:
+            return
+        self.cache.clear()
+        try:
+            doc = db[GENERATION_COLLECTION].find_one_and_update(
+                {"_id": self.name}, {"$inc": {"generation": 1}}, upsert=True, return_document=ReturnDocument.AFTER)
+            self.cache_generation = doc["generation"]
+            self.cache_generation_checked_at = time.monotonic()
+        except Exception as ex:
+            print(f"Error in bump_cache_generation. Detail: {ex}")
+
+    def cached_response(self, key, build, collection) -> dict:
+        """Read-through: retorna la respuesta en caché o la construye con build() y guarda las exitosas.
+        La llave incluye la generación de escrituras (el backend tmp comparte archivos entre procesos)"""
+        if not self.cache.enabled:
+            return build()
+        self.sync_cache_generation(collection.database)
+        key = f"{self.cache_generation}:{cache_key(key)}"
+        response = self.cache.get(key)
+        status = "hit"
+        if response is None:
+            status = "miss"
+            response = build()
+            if response["statusCode"] == 200:
+                self.cache.set(key, response)
+        print(f"Cache {self.name} {status} (hits={self.cache.hits}, misses={self.cache.misses}, "
+              f"hit_ratio={self.cache.hit_ratio:.3f})")
+        return dict(response)
+
+    def read_response(self, event, key: tuple, build, collection) -> dict:
+        """Respuesta de una lectura GET ((ruta, parámetros) en key): read-through de la caché"""
+        return self.cached_response(key, build, collection)
+
+    # Operaciones CRUD
+    def create(self, data, collection):
+        try:
+            result = collection.insert_one(data)
+            if result:
+                # insert_one adds the generated _id to data
+                return format_response(as_stored(data, collection), "Registration successful", 201, True)
+            return format_response({}, "Registration unsuccessful", 400, False)
+        except Exception as ex:
+            return format_response({}, f"Error service Post: {ex}", 500, False)
+
+    def update(self, _id, data, collection):
+        try:
+            filter_ = {"_id": ObjectId(_id)}
+            previous = collection.find_one_and_update(filter_, {"$set": data}, return_document=ReturnDocument.BEFORE)
+            changes = as_stored(data, collection)
+            if previous and is_modified(previous, changes):
+                previous.update(changes)
+                return format_response(previous, "Update successful", 200, True)
+            return format_response({}, "Update unsuccessful", 400, False)
+        except Exception as ex:
+            return format_response({}, f"Error service Put: {ex}", 500, False)
+
+    def delete(self, _id, collection):
+        """soft: $set SOFT_DELETE_FIELDS (un registro ya inactivo no se modifica); hard: elimina el documento"""
+        try:
+            filter_ = {"_id": ObjectId(_id)}
+            if self.delete_strategy == "hard":
+                data = collection.find_one_and_delete(filter_)
+            else:
+                data = collection.find_one_and_update(filter_, {"$set": SOFT_DELETE_FIELDS},
+                                                      return_document=ReturnDocument.BEFORE)
+                changes = as_stored(SOFT_DELETE_FIELDS, collection)
+                if data and is_modified(data, changes):
+                    data.update(changes)
+                else:
+                    data = None
+            if data:
+                return format_response(data, "Delete successful", 200, True)
+            return format_response(None, "Delete unsuccessful", 400, False)
+        except Exception as ex:
+            return format_response({}, f"Error service Delete: {ex}", 500, False)
+
+    # Hooks de lectura
+    def projection(self, fields: list):
+        """Proyección de fields=col1,col2 (get_all, ids=)"""
+        return fields
+
+    def parse_params(self, query_params: dict, query: dict):
+        """Parámetros de get_all propios del recurso; se aplican sobre query antes de cursor"""
+
+    def parse_one_params(self, event) -> tuple:
+        """Argumentos de get_one para GET /<recurso>/{id}"""
+        return {}, None
+
+    def find(self, query: dict, options: dict, collection) -> tuple:
+        """Documentos de la consulta (argumentos de find en query, demás parámetros de parse_query_params en
+        options) y campos adicionales de la respuesta"""
+        return list(collection.find(**query)), {}
+
+    def after_read(self, documents: list, projection, collection) -> list:
+        """Completa los documentos leídos antes de serializarlos"""
+        return documents
+
+    def find_one(self, _id, collection, projection=None, **options) -> Optional[dict]:
+        data, _ = self.find({"filter": {"_id": ObjectId(_id)}, "projection": projection, "limit": 1}, options,
+                            collection)
+        return self.after_read(data, projection, collection)[0] if data else None
+
+    def get_all(self, query, collection):
+        try:
+            query = dict(query)
+            keyset = query.pop("keyset", False)
+            options = {key: query.pop(key) for key in list(query) if key not in FIND_ARGS}
+            rejected = self.check_query_plan(query, collection)
+            if rejected:
+                return format_response({}, f"Error service GetAll: {rejected}", 400, False)
+
+            hidden = []
+            if keyset:
+                # Sort keys are needed to build the next cursor
+                projection = query.get("projection")
+                if isinstance(projection, list):
+                    projected = {field.split(".")[0] for field in projection}
+                    hidden = [key for key, _ in query["sort"] if key != "_id" and key.split(".")[0] not in projected]
+                if hidden:
+                    query["projection"] = list(projection) + hidden
+
+            data, extra = self.find(query, options, collection)
+            self.after_read(data, query.get("projection"), collection)
+            if keyset:
+                extra["Next"] = next_cursor(data, query, query.get("limit"))
+                for item in data:
+                    for key in hidden:
+                        item.pop(key.split(".")[0], None)
+            return format_response(data, "Request successful", 200, True, extra)
+        except Exception as ex:
+            return format_response({}, f"Error service GetAll: {ex}", 500, False)
+
+    def get_one(self, _id, collection, projection=None, **options):
+        try:
+            data = self.find_one(_id, collection, projection, **options)
+            if data:
+                return format_response(data, "Request successful", 200, True)
+            return format_response({}, "Request unsuccessful", 404, False)
+        except Exception as ex:
+            return format_response({}, f"Error service GetOne: {ex}", 500, False)
+
+    def get_many(self, ids: list, collection, projection=None, **options):
+        """Una sola consulta $in; Data conserva el orden de ids y Missing lista los que no existen"""
+        try:
+            documents, _ = self.find({"filter": {"_id": {"$in": ids}}, "projection": projection}, options,
+                                     collection)
+            found = {document["_id"]: document for document in documents}
+            data = self.after_read([found[_id] for _id in ids if _id in found], projection, collection)
+            missing = [str(_id) for _id in ids if _id not in found]
+            return format_response(data, "Request successful", 200, True, {"Missing": missing})
+        except Exception as ex:
+            return format_response({}, f"Error service GetMany: {ex}", 500, False)
+
+    # Deserialización de GET
+    def parse_query_params(self, event) -> tuple:
+        try:
+            query_params_result = {"limit": 10}
+            query_params = event["queryStringParameters"]
+            if isinstance(query_params, dict):
+                # query: k:v, k: v
+                if query_params.get("query"):
+                    query_params_result["filter"] = self.get_query(str(query_params.get("query")))
+
+                # fields: col1, col2, entity.col3
+                if query_params.get("fields"):
+                    query_params_result["projection"] = self.projection(str(query_params.get("fields")).split(","))
+                else:
+                    # include: heavy fields to return
+                    include = str(query_params.get("include") or "").split(",")
+                    excluded = {field: 0 for field in self.heavy_fields if field not in include}
+                    if excluded:
+                        query_params_result["projection"] = excluded
+
+                # sortby: col1,col2
+                # order: desc,asc
+                if query_params.get("sortby"):
+                    query_params_result["sort"] = get_sort_by(query_params)
+
+                # limit: 10 (default is 10)
+                if query_params.get("limit"):
+                    query_params_result["limit"] = int(query_params.get("limit"))
+
+                # offset: 0 (default is 0)
+                if query_params.get("offset"):
+                    query_params_result["skip"] = int(query_params.get("offset"))
+
+                self.parse_params(query_params, query_params_result)
+
+                # cursor: true (first page) | token returned in "Next"
+                if query_params.get("cursor") is not None:
+                    if query_params_result.get("skip"):
+                        raise ValueError("cursor and offset cannot be combined")
+                    apply_cursor(query_params_result, str(query_params.get("cursor")))
+            elif self.heavy_fields:
+                query_params_result["projection"] = {field: 0 for field in self.heavy_fields}
+
+            return query_params_result, None
+        except Exception as ex:
+            print(f"Error in parse_query_params. Detail: {ex}")
+            return {}, ex
+
+    def parse_ids_params(self, event) -> tuple:
+        """ids sin repetidos en el orden pedido, con la proyección de get_all (fields / include) y batch_options"""
+        try:
+            query_params = event.get("queryStringParameters") or {}
+            ids = list(dict.fromkeys(_id for _id in str(query_params.get("ids")).split(",") if _id))
+            if not ids or len(ids) > PLANTILLAS_CRUD_BATCH_MAX_IDS:
+                raise ValueError(f"ids must contain between 1 and {PLANTILLAS_CRUD_BATCH_MAX_IDS} ids")
+            query, err = self.parse_query_params(event)
+            if err is not None:
+                raise err
+            batch = {"ids": [ObjectId(_id) for _id in ids], "projection": query.get("projection")}
+            batch.update({option: query[option] for option in self.batch_options if option in query})
+            return batch, None
+        except Exception as ex:
+            return None, ex
+
+    def write(self, response: dict, collection) -> dict:
+        """Las escrituras exitosas invalidan la caché de lectura"""
+        if response["statusCode"] < 300:
+            self.bump_cache_generation(collection.database)
+        return response
+
+    def handle(self, event, context):
+        """lambda_handler genérico: rutas propias (routes), POST, PUT, DELETE y GET (uno, ids= o listado)"""
+        name = self.name
+        try:
+            http_method = event['httpMethod']
+
+            route = self.routes.get((event.get("resource"), http_method))
+            if route is not None:
+                return route(self, event)
+
+            if http_method == 'POST':
+                with phase("parse"):
+                    data, error = parse_body(event)
+                if error is None:
+                    # Validate structure
+                    with phase("validate"):
+                        validated = self.creation_model_factory()(**data).__dict__
+                    with phase("connect"):
+                        client = connect_db_client()
+                    if client:
+                        collection = self.get_collection(client)
+                        with phase("db"):
+                            return self.write(self.create(validated, collection), collection)
+                    return format_response({}, f"Error registering new {name}!", 500, False)
+                else:
+                    return format_response({}, f"Error registering new {name}! Detail: Error in input data", 500,
+                                           False)
+
+            elif http_method == 'PUT':
+                with phase("parse"):
+                    data, error = parse_body(event)
+                if error is None:
+                    # Validate structure
+                    _id = event["pathParameters"]["id"]
+                    with phase("validate"):
+                        validated = self.model_factory()(**data).__dict__
+                    with phase("connect"):
+                        client = connect_db_client()
+                    if client:
+                        collection = self.get_collection(client)
+                        with phase("db"):
+                            return self.write(self.update(_id, validated, collection), collection)
+                    return format_response({}, f"Error updating {name}!", 500, False)
+                else:
+                    return format_response(error, f"Error updating {name}! Detail: Error in input data", 500, False)
+
+            elif http_method == 'DELETE':
+                _id = event["pathParameters"]["id"]
+                with phase("connect"):
+                    client = connect_db_client()
+                if client:
+                    collection = self.get_collection(client)
+                    with phase("db"):
+                        return self.write(self.delete(_id, collection), collection)
+                return format_response(None, f"Error deleting {name}!", 500, False)
+
+            elif http_method == 'GET':
+                with phase("connect"):
+                    client = connect_db_client()
+                if client:
+                    collection = self.get_collection(client)
+                    if 'pathParameters' in event and event['pathParameters'] is not None:
+                        _id = event["pathParameters"]["id"]
+                        with phase("parse"):
+                            params, err = self.parse_one_params(event)
+                        if err is not None:
+                            return format_response({}, f"Error service GetOne: {err}", 400, False)
+                        with phase("db"):
+                            return self.read_response(event, ("one", dict(params, _id=_id)),
+                                                      lambda: self.get_one(_id, collection, **params), collection)
+                    elif (event.get("queryStringParameters") or {}).get("ids") is not None:
+                        with phase("parse"):
+                            batch, err = self.parse_ids_params(event)
+                        if err is not None:
+                            return format_response({}, f"Error service GetMany: {err}", 400, False)
+                        with phase("db"):
+                            return self.read_response(event, ("many", batch),
+                                                      lambda: self.get_many(collection=collection, **batch),
+                                                      collection)
+                    else:
+                        with phase("parse"):
+                            query_complement, err = self.parse_query_params(event)
+                        if err is None:
+                            with phase("db"):
+                                return self.read_response(event, ("all", query_complement),
+                                                          lambda: self.get_all(query_complement, collection),
+                                                          collection)
+                        else:
+                            return format_response(
+                                {}, "Error service GetAll: The request contains an incorrect parameter or no record "
+                                    "exists", 404, True)
+                return format_response({}, f"Error getting {name}!", 500, False)
+
+            else:
+                return format_response({}, f"HTTP method not allowed", 500, False)
+        except Exception as ex:
+            return format_response({}, f"Error in {name} request! Detail: {ex}", 500, False)
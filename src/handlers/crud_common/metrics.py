@@ -0,0 +1,117 @@
+# CRUD COMMON - MÉTRICAS
+# Tiempos por fase de cada invocación en CloudWatch Embedded Metric Format (una línea EMF por invocación).
+# Sin una invocación medida (measured_request) phase y count_metric no hacen nada.
+
+import json
+import os
+import time
+from contextlib import contextmanager, nullcontext
+
+# Optional environment variables (per-phase metrics in CloudWatch Embedded Metric Format)
+PLANTILLAS_CRUD_METRICS = os.environ.get('PLANTILLAS_CRUD_METRICS', 'false').lower() == 'true'
+PLANTILLAS_CRUD_METRICS_NAMESPACE = os.environ.get('PLANTILLAS_CRUD_METRICS_NAMESPACE', 'PlantillasCrud')
+
+PHASE_METRICS = {
+    "parse": "ParseMs",
+    "validate": "ValidateMs",
+    "connect": "ConnectMs",
+    "db": "DbMs",
+    "render": "RenderMs",
+    "serialize": "SerializeMs",
+    "compress": "CompressMs",
+}
+NO_PHASE = nullcontext()
+# Métricas de la invocación en curso (None si están deshabilitadas)
+_metrics = None
+_cold_start = True
+
+
+class RequestMetrics:
+    """Tiempos por fase de una invocación; cada fase excluye el tiempo de las fases anidadas"""
+
+    def __init__(self, route: str, cold_start: bool):
+        self.route = route
+        self.cold_start = cold_start
+        self.started_at = time.perf_counter()
+        self.phases = {}
+        self.results = 0
+        self.counts = {}
+        self._nested = []
+
+    @contextmanager
+    def phase(self, name: str):
+        start = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            elapsed = (time.perf_counter() - start) * 1000
+            nested = self._nested.pop()
+            self.phases[name] = self.phases.get(name, 0.0) + elapsed - nested
+            if self._nested:
+                self._nested[-1] += elapsed
+
+    def emf(self, response: dict, context) -> dict:
+        """Registro en CloudWatch Embedded Metric Format"""
+        values = {PHASE_METRICS[name]: round(ms, 3) for name, ms in self.phases.items()}
+        values["DurationMs"] = round((time.perf_counter() - self.started_at) * 1000, 3)
+        counts = {
+            "ResultCount": self.results,
+            "ResponseBytes": len(response.get("body") or ""),
+            "ColdStart": int(self.cold_start),
+            **self.counts,
+        }
+        units = {name: "Milliseconds" for name in values}
+        units.update({name: "Count" for name in counts})
+        units["ResponseBytes"] = "Bytes"
+        return {
+            "_aws": {
+                "Timestamp": int(time.time() * 1000),
+                "CloudWatchMetrics": [{
+                    "Namespace": PLANTILLAS_CRUD_METRICS_NAMESPACE,
+                    "Dimensions": [["Route"]],
+                    "Metrics": [{"Name": name, "Unit": unit} for name, unit in units.items()],
+                }],
+            },
+            "Route": self.route,
+            "StatusCode": response.get("statusCode"),
+            "RequestId": getattr(context, "aws_request_id", None),
+            **values,
+            **counts,
+        }
+
+
+def phase(name: str):
+    """Mide una fase de la invocación en curso; sin métricas no hace nada"""
+    return _metrics.phase(name) if _metrics is not None else NO_PHASE
+
+
+def count_metric(name: str, value: int = 1):
+    """Suma a un contador de la invocación en curso (métrica Count en la línea EMF)"""
+    if _metrics is not None:
+        _metrics.counts[name] = _metrics.counts.get(name, 0) + value
+
+
+def count_results(result):
+    """ResultCount de la invocación en curso: registros en Data"""
+    if _metrics is not None and result is not None:
+        _metrics.results = len(result) if isinstance(result, list) else 1
+
+
+def warm_container():
+    """El contenedor ya atendió una invocación de algún recurso: las siguientes no son ColdStart"""
+    global _cold_start
+    _cold_start = False
+
+
+def measured_request(event, context, handler) -> dict:
+    """Atiende la petición con handler midiendo las fases y escribe la línea EMF en el log"""
+    global _metrics
+    _metrics = RequestMetrics(f"{event.get('httpMethod')} {event.get('resource')}", _cold_start)
+    warm_container()
+    try:
+        response = handler(event, context)
+        print(json.dumps(_metrics.emf(response, context)))
+        return response
+    finally:
+        _metrics = None
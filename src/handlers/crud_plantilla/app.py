@@ -1,336 +1,279 @@
 # CRUD PLANTILLA
-# Get one, Get All, Post, Put and Delete endpoints
+# Get one, Get All, Post, Put and Delete endpoints (motor compartido de crud_common, borrado lógico)
+# más las rutas propias de /plantilla: bulk, version, render y export (un módulo por funcionalidad)
 
-import json
 import os
 import uuid
-from datetime import datetime
-from typing import Dict, Optional
 
-import pytz
 from bson import ObjectId
-from pydantic import BaseModel, Field
-from pymongo import MongoClient, ASCENDING, DESCENDING
-
-# Required environment variables
-PLANTILLAS_CRUD_HOST = os.environ.get('PLANTILLAS_CRUD_HOST')
-PLANTILLAS_CRUD_PORT = os.environ.get('PLANTILLAS_CRUD_PORT')
-PLANTILLAS_CRUD_USERNAME = os.environ.get('PLANTILLAS_CRUD_USERNAME')
-PLANTILLAS_CRUD_PASS = os.environ.get('PLANTILLAS_CRUD_PASS')
-PLANTILLAS_CRUD_DB = os.environ.get('PLANTILLAS_CRUD_DB')
-TIMEZONE = os.environ.get('TIMEZONE')
-COLLECTION = "plantilla"
+from pymongo import ASCENDING, DESCENDING, IndexModel, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from crud_common import engine
+from crud_common.cache import LruCache, TmpCache
+from crud_common.engine import (PLANTILLAS_CRUD_CACHE_MAX_ENTRIES, PLANTILLAS_CRUD_CACHE_TTL_SECONDS, as_stored,
+                                format_response, get_header, is_modified)
+from crud_common.metrics import PLANTILLAS_CRUD_METRICS, measured_request, phase
+from crud_plantilla.bulk import bulk_request
+from crud_plantilla.compression import compress_response
+from crud_plantilla.content import (CONTENT_COLLECTION, PLANTILLAS_CRUD_CONTENT_STORE, content_projection,
+                                    insert_document, load_contenido, set_contenido_hash, store_contenido,
+                                    stored_document, wants_contenido, without_contenido_hash)
+from crud_plantilla.etag import (conditional_response, document_etag, etag_matches, etag_projection, not_modified,
+                                 with_body_etag, with_etag)
+from crud_plantilla.export import export_request
+from crud_plantilla.listing import (expand_projection, find_stages, find_with_total, latest_stages, parse_count_params,
+                                    parse_expand)
+from crud_plantilla.models import FIELD_TYPES, get_models
+from crud_plantilla.render import render_request
+from crud_plantilla.search import CONTENT_INDEXES, TEXT_INDEX, search_stages
+from crud_plantilla.versions import raise_version_counters, set_grupo_id, version_request
+
+# Optional environment variables (get_all response cache: memory | tmp | off; TTL and entries in crud_common)
+PLANTILLAS_CRUD_QUERY_CACHE = os.environ.get('PLANTILLAS_CRUD_QUERY_CACHE', 'memory').lower()
+PLANTILLAS_CRUD_QUERY_CACHE_MAX_BYTES = int(os.environ.get('PLANTILLAS_CRUD_QUERY_CACHE_MAX_BYTES', 16 * 1024 * 1024))
+PLANTILLAS_CRUD_QUERY_CACHE_DIR = os.environ.get('PLANTILLAS_CRUD_QUERY_CACHE_DIR', '/tmp/plantillas_crud_query_cache')
 
-ORDER_LABEL = {
-    "desc": DESCENDING,
-    "asc": ASCENDING
+COLLECTION = "plantilla"
+# Campos pesados que get_all excluye salvo include=campo o fields=campo
+HEAVY_FIELDS = ["contenido"]
+
+# Campos con __startswith: prefijo anclado y sensible a mayúsculas, resuelto con el índice del campo
+PREFIX_FIELDS = ["nombre", "codigo_abreviacion"]
+
+# Índices de la colección: filtros de get_query y campos de sortby
+PLANTILLA_INDEXES = [
+    IndexModel([("tipo_plantilla_id", ASCENDING)], name="tipo_plantilla_id_1"),
+    IndexModel([("sistema_id", ASCENDING)], name="sistema_id_1"),
+    IndexModel([("grupo_id", ASCENDING), ("version", DESCENDING)], name="grupo_id_1_version_-1"),
+    # Una sola plantilla por versión de cada grupo. Solo grupo_id UUID (POST, bulk y version): PUT guarda grupo_id
+    # como lo recibe (null o texto) y version 0 si se omiten
+    IndexModel([("grupo_id", ASCENDING), ("version", ASCENDING)], name="grupo_id_1_version_1", unique=True,
+               partialFilterExpression={"grupo_id": {"$type": "binData"}}),
+    IndexModel([("activo", ASCENDING), ("grupo_id", ASCENDING), ("version", DESCENDING)],
+               name="activo_1_grupo_id_1_version_-1"),
+    IndexModel([("codigo_abreviacion", ASCENDING)], name="codigo_abreviacion_1"),
+    IndexModel([("nombre", ASCENDING)], name="nombre_1"),
+    IndexModel([("fecha_creacion", DESCENDING)], name="fecha_creacion_-1"),
+    # search=
+    TEXT_INDEX,
+]
+# Colección -> índices que crea ensure_indexes
+INDEXES = {COLLECTION: PLANTILLA_INDEXES}
+if PLANTILLAS_CRUD_CONTENT_STORE:
+    PLANTILLA_INDEXES.append(IndexModel([("contenido_hash", ASCENDING)], name="contenido_hash_1"))
+    INDEXES[CONTENT_COLLECTION] = CONTENT_INDEXES
+
+# Rutas propias de /plantilla: (resource, método HTTP) -> función(recurso, event)
+ROUTES = {
+    ("/plantilla/bulk", "POST"): bulk_request,
+    ("/plantilla/bulk", "PUT"): bulk_request,
+    ("/plantilla/bulk", "DELETE"): bulk_request,
+    ("/plantilla/version", "POST"): version_request,
+    ("/plantilla/{id}/render", "POST"): render_request,
+    ("/plantilla/export", "GET"): export_request,
 }
 
 
-def local_now():
-    """Datetime por Timezone"""
-    return datetime.now(tz=pytz.timezone(TIMEZONE))
-
-
-class PlantillaModel(BaseModel):
-    """Modelo de datos de Plantilla"""
-    tipo_plantilla_id: str
-    sistema_id: int
-    nombre: Optional[str] = None
-    codigo_abreviacion: Optional[str] = None
-    contenido: Optional[str] = None
-    grupo_id: Optional[str] = None
-    version: Optional[int] = 0
-    uid: Optional[str] = None
-    metadatos: Optional[Dict] = None
-    activo: bool = Field(default=True)
-
-
-class PlantillaCreationModel(PlantillaModel):
-    fecha_creacion: datetime = Field(default=local_now())
-
-
-class DeletePlantillaModel(BaseModel):
-    activo: Optional[bool] = Field(default=False)
-
-
-# Gestión de conexión con la BD
-def connect_db_client():
-    """Genera el cliente para establecer la conexión con la base de datos"""
-    try:
-        # With password
-        if PLANTILLAS_CRUD_USERNAME and PLANTILLAS_CRUD_PASS:
-            uri = f"mongodb://{PLANTILLAS_CRUD_USERNAME}:{PLANTILLAS_CRUD_PASS}@{PLANTILLAS_CRUD_HOST}:{PLANTILLAS_CRUD_PORT}/"
-        else:
-            # Without password
-            uri = f"mongodb://{PLANTILLAS_CRUD_HOST}:{PLANTILLAS_CRUD_PORT}/"
-
-        client = MongoClient(uri, uuidRepresentation='standard')
-        print("Successful connection to the database")
-        return client
-    except Exception as ex:
-        print(f"Error connecting to the database: {ex}")
-        return None
-
-
-def close_connect_db(client):
-    try:
-        print("Closing client DB")
-        if client:
-            client.close()
-    except Exception as ex:
-        print(f"Error close Client DB. Detail: {ex}")
-
-
-# Deserialización de parámetros de entrada
-# parse_body -> body de las peticiones POST, PUT, DELETE
-def parse_body(event) -> tuple:
-    try:
-        return json.loads(event["body"]), None
-    except Exception as ex:
-        return None, ex
-
-
-def get_query(query_str: str) -> dict:
-    query_total = {}
-    int_fields = ['version', 'sistema_id']
-    for cond in query_str.split(","):
-        kv = cond.split(":", 1)
-        if len(kv) == 2:
-            k, v = kv
-            if v == 'false':
-                v = False
-            elif v == 'true':
-                v = True
-
-            if k in int_fields:
-                v = int(v)
-            elif k == 'grupo_id':
-                v = uuid.UUID(v)
-
-            if k == "_id":
-                v = ObjectId(v)
-        else:
-            k, v = kv[0], None
-        query_total[k] = v
-    return query_total
-
-
-def get_sort_by(query_params) -> list:
-    sort_by_total = []
-    if query_params.get("sortby"):
-        sort_by_list = str(query_params.get("sortby")).split(",")
-        if query_params.get("order"):
-            order_list = str(query_params.get("order")).split(",")
-            if len(order_list) == 1:
-                # Default ASCENDING
-                order_label = ORDER_LABEL.get(query_params.get("order"), ASCENDING)
-                sort_by_total = [(e, order_label) for e in sort_by_list]
-            elif len(order_list) == len(sort_by_list):
-                for i, e in enumerate(sort_by_list):
-                    order_label = ORDER_LABEL.get(order_list[i], ASCENDING)
-                    sort_by_total.append((e, order_label))
+class PlantillaResource(engine.CrudResource):
+    """plantilla sobre el CRUD del motor: contenido inline o por digest, versiones por grupo_id, ETag en las
+    lecturas y parámetros de listado propios (include, history, latest, count, facets, search, expand)"""
+
+    batch_options = ("expand",)
+
+    # Escrituras
+    def create(self, data, collection):
+        try:
+            grupo_supplied = bool(data.get("grupo_id"))
+            set_grupo_id(data)
+            if grupo_supplied:
+                raise_version_counters({data["grupo_id"]: data.get("version")}, collection)
+            if insert_document(data, collection):
+                data = without_contenido_hash([as_stored(data, collection)])[0]
+                return format_response(data, "Registration successful", 201, True)
+            return format_response({}, "Registration unsuccessful", 400, False)
+        except DuplicateKeyError as ex:
+            # grupo_id_1_version_1 (or another unique index): same status as a bulk write error
+            return format_response({}, f"Registration unsuccessful! Detail: {ex}", 409, False)
+        except Exception as ex:
+            return format_response({}, f"Error service Post: {ex}", 500, False)
+
+    def update(self, _id, data, collection):
+        try:
+            set_contenido_hash(data)
+            store_contenido(data, collection)
+            document = stored_document(data)
+            update_ = {"$set": document}
+            if document is not data:
+                update_["$unset"] = {"contenido": ""}
+            filter_ = {"_id": ObjectId(_id)}
+            previous = collection.find_one_and_update(filter_, update_, return_document=ReturnDocument.BEFORE)
+            changes = as_stored(data, collection)
+            modified = previous and (is_modified(previous, as_stored(document, collection)) or
+                                     ("$unset" in update_ and "contenido" in previous))
+            if modified:
+                previous.update(changes)
+                return format_response(without_contenido_hash([previous])[0], "Update successful", 200, True)
+            return format_response({}, "Update unsuccessful", 400, False)
+        except Exception as ex:
+            return format_response({}, f"Error service Put: {ex}", 500, False)
+
+    # Lecturas
+    def projection(self, fields: list):
+        return content_projection(fields)
+
+    def parse_params(self, query_params: dict, query: dict):
+        # history: grupo_id -> every version of the group, newest first, without contenido
+        if query_params.get("history"):
+            history_filter = {"grupo_id": uuid.UUID(str(query_params.get("history")))}
+            if query.get("filter"):
+                history_filter = {"$and": [query["filter"], history_filter]}
+            query["filter"] = history_filter
+            query["sort"] = query.get("sort") or [("version", DESCENDING)]
+            projection = query.get("projection")
+            if isinstance(projection, list):
+                query["projection"] = [f for f in projection if f not in HEAVY_FIELDS]
             else:
-                # Default ASCENDING
-                sort_by_total = [(e, ASCENDING) for e in sort_by_list]
-    return sort_by_total
-
-
-def parse_query_params(event) -> tuple:
-    try:
-        query_params_result = {"limit": 10}
-        query_params = event["queryStringParameters"]
-        if isinstance(query_params, dict):
-            # query: k:v, k: v
-            if query_params.get("query"):
-                query_params_result["filter"] = get_query(str(query_params.get("query")))
-
-            # fields: col1, col2, entity.col3
-            if query_params.get("fields"):
-                query_params_result["projection"] = str(query_params.get("fields")).split(",")
-
-            # sortby: col1,col2
-            # order: desc,asc
-            if query_params.get("sortby"):
-                query_params_result["sort"] = get_sort_by(query_params)
-
-            # limit: 10 (default is 10)
-            if query_params.get("limit"):
-                query_params_result["limit"] = int(query_params.get("limit"))
-
-            # offset: 0 (default is 0)
-            if query_params.get("offset"):
-                query_params_result["skip"] = int(query_params.get("offset"))
-
-            return query_params_result, None
-        else:
-            return query_params_result, None
-    except Exception as ex:
-        print(f"Error in parse_query_params. Detail: {ex}")
-        return {}, ex
-
-
-# Formato de respuestas
-def format_specific_values(result):
-    if result.get("_id"):
-        result["_id"] = str(result["_id"])
-    if result.get("fecha_creacion"):
-        result["fecha_creacion"] = str(result["fecha_creacion"])
-    if result.get("grupo_id"):
-        result["grupo_id"] = str(result["grupo_id"])
-    return result
-
-
-def format_response(result, message: str, status_code: int, success: bool) -> dict:
-    """Formats the HTTP response."""
-    body = {
-        "Success": success,
-        "Status": status_code,
-        "Message": message
-    }
-    if success and result is not None:
-        if isinstance(result, dict):
-            body["Data"] = format_specific_values(result)
-        elif isinstance(result, list):
-            body["Data"] = [format_specific_values(item) for item in result]
-        else:
-            body["Data"] = result
-    return {"statusCode": status_code, "body": json.dumps(body)}
-
-
-def create(data, collection):
-    try:
-        if data.get("grupo_id"):
-            data["grupo_id"] = uuid.UUID(data.get("grupo_id"))
-        else:
-            data["grupo_id"] = uuid.uuid4()
-        result = collection.insert_one(data)
-        if result:
-            new_data_id = result.inserted_id
-            new_data = collection.find_one(new_data_id)
-            return format_response(new_data, "Registration successful", 201, True)
-        return format_response({}, "Registration unsuccessful", 400, False)
-    except Exception as ex:
-        return format_response({}, f"Error service Post: {ex}", 500, False)
-
-
-def update(_id, data, collection):
-    try:
-        filter_ = {"_id": ObjectId(_id)}
-        result = collection.update_one(filter_, {"$set": data})
-        if result.modified_count:
-            updated_data = collection.find_one(filter_)
-            return format_response(updated_data, "Update successful", 200, True)
-        return format_response({}, "Update unsuccessful", 400, False)
-    except Exception as ex:
-        return format_response({}, f"Error service Put: {ex}", 500, False)
-
-
-def delete(_id, data, collection):
-    try:
-        filter_ = {"_id": ObjectId(_id)}
-        result = collection.update_one(filter_, {"$set": data})
-        if result.modified_count:
-            updated_data = collection.find_one(filter_)
-            return format_response(updated_data, "Delete successful", 200, True)
-        return format_response(None, "Delete unsuccessful", 400, False)
-    except Exception as ex:
-        return format_response({}, f"Error service Delete: {ex}", 500, False)
-
-
-def get_all(query, collection):
-    try:
-        data = list(collection.find(**query))
-        if data:
+                query["projection"] = {field: 0 for field in HEAVY_FIELDS}
+
+        # latest: true -> only the highest active version of each grupo_id
+        if str(query_params.get("latest", "")).lower() == "true":
+            if query_params.get("cursor") is not None or query_params.get("count") or query_params.get("facets"):
+                raise ValueError("latest cannot be combined with cursor, count or facets")
+            query["latest"] = True
+
+        # count: exact | estimated
+        # facets: sistema_id,tipo_plantilla_id,activo
+        if query_params.get("count") or query_params.get("facets"):
+            query["count"] = parse_count_params(query_params, query.get("filter"))
+
+        # search: text -> text index search ranked by score, with a snippet of contenido
+        if query_params.get("search"):
+            if (query_params.get("cursor") is not None or query_params.get("sortby") or query_params.get("latest")
+                    or query_params.get("count") or query_params.get("facets")):
+                raise ValueError("search cannot be combined with cursor, sortby, latest, count or facets")
+            query["search"] = str(query_params.get("search"))
+
+        # expand: tipo_plantilla -> embeds TIPO_PLANTILLA_FIELDS with one $lookup
+        if parse_expand(query_params):
+            query["expand"] = True
+            query["projection"] = expand_projection(query.get("projection"))
+
+    def parse_one_params(self, event) -> tuple:
+        """Proyección de get_one (content=only: solo contenido, o fields=col1,col2), expand e If-None-Match"""
+        try:
+            query_params = event.get("queryStringParameters") or {}
+            projection = None
+            if str(query_params.get("content", "")).lower() == "only":
+                projection = ["contenido", "contenido_hash"]
+            elif query_params.get("fields"):
+                projection = content_projection(str(query_params.get("fields")).split(","))
+            params = {"projection": projection, "if_none_match": get_header(event, "If-None-Match")}
+            if parse_expand(query_params):
+                params["expand"] = True
+                params["projection"] = expand_projection(projection)
+            return params, None
+        except ValueError as ex:
+            return None, ex
+
+    def find(self, query: dict, options: dict, collection) -> tuple:
+        expand = options.get("expand", False)
+        if options.get("count"):
+            return find_with_total(query, options["count"], collection, expand)
+        if expand:
+            return list(collection.aggregate(find_stages(query, expand))), {}
+        return list(collection.find(**query)), {}
+
+    def after_read(self, documents: list, projection, collection) -> list:
+        if wants_contenido(projection):
+            load_contenido(documents, collection)
+        return without_contenido_hash(documents)
+
+    def get_all(self, query, collection):
+        if not (query.get("latest") or query.get("search")):
+            return super().get_all(query, collection)
+        try:
+            if query.get("latest"):
+                data = list(collection.aggregate(latest_stages(query), allowDiskUse=True))
+            else:
+                data = list(collection.aggregate(search_stages(query, collection)))
+            self.after_read(data, query.get("projection"), collection)
             return format_response(data, "Request successful", 200, True)
-        return format_response([], "Request successful", 200, True)
-    except Exception as ex:
-        return format_response({}, f"Error service GetAll: {ex}", 500, False)
+        except Exception as ex:
+            return format_response({}, f"Error service GetAll: {ex}", 500, False)
+
+    def get_one(self, _id, collection, projection=None, if_none_match=None, **options):
+        try:
+            etag_fields = etag_projection(projection)
+            # With expand the ETag also covers the embedded tipo_plantilla
+            if if_none_match and etag_fields is not None and not options.get("expand"):
+                # Projection-only lookup: contenido is not read when the client copy is still valid
+                meta = collection.find_one({"_id": ObjectId(_id)}, etag_fields)
+                if meta is None:
+                    return format_response({}, "Request unsuccessful", 404, False)
+                if "contenido_hash" in meta:
+                    etag = document_etag(meta)
+                    if etag_matches(if_none_match, etag):
+                        return not_modified(etag)
+
+            # Without after_read: the ETag uses the stored contenido_hash, removed afterwards from the body
+            documents, _ = self.find({"filter": {"_id": ObjectId(_id)}, "projection": projection, "limit": 1},
+                                     options, collection)
+            if documents:
+                data = documents[0]
+                if wants_contenido(projection):
+                    load_contenido(documents, collection)
+                etag = document_etag(data)
+                if etag_matches(if_none_match, etag):
+                    return not_modified(etag)
+                without_contenido_hash(documents)
+                return with_etag(format_response(data, "Request successful", 200, True), etag)
+            return format_response({}, "Request unsuccessful", 404, False)
+        except Exception as ex:
+            return format_response({}, f"Error service GetOne: {ex}", 500, False)
+
+    def read_response(self, event, key: tuple, build, collection) -> dict:
+        """GET por _id no usa la caché: get_one resuelve If-None-Match con una lectura solo de metadatos.
+        Listados e ids= llevan el ETag del body y se guardan con él; expand= no se guarda porque depende de
+        escrituras en tipo_plantilla que la generación de plantilla no registra"""
+        route, params = key
+        if route == "one":
+            return build()
+        if params.get("expand"):
+            return conditional_response(event, build())
+        return conditional_response(event, super().read_response(event, key, lambda: with_body_etag(build()),
+                                                                 collection))
+
+
+def new_query_cache():
+    if PLANTILLAS_CRUD_QUERY_CACHE == "tmp":
+        return TmpCache(PLANTILLAS_CRUD_QUERY_CACHE_DIR, PLANTILLAS_CRUD_CACHE_MAX_ENTRIES,
+                        PLANTILLAS_CRUD_CACHE_TTL_SECONDS, PLANTILLAS_CRUD_QUERY_CACHE_MAX_BYTES,
+                        metric_prefix="QueryCache")
+    ttl_seconds = PLANTILLAS_CRUD_CACHE_TTL_SECONDS if PLANTILLAS_CRUD_QUERY_CACHE == "memory" else 0
+    return LruCache(PLANTILLAS_CRUD_CACHE_MAX_ENTRIES, ttl_seconds, PLANTILLAS_CRUD_QUERY_CACHE_MAX_BYTES,
+                    metric_prefix="QueryCache")
+
+
+# Caché de respuestas de lectura (por contenedor): llave = generación de escrituras + consulta normalizada
+query_cache = new_query_cache()
+
+RESOURCE = PlantillaResource(COLLECTION, lambda: get_models().PlantillaModel, FIELD_TYPES, delete_strategy="soft",
+                             indexes=INDEXES, prefix_fields=PREFIX_FIELDS, cache=query_cache,
+                             creation_model_factory=lambda: get_models().PlantillaCreationModel,
+                             heavy_fields=HEAVY_FIELDS, routes=ROUTES)
+
+
+def handle_request(event, context):
+    response = RESOURCE.handle(event, context)
+    with phase("compress"):
+        return compress_response(event, response)
 
 
-def get_one(_id, collection):
-    try:
-        data = collection.find_one({"_id": ObjectId(_id)})
-        if data:
-            return format_response(data, "Request successful", 200, True)
-        return format_response({}, "Request unsuccessful", 404, False)
-    except Exception as ex:
-        return format_response({}, f"Error service GetOne: {ex}", 500, False)
+def lambda_handler(event, context):
+    if PLANTILLAS_CRUD_METRICS:
+        return measured_request(event, context, handle_request)
+    return handle_request(event, context)
 
 
-def lambda_handler(event, context):
-    client = None
-    try:
-        http_method = event['httpMethod']
-
-        if http_method == 'POST':
-            data, error = parse_body(event)
-            if error is None:
-                # Validate structure
-                plantilla_data = PlantillaCreationModel(**data).__dict__
-                client = connect_db_client()
-                if client:
-                    plantilla_collection = client[str(PLANTILLAS_CRUD_DB)][COLLECTION]
-                    response = create(plantilla_data, plantilla_collection)
-                    close_connect_db(client)
-                    return response
-                return format_response({}, "Error registering new plantilla!", 500, False)
-            else:
-                return format_response({}, "Error registering new plantilla! Detail: Error in input data", 500, False)
-
-        elif http_method == 'PUT':
-            data, error = parse_body(event)
-            if error is None:
-                # Validate structure
-                plantilla_id = event["pathParameters"]["id"]
-                plantilla_data = PlantillaModel(**data).__dict__
-                client = connect_db_client()
-                if client:
-                    plantilla_collection = client[str(PLANTILLAS_CRUD_DB)][COLLECTION]
-                    response = update(plantilla_id, plantilla_data, plantilla_collection)
-                    close_connect_db(client)
-                    return response
-                return format_response({}, "Error updating plantilla!", 500, False)
-            else:
-                return format_response(error, "Error updating plantilla! Detail: Error in input data", 500, False)
-
-        elif http_method == 'DELETE':
-            plantilla_id = event["pathParameters"]["id"]
-            plantilla_data = DeletePlantillaModel().__dict__
-            client = connect_db_client()
-            if client:
-                plantilla_collection = client[str(PLANTILLAS_CRUD_DB)][COLLECTION]
-                response = delete(plantilla_id, plantilla_data, plantilla_collection)
-                close_connect_db(client)
-                return response
-            return format_response(None, "Error deleting plantilla!", 500, False)
-
-        elif http_method == 'GET':
-            client = connect_db_client()
-            if client:
-                plantilla_collection = client[str(PLANTILLAS_CRUD_DB)][COLLECTION]
-                if 'pathParameters' in event and event['pathParameters'] is not None:
-                    _id = event["pathParameters"]["id"]
-                    response = get_one(_id, plantilla_collection)
-                    close_connect_db(client)
-                    return response
-                else:
-                    query_complement, err = parse_query_params(event)
-                    if err is None:
-                        response = get_all(query_complement, plantilla_collection)
-                        close_connect_db(client)
-                        return response
-                    else:
-                        return format_response(
-                            {},
-                            "Error service GetAll: The request contains an incorrect parameter or no record exists",
-                            404,
-                            True)
-            return format_response({}, "Error getting plantilla!", 500, False)
-
-        else:
-            close_connect_db(client)
-            return format_response({}, f"HTTP method not allowed", 500, False)
-    except Exception as ex:
-        close_connect_db(client)
-        return format_response({}, f"Error in plantilla request! Detail: {ex}", 500, False)
+engine.register(RESOURCE, lambda_handler)
@@ -0,0 +1,170 @@
+# CRUD PLANTILLA - LOTES
+# POST, PUT y DELETE /plantilla/bulk: un solo bulk_write con el resultado de cada elemento
+
+import os
+
+from bson import ObjectId
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError
+
+from crud_common.engine import (SOFT_DELETE_FIELDS, as_stored, connect_db_client, format_response, is_modified,
+                                parse_body)
+from crud_common.metrics import phase
+from crud_plantilla.content import (PLANTILLAS_CRUD_CONTENT_STORE, bulk_upsert, content_collection, content_upsert,
+                                    set_contenido_hash, stored_document)
+from crud_plantilla.models import get_models
+from crud_plantilla.versions import raise_version_counters, set_grupo_id
+
+PLANTILLAS_CRUD_BULK_MAX_ITEMS = int(os.environ.get('PLANTILLAS_CRUD_BULK_MAX_ITEMS', 500))
+
+
+def bulk_item_result(index: int, _id, status_code: int, message: str) -> dict:
+    return {
+        "Index": index,
+        "Id": str(_id) if _id is not None else None,
+        "Success": status_code < 300,
+        "Status": status_code,
+        "Message": message
+    }
+
+
+def parse_bulk_id(item):
+    """Acepta "id" o {"_id": "id", ...} y retorna el ObjectId y los demás campos"""
+    if isinstance(item, dict):
+        fields = dict(item)
+        return ObjectId(fields.pop("_id")), fields
+    return ObjectId(item), {}
+
+
+def bulk_operations(http_method: str, items: list) -> tuple:
+    """Valida cada elemento y genera las operaciones de bulk_write (y en PUT y DELETE su update);
+    los inválidos no abortan el lote"""
+    results = [None] * len(items)
+    operations, updates, positions, contents, versions = [], [], [], {}, {}
+    for i, item in enumerate(items):
+        _id = None
+        try:
+            if http_method == 'POST':
+                data = get_models().PlantillaCreationModel(**item).__dict__
+                grupo_supplied = bool(data.get("grupo_id"))
+                data = set_contenido_hash(set_grupo_id(data))
+                data["_id"] = _id = ObjectId()
+                operation, update_ = InsertOne(stored_document(data)), None
+                if grupo_supplied and isinstance(data.get("version"), int):
+                    grupo_id = data["grupo_id"]
+                    versions[grupo_id] = max(versions.get(grupo_id, data["version"]), data["version"])
+            elif http_method == 'PUT':
+                _id, fields = parse_bulk_id(item)
+                data = set_contenido_hash(get_models().PlantillaModel(**fields).__dict__)
+                document = stored_document(data)
+                update_ = {"$set": document}
+                if document is not data:
+                    update_["$unset"] = {"contenido": ""}
+                operation = UpdateOne({"_id": _id}, update_)
+            else:
+                _id, _ = parse_bulk_id(item)
+                update_ = {"$set": SOFT_DELETE_FIELDS}
+                operation = UpdateOne({"_id": _id}, update_)
+        except Exception as ex:
+            results[i] = bulk_item_result(i, _id, 400, f"Error in input data: {ex}")
+            continue
+        operations.append(operation)
+        updates.append(update_)
+        positions.append((i, _id))
+        if http_method != 'DELETE' and PLANTILLAS_CRUD_CONTENT_STORE and data.get("contenido") is not None:
+            contents[data["contenido_hash"]] = content_upsert(data)
+    return operations, updates, positions, results, list(contents.values()), versions
+
+
+def stored_previous(updates: list, ids: list, collection) -> tuple:
+    """Campos que cambian los updates, por _id, sin leer contenido (contenido_hash lo representa),
+    y los _id que aún tienen contenido en el documento (un $unset de contenido los modifica)"""
+    fields = {field for update_ in updates for field in update_["$set"] if field != "contenido"}
+    previous = {d["_id"]: d for d in collection.find({"_id": {"$in": ids}}, {field: 1 for field in fields})}
+    inline = set()
+    if any("$unset" in update_ for update_ in updates):
+        inline = {d["_id"] for d in collection.find({"_id": {"$in": ids}, "contenido": {"$exists": True}}, {"_id": 1})}
+    return previous, inline
+
+
+def would_modify(update_: dict, previous: dict, inline: bool, collection) -> bool:
+    """Como is_modified en PUT y DELETE /plantilla/{id}; contenido se compara por contenido_hash"""
+    changes = {k: v for k, v in as_stored(update_["$set"], collection).items() if k != "contenido"}
+    return is_modified(previous, changes) or ("$unset" in update_ and inline)
+
+
+def bulk_write(http_method: str, items: list, ordered: bool, collection):
+    try:
+        with phase("validate"):
+            (operations, updates, positions, results, content_operations,
+             versions) = bulk_operations(http_method, items)
+        if content_operations:
+            bulk_upsert(content_operations, content_collection(collection))
+        raise_version_counters(versions, collection)
+
+        # PUT/DELETE: ids that do not exist (404) or that the operation would not change (400, as in
+        # PUT and DELETE /plantilla/{id}) are reported without sending them to bulk_write
+        if http_method != 'POST' and positions:
+            previous, inline = stored_previous(updates, [_id for _, _id in positions], collection)
+            unmodified = "Update unsuccessful" if http_method == 'PUT' else "Delete unsuccessful"
+            pending = []
+            for operation, update_, (i, _id) in zip(operations, updates, positions):
+                if _id not in previous:
+                    results[i] = bulk_item_result(i, _id, 404, "Record not found")
+                elif not would_modify(update_, previous[_id], _id in inline, collection):
+                    results[i] = bulk_item_result(i, _id, 400, unmodified)
+                else:
+                    pending.append((operation, (i, _id)))
+            operations = [operation for operation, _ in pending]
+            positions = [position for _, position in pending]
+
+        write_errors, executed = {}, len(operations)
+        if operations:
+            try:
+                collection.bulk_write(operations, ordered=ordered)
+            except BulkWriteError as bwe:
+                write_errors = {e["index"]: e.get("errmsg", "Write error") for e in bwe.details.get("writeErrors", [])}
+                if ordered and write_errors:
+                    executed = min(write_errors) + 1
+
+        success_status, success_message = {
+            'POST': (201, "Registration successful"),
+            'PUT': (200, "Update successful"),
+            'DELETE': (200, "Delete successful"),
+        }[http_method]
+        for k, (i, _id) in enumerate(positions):
+            if k in write_errors:
+                results[i] = bulk_item_result(i, _id, 409, f"Write error: {write_errors[k]}")
+            elif k >= executed:
+                results[i] = bulk_item_result(i, _id, 424, "Not executed, a previous item failed (ordered)")
+            else:
+                results[i] = bulk_item_result(i, _id, success_status, success_message)
+
+        succeeded = sum(1 for r in results if r["Success"])
+        status_code = success_status if succeeded == len(results) else 207
+        # Data carries the result of each item even when every item failed
+        return format_response(results, f"Bulk request processed: {succeeded}/{len(results)} successful",
+                               status_code, succeeded > 0 or not results, {"Data": results})
+    except Exception as ex:
+        return format_response({}, f"Error service Bulk: {ex}", 500, False)
+
+
+def bulk_request(resource, event):
+    http_method = event['httpMethod']
+    with phase("parse"):
+        data, error = parse_body(event)
+    if error is not None or not isinstance(data, list):
+        return format_response({}, "Error in bulk plantilla request! Detail: The body must be a JSON array", 400, False)
+    if len(data) > PLANTILLAS_CRUD_BULK_MAX_ITEMS:
+        return format_response(
+            {}, f"Error in bulk plantilla request! Detail: Maximum {PLANTILLAS_CRUD_BULK_MAX_ITEMS} items per request",
+            400, False)
+    query_params = event.get("queryStringParameters") or {}
+    ordered = str(query_params.get("ordered", "false")).lower() == "true"
+    with phase("connect"):
+        client = connect_db_client()
+    if client:
+        plantilla_collection = resource.get_collection(client)
+        with phase("db"):
+            return resource.write(bulk_write(http_method, data, ordered, plantilla_collection), plantilla_collection)
+    return format_response({}, "Error in bulk plantilla request!", 500, False)
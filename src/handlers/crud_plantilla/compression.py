@@ -0,0 +1,76 @@
+# CRUD PLANTILLA - COMPRESIÓN
+# Compresión de respuestas según Accept-Encoding (br si la librería brotli está instalada, si no gzip)
+
+import base64
+import gzip
+import os
+from typing import Optional
+
+from crud_common.engine import get_header
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Optional environment variables (response compression)
+PLANTILLAS_CRUD_COMPRESSION = os.environ.get('PLANTILLAS_CRUD_COMPRESSION', 'true').lower() == 'true'
+PLANTILLAS_CRUD_COMPRESSION_MIN_BYTES = int(os.environ.get('PLANTILLAS_CRUD_COMPRESSION_MIN_BYTES', 1024))
+PLANTILLAS_CRUD_GZIP_LEVEL = int(os.environ.get('PLANTILLAS_CRUD_GZIP_LEVEL', 6))
+PLANTILLAS_CRUD_BROTLI_QUALITY = int(os.environ.get('PLANTILLAS_CRUD_BROTLI_QUALITY', 5))
+
+
+def accepted_encodings(event) -> dict:
+    """Accept-Encoding: gzip, br;q=0.8 -> {"gzip": 1.0, "br": 0.8}"""
+    encodings = {}
+    for item in str(get_header(event, "Accept-Encoding") or "").split(","):
+        parts = item.strip().split(";")
+        if not parts[0]:
+            continue
+        quality = 1.0
+        for param in parts[1:]:
+            key, _, value = param.strip().partition("=")
+            if key == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        encodings[parts[0].strip().lower()] = quality
+    return encodings
+
+
+def choose_encoding(event) -> Optional[str]:
+    encodings = accepted_encodings(event)
+    wildcard = encodings.get("*", 0)
+    candidates = (["br"] if brotli is not None else []) + ["gzip"]
+    ranked = [(encodings.get(coding, wildcard), -i, coding) for i, coding in enumerate(candidates)]
+    quality, _, coding = max(ranked)
+    return coding if quality > 0 else None
+
+
+def compress_response(event, response: dict) -> dict:
+    """Comprime el body (gzip o br) si supera el umbral y el cliente lo acepta; API Gateway lo recibe en base64"""
+    body = response.get("body")
+    if not PLANTILLAS_CRUD_COMPRESSION or not isinstance(body, str) or response.get("isBase64Encoded"):
+        return response
+    raw = body.encode("utf-8")
+    if len(raw) < PLANTILLAS_CRUD_COMPRESSION_MIN_BYTES:
+        return response
+    encoding = choose_encoding(event)
+    if encoding is None:
+        return response
+    if encoding == "br":
+        compressed = brotli.compress(raw, quality=PLANTILLAS_CRUD_BROTLI_QUALITY)
+    else:
+        compressed = gzip.compress(raw, compresslevel=PLANTILLAS_CRUD_GZIP_LEVEL, mtime=0)
+    if len(compressed) >= len(raw):
+        return response
+    headers = {"Content-Type": "application/json"}
+    headers.update(response.get("headers") or {})
+    headers.update({"Content-Encoding": encoding, "Vary": "Accept-Encoding"})
+    return {
+        **response,
+        "headers": headers,
+        "body": base64.b64encode(compressed).decode(),
+        "isBase64Encoded": True
+    }
@@ -0,0 +1,153 @@
+# CRUD PLANTILLA - CONTENIDO
+# contenido_hash (sha256 de contenido) y almacenamiento de contenido por digest (PLANTILLAS_CRUD_CONTENT_STORE):
+# CONTENT_COLLECTION guarda {_id: contenido_hash, contenido} una sola vez y plantilla solo la referencia
+
+import hashlib
+import os
+
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+
+# Optional environment variables (content-addressed storage of contenido)
+PLANTILLAS_CRUD_CONTENT_STORE = os.environ.get('PLANTILLAS_CRUD_CONTENT_STORE', 'false').lower() == 'true'
+
+CONTENT_COLLECTION = "plantilla_contenido"
+# Documents whose contenido is resolved in a single query
+CONTENT_BATCH_SIZE = 50
+
+
+def set_contenido_hash(data: dict) -> dict:
+    """contenido_hash (sha256 de contenido) permite calcular el ETag sin leer contenido"""
+    contenido = data.get("contenido")
+    data["contenido_hash"] = hashlib.sha256(contenido.encode("utf-8")).hexdigest() if contenido is not None else None
+    return data
+
+
+def content_collection(collection):
+    return collection.database[CONTENT_COLLECTION]
+
+
+def content_upsert(data: dict) -> UpdateOne:
+    return UpdateOne({"_id": data["contenido_hash"]}, {"$setOnInsert": {"contenido": data["contenido"]}}, upsert=True)
+
+
+def stored_document(data: dict) -> dict:
+    """Documento a guardar en la colección: sin contenido cuando este vive en CONTENT_COLLECTION"""
+    if not PLANTILLAS_CRUD_CONTENT_STORE or data.get("contenido") is None:
+        return data
+    return {k: v for k, v in data.items() if k != "contenido"}
+
+
+def bulk_upsert(operations: list, target):
+    """Escribe upserts idempotentes; un upsert concurrente de la misma clave (11000) no es un error"""
+    try:
+        target.bulk_write(operations, ordered=False)
+    except DuplicateKeyError:
+        pass
+    except BulkWriteError as bwe:
+        # Concurrent upsert of the same key: the other writer already applied it
+        if any(error.get("code") != 11000 for error in bwe.details.get("writeErrors", [])):
+            raise
+
+
+def store_contenido(data: dict, collection):
+    """Con PLANTILLAS_CRUD_CONTENT_STORE guarda contenido una sola vez por digest"""
+    if not PLANTILLAS_CRUD_CONTENT_STORE or data.get("contenido") is None:
+        return
+    bulk_upsert([content_upsert(data)], content_collection(collection))
+
+
+def wants_contenido(projection) -> bool:
+    if projection is None:
+        return True
+    if isinstance(projection, dict):
+        return projection.get("contenido", 1) != 0
+    return "contenido" in projection
+
+
+def content_projection(projection):
+    """Las proyecciones que piden contenido también necesitan contenido_hash para resolverlo"""
+    if isinstance(projection, list) and "contenido" in projection and "contenido_hash" not in projection:
+        return projection + ["contenido_hash"]
+    return projection
+
+
+def without_contenido_hash(documents: list) -> list:
+    """contenido_hash es interno (ETag y plantilla_contenido): no va en los body de las respuestas"""
+    for document in documents:
+        document.pop("contenido_hash", None)
+    return documents
+
+
+def load_contenido(documents: list, collection) -> list:
+    """Resuelve contenido en una sola consulta para los documentos que solo tienen la referencia"""
+    digests = list({d["contenido_hash"] for d in documents if "contenido" not in d and d.get("contenido_hash")})
+    if digests:
+        contents = {c["_id"]: c["contenido"] for c in content_collection(collection).find({"_id": {"$in": digests}})}
+        for document in documents:
+            if "contenido" not in document and document.get("contenido_hash") in contents:
+                document["contenido"] = contents[document["contenido_hash"]]
+    return documents
+
+
+def iter_batches(iterable, size: int):
+    batch = []
+    for item in iterable:
+        batch.append(item)
+        if len(batch) >= size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def collection_size(db, name: str) -> int:
+    try:
+        return db.command("collStats", name).get("size", 0)
+    except Exception:
+        # The collection does not exist yet
+        return 0
+
+
+def migrate_contenido(collection, batch_size: int = CONTENT_BATCH_SIZE, dry_run: bool = False) -> dict:
+    """Mueve contenido de los documentos existentes a CONTENT_COLLECTION y reporta el espacio ahorrado"""
+    db = collection.database
+    report = {"documents": 0, "inline_bytes": 0, "unique_contents": 0, "unique_bytes": 0}
+    if not dry_run:
+        report["size_before"] = {name: collection_size(db, name) for name in (collection.name, CONTENT_COLLECTION)}
+    seen = set()
+    cursor = collection.find({"contenido": {"$type": "string"}}, {"contenido": 1}, batch_size=batch_size)
+    for documents in iter_batches(cursor, batch_size):
+        content_operations, operations = {}, []
+        for document in documents:
+            data = set_contenido_hash({"contenido": document["contenido"]})
+            size = len(document["contenido"].encode("utf-8"))
+            report["documents"] += 1
+            report["inline_bytes"] += size
+            if data["contenido_hash"] not in seen:
+                seen.add(data["contenido_hash"])
+                report["unique_contents"] += 1
+                report["unique_bytes"] += size
+            content_operations[data["contenido_hash"]] = content_upsert(data)
+            # The contenido condition skips documents modified since they were read
+            operations.append(UpdateOne({"_id": document["_id"], "contenido": document["contenido"]},
+                                        {"$set": {"contenido_hash": data["contenido_hash"]},
+                                         "$unset": {"contenido": ""}}))
+        if not dry_run:
+            content_collection(collection).bulk_write(list(content_operations.values()), ordered=False)
+            collection.bulk_write(operations, ordered=False)
+    report["saved_bytes"] = report["inline_bytes"] - report["unique_bytes"]
+    if not dry_run:
+        report["size_after"] = {name: collection_size(db, name) for name in (collection.name, CONTENT_COLLECTION)}
+    return report
+
+
+def insert_document(data: dict, collection) -> bool:
+    set_contenido_hash(data)
+    store_contenido(data, collection)
+    document = stored_document(data)
+    result = collection.insert_one(document)
+    if result:
+        # insert_one adds the generated _id to the document
+        data["_id"] = document["_id"]
+    return bool(result)
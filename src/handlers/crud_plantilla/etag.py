@@ -0,0 +1,67 @@
+# CRUD PLANTILLA - ETAG
+# ETag y peticiones condicionales (If-None-Match) en las lecturas de /plantilla
+
+import hashlib
+import json
+from typing import Optional
+
+from crud_common.engine import get_header, json_default
+from crud_plantilla.content import set_contenido_hash
+
+
+def document_etag(document: dict) -> str:
+    """ETag del documento: todos los campos salvo contenido, que se representa con contenido_hash"""
+    meta = {k: v for k, v in document.items() if k != "contenido"}
+    if "contenido_hash" not in meta and "contenido" in document:
+        # Documents written before contenido_hash existed, or projections with contenido
+        meta["contenido_hash"] = set_contenido_hash({"contenido": document["contenido"]})["contenido_hash"]
+    digest = hashlib.sha256(json.dumps(meta, sort_keys=True, default=json_default).encode("utf-8")).hexdigest()
+    return f'W/"{digest[:32]}"'
+
+
+def body_etag(body: str) -> str:
+    return f'W/"{hashlib.sha256(body.encode("utf-8")).hexdigest()[:32]}"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Comparación débil de If-None-Match (lista de ETags o *)"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag.removeprefix("W/") in [tag.removeprefix("W/") for tag in tags]
+
+
+def not_modified(etag: str) -> dict:
+    return {"statusCode": 304, "headers": {"ETag": etag}, "body": ""}
+
+
+def with_etag(response: dict, etag: str) -> dict:
+    headers = dict(response.get("headers") or {})
+    headers["ETag"] = etag
+    return {**response, "headers": headers}
+
+
+def with_body_etag(response: dict) -> dict:
+    """ETag calculado sobre el body de las respuestas exitosas (se guarda con ellas en la caché)"""
+    if response["statusCode"] != 200:
+        return response
+    return with_etag(response, body_etag(response["body"]))
+
+
+def conditional_response(event, response: dict) -> dict:
+    """ETag de la página calculado sobre el body (o el guardado en caché); 304 si coincide con If-None-Match"""
+    if response["statusCode"] != 200:
+        return response
+    etag = (response.get("headers") or {}).get("ETag") or body_etag(response["body"])
+    if etag_matches(get_header(event, "If-None-Match"), etag):
+        return not_modified(etag)
+    return with_etag(response, etag)
+
+
+def etag_projection(projection):
+    """Proyección equivalente sin contenido (solo contenido_hash) para validar el ETag"""
+    if projection is None:
+        return {"contenido": 0}
+    if "contenido" not in projection:
+        return None
+    return list(dict.fromkeys([field for field in projection if field != "contenido"] + ["contenido_hash"]))
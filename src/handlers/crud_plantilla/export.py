@@ -0,0 +1,103 @@
+# CRUD PLANTILLA - EXPORTACIÓN
+# Exportación NDJSON (GET /plantilla/export y scripts/export_plantillas.py)
+
+import os
+
+from pymongo import ASCENDING
+
+from crud_common.engine import (apply_cursor, connect_db_client, dumps, encode_cursor, format_response,
+                                get_path_value)
+from crud_common.metrics import phase
+from crud_plantilla.content import (CONTENT_BATCH_SIZE, content_projection, iter_batches, load_contenido,
+                                    wants_contenido, without_contenido_hash)
+
+PLANTILLAS_CRUD_EXPORT_BATCH_SIZE = int(os.environ.get('PLANTILLAS_CRUD_EXPORT_BATCH_SIZE', 500))
+# Bytes of NDJSON per GET /plantilla/export response (API Gateway/Lambda payload limit is 6 MB)
+PLANTILLAS_CRUD_EXPORT_MAX_BYTES = int(os.environ.get('PLANTILLAS_CRUD_EXPORT_MAX_BYTES', 4 * 1024 * 1024))
+
+EXPORT_CHUNK_BYTES = 256 * 1024
+
+
+def parse_export_params(resource, event) -> tuple:
+    """query y fields como en get_all; exporta todos los campos y ordena por _id para poder continuar"""
+    try:
+        query_params = event.get("queryStringParameters") or {}
+        export_query = {}
+        if query_params.get("query"):
+            export_query["filter"] = resource.get_query(str(query_params.get("query")))
+        if query_params.get("fields"):
+            export_query["projection"] = content_projection(str(query_params.get("fields")).split(","))
+        apply_cursor(export_query, str(query_params.get("cursor") or ""))
+        export_query.pop("keyset")
+        return export_query, None
+    except Exception as ex:
+        print(f"Error in parse_export_params. Detail: {ex}")
+        return {}, ex
+
+
+def export_chunks(query: dict, collection, batch_size: int = PLANTILLAS_CRUD_EXPORT_BATCH_SIZE,
+                  chunk_bytes: int = EXPORT_CHUNK_BYTES):
+    """Itera el cursor del servidor y genera bloques de NDJSON de al menos chunk_bytes bytes, con el último documento
+    del bloque y si le sigue otro documento"""
+    cursor = collection.find(
+        query.get("filter"), query.get("projection"), sort=query.get("sort") or [("_id", ASCENDING)],
+        batch_size=batch_size)
+    resolve = wants_contenido(query.get("projection"))
+    try:
+        lines, size, document, full = [], 0, None, None
+        for documents in iter_batches(cursor, CONTENT_BATCH_SIZE):
+            if resolve:
+                load_contenido(documents, collection)
+            without_contenido_hash(documents)
+            for document in documents:
+                if full is not None:
+                    # The full chunk is followed by this document
+                    yield full + (True,)
+                    full = None
+                line = dumps(document) + "\n"
+                lines.append(line)
+                size += len(line.encode())
+                if size >= chunk_bytes:
+                    full = ("".join(lines), document)
+                    lines, size = [], 0
+        if full is not None:
+            yield full + (False,)
+        if lines:
+            yield "".join(lines), document, False
+    finally:
+        cursor.close()
+
+
+def export(query: dict, collection, max_bytes: int = PLANTILLAS_CRUD_EXPORT_MAX_BYTES) -> dict:
+    """Una página de la exportación, acotada a max_bytes; X-Next-Cursor permite continuar"""
+    try:
+        chunks, size, last, complete = [], 0, None, True
+        for chunk, last, more in export_chunks(query, collection):
+            chunks.append(chunk)
+            size += len(chunk.encode())
+            if size >= max_bytes:
+                complete = not more
+                break
+        next_token = None
+        if not complete:
+            next_token = encode_cursor(query["sort"], [get_path_value(last, key) for key, _ in query["sort"]])
+        return {
+            "statusCode": 200,
+            "headers": {"Content-Type": "application/x-ndjson", "X-Next-Cursor": next_token or ""},
+            "body": "".join(chunks)
+        }
+    except Exception as ex:
+        return format_response({}, f"Error service Export: {ex}", 500, False)
+
+
+def export_request(resource, event):
+    with phase("parse"):
+        export_query, err = parse_export_params(resource, event)
+    if err is not None:
+        return format_response({}, "Error service Export: The request contains an incorrect parameter", 400, False)
+    with phase("connect"):
+        client = connect_db_client()
+    if client:
+        with phase("db"):
+            return export(export_query, resource.get_collection(client))
+    return format_response({}, "Error exporting plantilla!", 500, False)
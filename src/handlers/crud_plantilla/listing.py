@@ -0,0 +1,145 @@
+# CRUD PLANTILLA - LISTADOS
+# Agregaciones de GET /plantilla: count/facets con $facet, latest (última versión por grupo_id)
+# y expand=tipo_plantilla con un $lookup
+
+from typing import Optional
+
+from pymongo import ASCENDING
+
+# Campos permitidos en facets=
+FACET_FIELDS = ["sistema_id", "tipo_plantilla_id", "activo"]
+# expand=tipo_plantilla: campos de tipo_plantilla embebidos con $lookup
+TIPO_PLANTILLA_COLLECTION = "tipo_plantilla"
+TIPO_PLANTILLA_FIELDS = ["nombre", "codigo_abreviacion"]
+
+
+def parse_count_params(query_params: dict, filter_: Optional[dict]) -> dict:
+    mode = query_params.get("count")
+    if mode and mode not in ("exact", "estimated"):
+        raise ValueError("count must be exact or estimated")
+    facets = [f for f in str(query_params.get("facets") or "").split(",") if f]
+    invalid = [f for f in facets if f not in FACET_FIELDS]
+    if invalid:
+        raise ValueError(f"Facets not allowed: {invalid}")
+    # filter without the cursor range predicate: the total covers every page
+    return {"mode": mode, "facets": facets, "filter": filter_ or {}}
+
+
+def projection_stage(projection) -> dict:
+    if isinstance(projection, dict):
+        return projection
+    return {field: 1 for field in projection}
+
+
+# expand=tipo_plantilla
+def parse_expand(query_params: dict) -> bool:
+    expand = query_params.get("expand")
+    if not expand:
+        return False
+    if str(expand) != TIPO_PLANTILLA_COLLECTION:
+        raise ValueError(f"Unsupported expand: {expand}")
+    return True
+
+
+def expand_projection(projection):
+    """Las proyecciones por lista necesitan tipo_plantilla_id para el $lookup"""
+    if isinstance(projection, list) and "tipo_plantilla_id" not in projection:
+        return projection + ["tipo_plantilla_id"]
+    return projection
+
+
+def expand_stages() -> list:
+    """Embebe tipo_plantilla (_id y TIPO_PLANTILLA_FIELDS); null si tipo_plantilla_id no existe o no es un ObjectId"""
+    return [
+        {"$lookup": {
+            "from": TIPO_PLANTILLA_COLLECTION,
+            "let": {"tipo_plantilla_id": {"$convert": {"input": "$tipo_plantilla_id", "to": "objectId",
+                                                        "onError": None, "onNull": None}}},
+            # Igualdad sobre _id: usa el índice de tipo_plantilla
+            "pipeline": [
+                {"$match": {"$expr": {"$eq": ["$_id", "$$tipo_plantilla_id"]}}},
+                {"$project": {field: 1 for field in TIPO_PLANTILLA_FIELDS}},
+            ],
+            "as": TIPO_PLANTILLA_COLLECTION,
+        }},
+        {"$addFields": {TIPO_PLANTILLA_COLLECTION: {"$ifNull": [{"$arrayElemAt": ["$tipo_plantilla", 0]}, None]}}},
+    ]
+
+
+def find_stages(query: dict, expand: bool = False, match: bool = True) -> list:
+    """Etapas de agregación equivalentes a collection.find(**query); el $lookup va después de $limit"""
+    stages = []
+    if match and query.get("filter"):
+        stages.append({"$match": query["filter"]})
+    if query.get("sort"):
+        stages.append({"$sort": dict(query["sort"])})
+    if query.get("skip"):
+        stages.append({"$skip": query["skip"]})
+    if query.get("limit"):
+        stages.append({"$limit": query["limit"]})
+    if query.get("projection"):
+        stages.append({"$project": projection_stage(query["projection"])})
+    if expand:
+        stages.extend(expand_stages())
+    return stages
+
+
+def find_with_total(query: dict, count: dict, collection, expand: bool = False) -> tuple:
+    """Página y total en una sola agregación $facet; count=estimated sin filtros usa los metadatos"""
+    if count["mode"] == "estimated" and not count["facets"] and not count["filter"]:
+        if expand:
+            data = list(collection.aggregate(find_stages(query, expand)))
+        else:
+            data = list(collection.find(**query))
+        return data, {"Total": collection.estimated_document_count()}
+
+    page = find_stages(query, expand, match=query.get("filter") is not count["filter"])
+    facet = {"data": page or [{"$skip": 0}]}
+    if count["mode"]:
+        facet["total"] = [{"$count": "total"}]
+    for field in count["facets"]:
+        facet[field] = [{"$group": {"_id": f"${field}", "count": {"$sum": 1}}}, {"$sort": {"count": -1, "_id": 1}}]
+
+    result = next(collection.aggregate([{"$match": count["filter"]}, {"$facet": facet}], allowDiskUse=True))
+    extra = {}
+    if count["mode"]:
+        extra["Total"] = result["total"][0]["total"] if result["total"] else 0
+    if count["facets"]:
+        extra["Facets"] = {
+            field: [{"value": item["_id"], "count": item["count"]} for item in result[field]]
+            for field in count["facets"]
+        }
+    return result["data"], extra
+
+
+def latest_stages(query: dict) -> list:
+    """Última versión activa de cada grupo_id (usa el índice activo_1_grupo_id_1_version_-1).
+    La proyección se aplica antes de $group: los campos pesados excluidos no pasan por la agrupación"""
+    match = {"activo": True}
+    if query.get("filter"):
+        match = {"$and": [query["filter"], match]}
+    sort = list(query.get("sort") or []) + [("_id", ASCENDING)]
+    projection = query.get("projection")
+    stages = [
+        {"$match": match},
+        {"$sort": {"activo": 1, "grupo_id": 1, "version": -1}},
+    ]
+    if isinstance(projection, list):
+        # Also the fields $group and the final $sort need; the page is projected again below
+        stages.append({"$project": projection_stage(projection + ["grupo_id"] + [field for field, _ in sort])})
+    elif projection:
+        stages.append({"$project": projection})
+    stages.extend([
+        {"$group": {"_id": "$grupo_id", "document": {"$first": "$$ROOT"}}},
+        {"$replaceRoot": {"newRoot": "$document"}},
+        {"$sort": dict(sort)},
+    ])
+    if query.get("skip"):
+        stages.append({"$skip": query["skip"]})
+    if query.get("limit"):
+        stages.append({"$limit": query["limit"]})
+    if isinstance(projection, list):
+        stages.append({"$project": projection_stage(projection)})
+    if query.get("expand"):
+        stages.extend(expand_stages())
+    return stages
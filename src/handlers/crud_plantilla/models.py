@@ -0,0 +1,54 @@
+# CRUD PLANTILLA - MODELOS
+# Modelos pydantic de escritura y tipos de query= (las lecturas no importan pydantic)
+
+import uuid
+from datetime import datetime
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Dict, Optional
+
+from bson import ObjectId
+
+from crud_common.engine import local_now
+
+# Tipo de cada campo de PlantillaCreationModel (Optional[X] -> X) con el que se guarda en la BD;
+# query= convierte los valores con esta tabla para no importar pydantic en las lecturas
+FIELD_TYPES = {
+    "_id": ObjectId,
+    "tipo_plantilla_id": str,
+    "sistema_id": int,
+    "nombre": str,
+    "codigo_abreviacion": str,
+    "contenido": str,
+    "grupo_id": uuid.UUID,
+    "version": int,
+    "uid": str,
+    "metadatos": dict,
+    "activo": bool,
+    "fecha_creacion": datetime,
+}
+
+
+@lru_cache(maxsize=None)
+def get_models():
+    """Modelos de datos, construidos en la primera escritura (las lecturas no importan pydantic)"""
+    from pydantic import BaseModel, Field
+
+    class PlantillaModel(BaseModel):
+        """Modelo de datos de Plantilla"""
+        tipo_plantilla_id: str
+        sistema_id: int
+        nombre: Optional[str] = None
+        codigo_abreviacion: Optional[str] = None
+        contenido: Optional[str] = None
+        grupo_id: Optional[str] = None
+        version: Optional[int] = 0
+        uid: Optional[str] = None
+        metadatos: Optional[Dict] = None
+        activo: bool = Field(default=True)
+
+    class PlantillaCreationModel(PlantillaModel):
+        fecha_creacion: datetime = Field(default_factory=local_now)
+
+    return SimpleNamespace(PlantillaModel=PlantillaModel,
+                           PlantillaCreationModel=PlantillaCreationModel)
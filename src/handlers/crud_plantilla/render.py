@@ -0,0 +1,116 @@
+# CRUD PLANTILLA - RENDERIZADO
+# POST /plantilla/{id}/render: {{ variable }} o {{ objeto.campo }} en contenido, con una caché de plantillas compiladas
+
+import html
+import os
+import re
+from typing import Optional
+
+from bson import ObjectId
+
+from crud_common.cache import LruCache
+from crud_common.engine import connect_db_client, format_response, parse_body
+from crud_common.metrics import phase
+from crud_plantilla.bulk import PLANTILLAS_CRUD_BULK_MAX_ITEMS
+from crud_plantilla.content import load_contenido
+
+# Compiled templates kept per container for POST /plantilla/{id}/render (0 disables the cache)
+PLANTILLAS_CRUD_RENDER_CACHE_MAX_ENTRIES = int(os.environ.get('PLANTILLAS_CRUD_RENDER_CACHE_MAX_ENTRIES', 128))
+
+PLACEHOLDER = re.compile(r"{{\s*([\w.]+)\s*}}")
+
+# Caché LRU de plantillas compiladas, por _id, version y contenido_hash
+template_cache = LruCache(PLANTILLAS_CRUD_RENDER_CACHE_MAX_ENTRIES, metric_prefix="RenderCache")
+
+
+def compile_template(contenido: str) -> tuple:
+    """Partes literales y rutas de las variables: renderizar solo concatena"""
+    parts = PLACEHOLDER.split(contenido)
+    return tuple(parts[0::2]), tuple(tuple(name.split(".")) for name in parts[1::2])
+
+
+def render_template(compiled: tuple, variables: dict, raw: bool = False) -> dict:
+    """contenido con las variables reemplazadas y escapadas como HTML (sin escapar con raw);
+    las que no vienen quedan vacías y se listan en Missing"""
+    text = str if raw else html.escape
+    literals, paths = compiled
+    output, missing = [literals[0]], []
+    for path, literal in zip(paths, literals[1:]):
+        value = variables
+        for key in path:
+            if isinstance(value, dict) and key in value:
+                value = value[key]
+            elif isinstance(value, list) and key.isdigit() and int(key) < len(value):
+                value = value[int(key)]
+            else:
+                value = None
+                missing.append(".".join(path))
+                break
+        output.append("" if value is None else text(str(value)))
+        output.append(literal)
+    return {"contenido": "".join(output), "Missing": list(dict.fromkeys(missing))}
+
+
+def compiled_template(_id, collection) -> Optional[tuple]:
+    """Plantilla compilada desde la caché; solo lee contenido cuando cambia version o contenido_hash"""
+    filter_ = {"_id": ObjectId(_id)}
+    meta = collection.find_one(filter_, {"version": 1, "contenido_hash": 1})
+    if meta is None:
+        return None
+    key = (meta["_id"], meta.get("version"), meta.get("contenido_hash"))
+    compiled = template_cache.get(key) if key[2] else None
+    if compiled is None:
+        document = collection.find_one(filter_, {"version": 1, "contenido": 1, "contenido_hash": 1})
+        if document is None:
+            return None
+        load_contenido([document], collection)
+        compiled = compile_template(document.get("contenido") or "")
+        # Documentos anteriores a contenido_hash no se guardan: su llave no detecta cambios de contenido
+        if document.get("contenido_hash"):
+            template_cache.set((document["_id"], document.get("version"), document["contenido_hash"]), compiled)
+        print(f"Cache template miss (hits={template_cache.hits}, misses={template_cache.misses}, "
+              f"evictions={template_cache.evictions})")
+    return compiled
+
+
+def render(_id, data: dict, collection):
+    """variables: objeto (un resultado) o arreglo de objetos (un resultado por conjunto, con Index);
+    raw: true inserta los valores sin escapar"""
+    try:
+        variables = data.get("variables", {}) if isinstance(data, dict) else None
+        raw = data.get("raw", False) if isinstance(data, dict) else False
+        if not isinstance(raw, bool):
+            return format_response({}, "Error service Render: raw must be a boolean", 400, False)
+        batch = isinstance(variables, list)
+        variable_sets = variables if batch else [variables]
+        if not all(isinstance(item, dict) for item in variable_sets):
+            return format_response({}, "Error service Render: variables must be an object or an array of objects",
+                                   400, False)
+        if len(variable_sets) > PLANTILLAS_CRUD_BULK_MAX_ITEMS:
+            return format_response(
+                {}, f"Error service Render: Maximum {PLANTILLAS_CRUD_BULK_MAX_ITEMS} variable sets per request", 400,
+                False)
+        compiled = compiled_template(_id, collection)
+        if compiled is None:
+            return format_response({}, "Request unsuccessful", 404, False)
+        with phase("render"):
+            if batch:
+                result = [{"Index": i, **render_template(compiled, item, raw)} for i, item in enumerate(variable_sets)]
+            else:
+                result = render_template(compiled, variables, raw)
+        return format_response(result, "Render successful", 200, True)
+    except Exception as ex:
+        return format_response({}, f"Error service Render: {ex}", 500, False)
+
+
+def render_request(resource, event):
+    with phase("parse"):
+        data, error = parse_body(event)
+    if error is not None:
+        return format_response({}, "Error service Render: Error in input data", 400, False)
+    with phase("connect"):
+        client = connect_db_client()
+    if client:
+        with phase("db"):
+            return render(event["pathParameters"]["id"], data, resource.get_collection(client))
+    return format_response({}, "Error rendering plantilla!", 500, False)
@@ -0,0 +1,103 @@
+# CRUD PLANTILLA - BÚSQUEDA
+# search=: índice de texto sobre nombre, codigo_abreviacion y contenido, orden por score y snippet de contenido
+
+import re
+
+from pymongo import TEXT, IndexModel
+
+from crud_plantilla.content import CONTENT_COLLECTION, PLANTILLAS_CRUD_CONTENT_STORE, content_collection
+from crud_plantilla.listing import expand_stages, projection_stage
+
+# Caracteres del fragmento de contenido y máximo de contenidos candidatos con PLANTILLAS_CRUD_CONTENT_STORE
+SEARCH_SNIPPET_CHARS = 200
+SEARCH_MAX_CONTENT_MATCHES = 1000
+TEXT_INDEX_LANGUAGE = "spanish"
+
+# Un solo índice de texto por colección
+TEXT_INDEX = IndexModel([("nombre", TEXT), ("codigo_abreviacion", TEXT), ("contenido", TEXT)],
+                        name="nombre_text_codigo_abreviacion_text_contenido_text",
+                        default_language=TEXT_INDEX_LANGUAGE,
+                        weights={"nombre": 10, "codigo_abreviacion": 5, "contenido": 1})
+# Con PLANTILLAS_CRUD_CONTENT_STORE contenido vive en CONTENT_COLLECTION: search= busca allí por texto
+# y une por contenido_hash (un $match de agregación no admite $text dentro de $or)
+CONTENT_INDEXES = [
+    IndexModel([("contenido", TEXT)], name="contenido_text", default_language=TEXT_INDEX_LANGUAGE),
+]
+
+
+def search_terms(text: str) -> list:
+    """Palabras de la búsqueda sin las negadas (-palabra), para ubicar el fragmento"""
+    return [term.lower() for term in re.findall(r"-?\w+", text) if not term.startswith("-")]
+
+
+def content_matches(text: str, collection) -> tuple:
+    """Digests de CONTENT_COLLECTION que coinciden con la búsqueda y su puntaje"""
+    matches = content_collection(collection).find(
+        {"$text": {"$search": text}}, {"score": {"$meta": "textScore"}},
+        sort=[("score", {"$meta": "textScore"})], limit=SEARCH_MAX_CONTENT_MATCHES)
+    digests, scores = [], []
+    for match in matches:
+        digests.append(match["_id"])
+        scores.append(match["score"])
+    return digests, scores
+
+
+def snippet_expression(terms: list, contenido) -> dict:
+    """Fragmento de contenido alrededor de la primera palabra encontrada (o el inicio si no aparece literal)"""
+    lowered = {"$toLower": contenido}
+    positions = [{"$indexOfCP": [lowered, term]} for term in terms]
+    first = {"$min": {"$filter": {"input": positions, "as": "position", "cond": {"$gte": ["$$position", 0]}}}}
+    start = {"$max": [0, {"$subtract": [{"$ifNull": [first, 0]}, SEARCH_SNIPPET_CHARS // 4]}]}
+    return {"$cond": [{"$eq": [{"$type": contenido}, "string"]},
+                      {"$substrCP": [contenido, start, SEARCH_SNIPPET_CHARS]}, None]}
+
+
+def search_stages(query: dict, collection) -> list:
+    """$text en el $match inicial, orden por score y snippet en lugar de contenido, solo para la página.
+    Con PLANTILLAS_CRUD_CONTENT_STORE las coincidencias por contenido se agregan con $unionWith y se suman los scores"""
+    text = {"$text": {"$search": query["search"]}}
+    match = {"$and": [text, query["filter"]]} if query.get("filter") else text
+    stages = [{"$match": match}]
+    digests, scores = content_matches(query["search"], collection) if PLANTILLAS_CRUD_CONTENT_STORE else ([], [])
+    if digests:
+        content_match = {"contenido_hash": {"$in": digests}}
+        content_score = {"$arrayElemAt": [scores, {"$indexOfArray": [digests, "$contenido_hash"]}]}
+        stages.extend([
+            {"$project": {"score": {"$meta": "textScore"}}},
+            {"$unionWith": {"coll": collection.name, "pipeline": [
+                {"$match": {"$and": [content_match, query["filter"]]} if query.get("filter") else content_match},
+                {"$project": {"score": content_score}},
+            ]}},
+            {"$group": {"_id": "$_id", "score": {"$sum": "$score"}}},
+        ])
+    else:
+        stages.append({"$addFields": {"score": {"$meta": "textScore"}}})
+    stages.append({"$sort": {"score": -1, "_id": 1}})
+    if query.get("skip"):
+        stages.append({"$skip": query["skip"]})
+    if query.get("limit"):
+        stages.append({"$limit": query["limit"]})
+    if digests:
+        # Solo la página vuelve a leer las plantillas completas
+        stages.extend([
+            {"$lookup": {"from": collection.name, "localField": "_id", "foreignField": "_id", "as": "_plantilla"}},
+            {"$replaceRoot": {"newRoot": {"$mergeObjects": [{"$arrayElemAt": ["$_plantilla", 0]},
+                                                            {"score": "$score"}]}}},
+        ])
+    contenido = "$contenido"
+    if PLANTILLAS_CRUD_CONTENT_STORE:
+        stages.append({"$lookup": {"from": CONTENT_COLLECTION, "localField": "contenido_hash", "foreignField": "_id",
+                                   "as": "_contenido"}})
+        contenido = {"$ifNull": ["$contenido", {"$arrayElemAt": ["$_contenido.contenido", 0]}]}
+    stages.append({"$addFields": {"snippet": snippet_expression(search_terms(query["search"]), contenido)}})
+    if PLANTILLAS_CRUD_CONTENT_STORE:
+        stages.append({"$unset": "_contenido"})
+
+    projection = query.get("projection")
+    if isinstance(projection, list):
+        stages.append({"$project": dict(projection_stage(projection), score=1, snippet=1)})
+    elif projection:
+        stages.append({"$project": projection})
+    if query.get("expand"):
+        stages.extend(expand_stages())
+    return stages
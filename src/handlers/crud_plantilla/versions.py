@@ -0,0 +1,121 @@
+# CRUD PLANTILLA - VERSIONES
+# grupo_id y asignación atómica de versiones (POST /plantilla/version).
+# Contador de versiones por grupo en VERSION_COLLECTION: {_id: grupo_id, version: última versión asignada}
+
+import uuid
+from typing import Optional
+
+from pymongo import DESCENDING, ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from crud_common.engine import SOFT_DELETE_FIELDS, as_stored, connect_db_client, format_response, parse_body
+from crud_common.metrics import phase
+from crud_plantilla.content import bulk_upsert, insert_document, without_contenido_hash
+from crud_plantilla.models import get_models
+
+VERSION_COLLECTION = "plantilla_version"
+
+
+def set_grupo_id(data: dict) -> dict:
+    if data.get("grupo_id"):
+        data["grupo_id"] = uuid.UUID(data.get("grupo_id"))
+    else:
+        data["grupo_id"] = uuid.uuid4()
+    return data
+
+
+def version_collection(collection):
+    return collection.database[VERSION_COLLECTION]
+
+
+def increment_version(grupo_id: uuid.UUID, counters) -> Optional[dict]:
+    return counters.find_one_and_update({"_id": grupo_id}, {"$inc": {"version": 1}},
+                                        return_document=ReturnDocument.AFTER)
+
+
+def latest_version(grupo_id: uuid.UUID, collection) -> Optional[int]:
+    """Versión más alta guardada del grupo (índice grupo_id_1_version_-1); None si el grupo no tiene versiones"""
+    latest = collection.find_one({"grupo_id": grupo_id}, {"version": 1}, sort=[("version", DESCENDING)])
+    return None if latest is None else latest.get("version") or 0
+
+
+def raise_version_counters(versions: dict, collection):
+    """Sube con $max el contador de cada grupo ({grupo_id: version}) antes de insertar versiones explícitas,
+    así POST /plantilla/version nunca asigna una versión ya escrita por POST /plantilla o el bulk.
+    Un contador nuevo se inicia desde la versión más alta guardada del grupo si es mayor"""
+    versions = {grupo_id: version for grupo_id, version in versions.items() if isinstance(version, int)}
+    if not versions:
+        return
+    counters = version_collection(collection)
+    existing = {c["_id"] for c in counters.find({"_id": {"$in": list(versions)}}, {"_id": 1})}
+    operations = []
+    for grupo_id, version in versions.items():
+        if grupo_id not in existing:
+            version = max(version, latest_version(grupo_id, collection) or 0)
+        operations.append(UpdateOne({"_id": grupo_id}, {"$max": {"version": version}}, upsert=True))
+    bulk_upsert(operations, counters)
+
+
+def next_version(grupo_id: uuid.UUID, collection) -> Optional[int]:
+    """Siguiente versión del grupo con un $inc atómico; el primer uso inicia el contador con $max
+    desde la versión más alta guardada. None si el grupo no tiene versiones"""
+    counters = version_collection(collection)
+    counter = increment_version(grupo_id, counters)
+    if counter is None:
+        seed = latest_version(grupo_id, collection)
+        if seed is None:
+            return None
+        try:
+            counters.update_one({"_id": grupo_id}, {"$max": {"version": seed}}, upsert=True)
+        except DuplicateKeyError:
+            # Concurrent upsert of the same counter: $max already applied by the other writer
+            pass
+        counter = increment_version(grupo_id, counters)
+    return counter["version"]
+
+
+def create_version(data, collection, deactivate_previous: bool = False):
+    """Inserta la siguiente versión del grupo; con deactivate_previous desactiva las versiones anteriores activas"""
+    try:
+        data["grupo_id"] = uuid.UUID(data["grupo_id"])
+        data["version"] = next_version(data["grupo_id"], collection)
+        if data["version"] is None:
+            return format_response({}, "Error creating plantilla version! Detail: grupo_id has no versions", 404,
+                                   False)
+        if not insert_document(data, collection):
+            return format_response({}, "Registration unsuccessful", 400, False)
+        extra = {}
+        if deactivate_previous:
+            # After the insert: the group always has an active version
+            result = collection.update_many(
+                {"grupo_id": data["grupo_id"], "version": {"$lt": data["version"]}, "activo": True},
+                {"$set": SOFT_DELETE_FIELDS})
+            extra["Deactivated"] = result.modified_count
+        data = without_contenido_hash([as_stored(data, collection)])[0]
+        return format_response(data, "Registration successful", 201, True, extra)
+    except Exception as ex:
+        return format_response({}, f"Error service Version: {ex}", 500, False)
+
+
+def version_request(resource, event):
+    with phase("parse"):
+        data, error = parse_body(event)
+    if error is not None or not isinstance(data, dict) or not data.get("grupo_id"):
+        return format_response({}, "Error creating plantilla version! Detail: The body must include grupo_id", 400,
+                               False)
+    try:
+        uuid.UUID(str(data["grupo_id"]))
+    except ValueError:
+        return format_response({}, "Error creating plantilla version! Detail: Invalid grupo_id", 400, False)
+    query_params = event.get("queryStringParameters") or {}
+    deactivate_previous = str(query_params.get("deactivate_previous", "false")).lower() == "true"
+    with phase("validate"):
+        plantilla_data = get_models().PlantillaCreationModel(**data).__dict__
+    with phase("connect"):
+        client = connect_db_client()
+    if client:
+        plantilla_collection = resource.get_collection(client)
+        with phase("db"):
+            return resource.write(create_version(plantilla_data, plantilla_collection, deactivate_previous),
+                                  plantilla_collection)
+    return format_response({}, "Error creating plantilla version!", 500, False)
@@ -0,0 +1,13 @@
+# CRUD ROUTER
+# Un solo Lambda para /plantilla y /tipo_plantilla: comparte contenedores "warm" y el cliente de la BD
+
+from crud_common import engine
+
+# Cada módulo registra su recurso en el motor al importarse (colección, modelo y estrategia de borrado:
+# lógico en plantilla, físico en tipo_plantilla); todos usan el cliente del motor, único por contenedor
+from crud_plantilla import app as crud_plantilla_app  # noqa: F401
+from crud_tipo_plantilla import app as crud_tipo_plantilla_app  # noqa: F401
+
+
+def lambda_handler(event, context):
+    return engine.dispatch(event, context)
@@ -0,0 +1,124 @@
+# Pruebas de los handlers CRUD (pip install -r tests/requirements.txt; python -m pytest -q)
+#
+# Por defecto corren en memoria con mongomock. Las pruebas marcadas con el fixture mongod necesitan un mongod
+# (docker run --rm -p 27017:27017 mongo:7) y PLANTILLAS_CRUD_TEST_MONGOD=true; sin él se omiten.
+import importlib
+import json
+import os
+import sys
+import typing
+
+import pytest
+
+HANDLERS_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "src", "handlers")
+sys.path.insert(0, HANDLERS_DIR)
+
+os.environ.setdefault("PLANTILLAS_CRUD_HOST", "localhost")
+os.environ.setdefault("PLANTILLAS_CRUD_PORT", "27017")
+os.environ.setdefault("PLANTILLAS_CRUD_DB", "plantillas_crud_test")
+os.environ.setdefault("TIMEZONE", "America/Bogota")
+
+
+def load_router():
+    """Importa el router con un motor (crud_common) nuevo, como un contenedor nuevo"""
+    for module_name in [m for m in sys.modules if m.split(".")[0].startswith("crud_")]:
+        del sys.modules[module_name]
+    return importlib.import_module("crud_router.app")
+
+
+@pytest.fixture
+def app(monkeypatch):
+    """Router contra una BD en memoria (mongomock), vacía en cada prueba"""
+    import bson
+    import mongomock
+    import mongomock.collection
+    import pymongo
+    from bson.codec_options import CodecOptions
+
+    codec_options = CodecOptions(uuid_representation=bson.binary.UuidRepresentation.STANDARD)
+    client = mongomock.MongoClient()
+
+    # mongomock codifica con la representación UUID por defecto y no acepta sort en UpdateOne (pymongo >= 4.11)
+    class StandardBSON:
+        @staticmethod
+        def encode(document, check_keys=False, codec_options=codec_options):
+            return bson.encode(document, check_keys, codec_options)
+
+    add_update = mongomock.collection.BulkOperationBuilder.add_update
+
+    def add_update_without_sort(self, *args, sort=None, **kwargs):
+        return add_update(self, *args, **kwargs)
+
+    monkeypatch.setattr(mongomock.collection, "BSON", StandardBSON)
+    monkeypatch.setattr(mongomock.collection.Collection, "codec_options", property(lambda self: codec_options),
+                        raising=False)
+    monkeypatch.setattr(mongomock.collection.BulkOperationBuilder, "add_update", add_update_without_sort)
+    monkeypatch.setattr(pymongo, "MongoClient", lambda *args, **kwargs: client)
+    yield load_router()
+
+
+@pytest.fixture
+def mongod():
+    """Router contra un mongod real (PLANTILLAS_CRUD_HOST/PORT); la BD de pruebas se elimina al terminar"""
+    if os.environ.get("PLANTILLAS_CRUD_TEST_MONGOD", "false").lower() != "true":
+        pytest.skip("PLANTILLAS_CRUD_TEST_MONGOD=true and a running mongod are required")
+    router = load_router()
+    client = router.engine.connect_db_client()
+    if client is None:
+        pytest.fail("Could not connect to mongod")
+    client.drop_database(os.environ["PLANTILLAS_CRUD_DB"])
+    yield router
+    client.drop_database(os.environ["PLANTILLAS_CRUD_DB"])
+    router.engine.close_connect_db(client)
+
+
+def api_event(method: str, path: str, resource: str = None, path_parameters: dict = None,
+              query: dict = None, body=None, headers: dict = None) -> dict:
+    """Evento sintético de API Gateway (proxy REST)"""
+    return {
+        "httpMethod": method,
+        "path": path,
+        "resource": resource or path,
+        "pathParameters": path_parameters,
+        "queryStringParameters": query,
+        "headers": headers or {},
+        "body": json.dumps(body) if body is not None else None,
+        "isBase64Encoded": False,
+    }
+
+
+def by_id(method: str, resource: str, _id: str, **kwargs) -> dict:
+    return api_event(method, f"/{resource}/{_id}", resource=f"/{resource}/{{id}}", path_parameters={"id": _id},
+                     **kwargs)
+
+
+def body(response: dict) -> dict:
+    return json.loads(response["body"])
+
+
+def new_tipo(app, **fields) -> str:
+    data = dict({"nombre": "Tipo", "descripcion": "pruebas", "codigo_abreviacion": "T"}, **fields)
+    response = app.lambda_handler(api_event("POST", "/tipo_plantilla", body=data), None)
+    assert response["statusCode"] == 201, response["body"]
+    return body(response)["Data"]["_id"]
+
+
+def new_plantilla(app, tipo_id: str, **fields) -> str:
+    data = dict({"tipo_plantilla_id": tipo_id, "sistema_id": 1, "nombre": "Plantilla", "codigo_abreviacion": "PL",
+                 "contenido": "<p>Hola {{ nombre }}</p>"}, **fields)
+    response = app.lambda_handler(api_event("POST", "/plantilla", body=data), None)
+    assert response["statusCode"] == 201, response["body"]
+    return body(response)["Data"]["_id"]
+
+
+def model_field_types(model) -> dict:
+    """Tipo de cada campo del modelo pydantic como en FIELD_TYPES: Optional[X] -> X, Dict -> dict"""
+    types = {}
+    for name, field in model.model_fields.items():
+        annotation = field.annotation
+        args = [arg for arg in typing.get_args(annotation) if arg is not type(None)]
+        if typing.get_origin(annotation) is typing.Union and len(args) == 1:
+            annotation = args[0]
+        types[name] = typing.get_origin(annotation) or annotation
+    return types
+
@@ -0,0 +1,687 @@
+import base64
+import gzip
+import json
+import sys
+import uuid
+
+import pytest
+from bson import ObjectId
+
+from conftest import api_event, body, by_id, load_router, model_field_types, new_plantilla, new_tipo
+
+
+@pytest.fixture(params=[False, True], ids=["inline", "content_store"])
+def store_app(request, monkeypatch):
+    """Router con contenido en el documento o en plantilla_contenido (PLANTILLAS_CRUD_CONTENT_STORE)"""
+    monkeypatch.setenv("PLANTILLAS_CRUD_CONTENT_STORE", str(request.param).lower())
+    return request.getfixturevalue("app")
+
+
+def plantilla_collection(app):
+    return app.crud_plantilla_app.RESOURCE.get_collection(app.engine.connect_db_client())
+
+
+def bulk_item(codigo: str, **fields) -> dict:
+    return dict({"tipo_plantilla_id": "t", "sistema_id": 1, "nombre": codigo, "codigo_abreviacion": codigo,
+                 "contenido": f"<p>{codigo}</p>"}, **fields)
+
+
+# bulk_write: los writeErrors se numeran sobre las operaciones enviadas, no sobre los elementos del body
+@pytest.mark.parametrize("ordered, expected", [
+    ("true", [400, 201, 409, 424, 424]),
+    ("false", [400, 201, 409, 201, 409]),
+])
+def test_bulk_post_maps_write_errors_to_items(app, ordered, expected):
+    collection = plantilla_collection(app)
+    collection.create_index("codigo_abreviacion", unique=True)
+    items = [{"nombre": "sin sistema_id"}, bulk_item("A"), bulk_item("A"), bulk_item("B"), bulk_item("B")]
+    response = app.lambda_handler(api_event("POST", "/plantilla/bulk", query={"ordered": ordered}, body=items), None)
+    results = body(response)["Data"]
+
+    assert response["statusCode"] == 207
+    assert [item["Status"] for item in results] == expected
+    assert [item["Index"] for item in results] == list(range(len(items)))
+    stored = {d["codigo_abreviacion"]: d["_id"] for d in collection.find()}
+    assert results[1]["Id"] == str(stored["A"])
+    if ordered == "false":
+        assert results[3]["Id"] == str(stored["B"])
+
+
+def test_bulk_put_and_delete_report_missing_ids(app):
+    tipo_id = new_tipo(app)
+    _id = new_plantilla(app, tipo_id)
+    missing = str(ObjectId())
+    items = [dict(bulk_item("N"), _id=_id), dict(bulk_item("M"), _id=missing), "not-an-id"]
+    response = app.lambda_handler(api_event("PUT", "/plantilla/bulk", body=items), None)
+    assert [item["Status"] for item in body(response)["Data"]] == [200, 404, 400]
+
+    response = app.lambda_handler(api_event("DELETE", "/plantilla/bulk", body=[_id, missing]), None)
+    assert response["statusCode"] == 207
+    assert [item["Status"] for item in body(response)["Data"]] == [200, 404]
+    assert plantilla_collection(app).find_one({"_id": ObjectId(_id)})["activo"] is False
+
+
+# Como PUT y DELETE /plantilla/{id}: un elemento que existe pero no cambia se reporta con 400
+def test_bulk_put_and_delete_report_unmodified_items(store_app):
+    tipo_id = new_tipo(store_app)
+    ids = [new_plantilla(store_app, tipo_id, nombre=f"P{i}") for i in range(3)]
+
+    def statuses(method, items):
+        response = store_app.lambda_handler(api_event(method, "/plantilla/bulk", body=items), None)
+        return [item["Status"] for item in body(response)["Data"]]
+
+    items = [dict(bulk_item("N"), _id=_id) for _id in ids]
+    assert statuses("PUT", items) == [200, 200, 200]
+    changed = [items[0], dict(items[1], contenido="<p>otro</p>"), dict(items[2], contenido=None)]
+    assert statuses("PUT", changed) == [400, 200, 200]
+    assert statuses("PUT", changed) == [400, 400, 400]
+    assert statuses("DELETE", ids[:2]) == [200, 200]
+    assert statuses("DELETE", ids) == [400, 400, 200]
+    documents = {str(d["_id"]): d for d in plantilla_collection(store_app).find()}
+    assert [documents[_id]["activo"] for _id in ids] == [False] * 3
+    assert documents[ids[1]]["contenido_hash"] != documents[ids[0]]["contenido_hash"]
+
+
+@pytest.mark.parametrize("items", ["{}", [{}] * 501])
+def test_bulk_rejects_invalid_body(app, items):
+    event = api_event("POST", "/plantilla/bulk", body=items)
+    assert app.lambda_handler(event, None)["statusCode"] == 400
+
+
+# ETag: la consulta solo de metadatos (etag_projection) produce el mismo ETag que el documento completo
+@pytest.mark.parametrize("projection", [None, ["nombre", "contenido", "contenido_hash"],
+                                        ["contenido", "contenido_hash"]])
+def test_etag_projection_matches_document_etag(store_app, projection):
+    plantilla = store_app.crud_plantilla_app
+    collection = plantilla_collection(store_app)
+    _id = ObjectId(new_plantilla(store_app, new_tipo(store_app)))
+    assert ("contenido" in collection.find_one({"_id": _id})) != plantilla.PLANTILLAS_CRUD_CONTENT_STORE
+
+    document = collection.find_one({"_id": _id}, projection)
+    plantilla.load_contenido([document], collection)
+    meta = collection.find_one({"_id": _id}, plantilla.etag_projection(projection))
+    assert "contenido" not in meta
+    assert plantilla.document_etag(meta) == plantilla.document_etag(document)
+
+
+def test_etag_without_contenido_hash_uses_contenido(app):
+    plantilla = app.crud_plantilla_app
+    document = {"_id": ObjectId(), "nombre": "x", "contenido": "<p>x</p>"}
+    hashed = dict(plantilla.set_contenido_hash(dict(document)))
+    del hashed["contenido"]
+    assert plantilla.document_etag(document) == plantilla.document_etag(hashed)
+
+
+@pytest.mark.parametrize("query", [None, {"fields": "nombre,contenido"}, {"content": "only"}])
+def test_get_one_if_none_match(store_app, query):
+    _id = new_plantilla(store_app, new_tipo(store_app))
+    response = store_app.lambda_handler(by_id("GET", "plantilla", _id, query=query), None)
+    assert response["statusCode"] == 200
+    etag = response["headers"]["ETag"]
+
+    cached = store_app.lambda_handler(by_id("GET", "plantilla", _id, query=query, headers={"If-None-Match": etag}),
+                                      None)
+    assert cached["statusCode"] == 304
+    assert cached["headers"]["ETag"] == etag
+
+    store_app.lambda_handler(by_id("PUT", "plantilla", _id, body={
+        "tipo_plantilla_id": "t", "sistema_id": 1, "contenido": "<p>nuevo</p>"}), None)
+    changed = store_app.lambda_handler(by_id("GET", "plantilla", _id, query=query, headers={"If-None-Match": etag}),
+                                       None)
+    assert changed["statusCode"] == 200
+    assert changed["headers"]["ETag"] != etag
+
+
+# Códigos de estado del handler
+def test_plantilla_status_codes(app):
+    tipo_id = new_tipo(app)
+    _id = new_plantilla(app, tipo_id)
+    data = {"tipo_plantilla_id": tipo_id, "sistema_id": 2, "nombre": "Otra"}
+    missing = str(ObjectId())
+
+    def status(event):
+        return app.lambda_handler(event, None)["statusCode"]
+
+    assert status(by_id("GET", "plantilla", _id)) == 200
+    assert status(by_id("GET", "plantilla", missing)) == 404
+    assert status(by_id("GET", "plantilla", _id, query={"expand": "sistema"})) == 400
+    assert status(api_event("GET", "/plantilla", query={"query": "sistema_id__like:1"})) == 404
+    assert status(api_event("GET", "/plantilla", query={"ids": f"{_id},{missing}"})) == 200
+    assert status(api_event("GET", "/plantilla", query={"ids": "not-an-id"})) == 400
+    assert status(by_id("PUT", "plantilla", _id, body=data)) == 200
+    assert status(by_id("PUT", "plantilla", _id, body=data)) == 400
+    assert status(api_event("POST", f"/plantilla/{_id}/render", resource="/plantilla/{id}/render",
+                            path_parameters={"id": _id}, body={"variables": {"nombre": "Ana"}})) == 200
+    assert status(api_event("POST", f"/plantilla/{missing}/render", resource="/plantilla/{id}/render",
+                            path_parameters={"id": missing}, body={"variables": {}})) == 404
+    assert status(by_id("DELETE", "plantilla", _id)) == 200
+    # Borrado lógico: el registro sigue existiendo y un segundo DELETE no lo modifica
+    assert status(by_id("DELETE", "plantilla", _id)) == 400
+    assert status(by_id("GET", "plantilla", _id)) == 200
+    assert status(api_event("PATCH", "/plantilla")) == 500
+
+
+# ids=: orden pedido, sin repetidos, Missing con los inexistentes y máximo PLANTILLAS_CRUD_BATCH_MAX_IDS ids distintos
+def test_get_many_by_ids(monkeypatch, request):
+    monkeypatch.setenv("PLANTILLAS_CRUD_BATCH_MAX_IDS", "3")
+    app = request.getfixturevalue("app")
+    tipo_id = new_tipo(app)
+    first, second = new_plantilla(app, tipo_id, nombre="Primera"), new_plantilla(app, tipo_id, nombre="Segunda")
+    missing = str(ObjectId())
+
+    def get_many(ids: list, **query) -> dict:
+        return app.lambda_handler(api_event("GET", "/plantilla", query=dict(query, ids=",".join(ids))), None)
+
+    response = get_many([second, missing, first, second, first], fields="nombre")
+    assert response["statusCode"] == 200
+    result = body(response)
+    assert result["Data"] == [{"_id": second, "nombre": "Segunda"}, {"_id": first, "nombre": "Primera"}]
+    assert result["Missing"] == [missing]
+    assert body(get_many([first]))["Missing"] == []
+
+    too_many = get_many([first, second, missing, str(ObjectId())])
+    assert too_many["statusCode"] == 400
+    assert "between 1 and 3 ids" in body(too_many)["Message"]
+
+
+def test_reads_do_not_import_pydantic(app, monkeypatch):
+    tipo_id = new_tipo(app)
+    new_plantilla(app, tipo_id)
+    for module_name in [m for m in sys.modules if m.split(".")[0] == "pydantic"]:
+        monkeypatch.delitem(sys.modules, module_name)
+    response = app.lambda_handler(api_event("GET", "/plantilla", query={
+        "query": "sistema_id:1,activo:true,fecha_creacion__lt:2100-01-01T00:00:00"}), None)
+    assert response["statusCode"] == 200
+    assert len(body(response)["Data"]) == 1
+    assert "pydantic" not in sys.modules
+
+
+# El borrado lógico usa SOFT_DELETE_FIELDS del motor, sin modelos
+def test_bulk_delete_does_not_import_pydantic(app, monkeypatch):
+    _id = new_plantilla(app, new_tipo(app))
+    for module_name in [m for m in sys.modules if m.split(".")[0] == "pydantic"]:
+        monkeypatch.delitem(sys.modules, module_name)
+    response = app.lambda_handler(api_event("DELETE", "/plantilla/bulk", body=[_id]), None)
+    assert [item["Status"] for item in body(response)["Data"]] == [200]
+    assert plantilla_collection(app).find_one({"_id": ObjectId(_id)})["activo"] is False
+    assert "pydantic" not in sys.modules
+
+
+@pytest.fixture(params=["memory", "tmp"])
+def cache_app(request, monkeypatch, tmp_path):
+    """Router con la caché de GET /plantilla en memoria o en archivos (PLANTILLAS_CRUD_QUERY_CACHE)"""
+    monkeypatch.setenv("PLANTILLAS_CRUD_QUERY_CACHE", request.param)
+    monkeypatch.setenv("PLANTILLAS_CRUD_QUERY_CACHE_DIR", str(tmp_path))
+    return request.getfixturevalue("app")
+
+
+# Lectura después de escritura entre contenedores: otro router (motor nuevo) escribe en la misma BD
+def test_query_cache_sees_writes_from_other_containers(cache_app, monkeypatch, tmp_path):
+    # Cada contenedor tiene su propio /tmp
+    monkeypatch.setenv("PLANTILLAS_CRUD_QUERY_CACHE_DIR", str(tmp_path / "writer"))
+    reader, writer = cache_app, load_router()
+    cache = reader.crud_plantilla_app.RESOURCE.cache
+    grupo_id = str(uuid.uuid4())
+    _id = new_plantilla(writer, new_tipo(writer), nombre="Inicial", grupo_id=grupo_id, version=1)
+    listing = api_event("GET", "/plantilla", query={"sortby": "_id", "fields": "nombre,version,activo"})
+
+    def read():
+        response = reader.lambda_handler(listing, None)
+        assert response["statusCode"] == 200
+        return body(response)["Data"]
+
+    writes = [
+        api_event("POST", "/plantilla", body=bulk_item("P")),
+        by_id("PUT", "plantilla", _id, body=dict(bulk_item("U"), nombre="Editada")),
+        api_event("POST", "/plantilla/bulk", body=[bulk_item("B1"), bulk_item("B2")]),
+        api_event("PUT", "/plantilla/bulk", body=[dict(bulk_item("B"), _id=_id, nombre="Bulk")]),
+        api_event("POST", "/plantilla/version", body=dict(bulk_item("V"), grupo_id=grupo_id)),
+        api_event("DELETE", "/plantilla/bulk", body=[_id]),
+        by_id("DELETE", "plantilla", new_plantilla(writer, "t", nombre="Borrada")),
+    ]
+    for event in writes:
+        before = read()
+        hits = cache.hits
+        assert read() == before and cache.hits == hits + 1
+        assert writer.lambda_handler(event, None)["statusCode"] in (200, 201, 207)
+        after = read()
+        assert after != before
+        assert after == body(writer.lambda_handler(listing, None))["Data"]
+
+
+def test_latest_and_history(app):
+    tipo_id = new_tipo(app)
+    grupos = [str(uuid.uuid4()), str(uuid.uuid4())]
+    for grupo_id, versions in zip(grupos, [(1, 2, 3), (1, 2)]):
+        for version in versions:
+            new_plantilla(app, tipo_id, grupo_id=grupo_id, version=version, nombre=f"{grupo_id[:4]} v{version}")
+    # The highest version of the second group is inactive: latest returns the previous one
+    inactive = body(app.lambda_handler(api_event("GET", "/plantilla", query={
+        "query": f"grupo_id:{grupos[1]},version:2"}), None))["Data"][0]["_id"]
+    assert app.lambda_handler(by_id("DELETE", "plantilla", inactive), None)["statusCode"] == 200
+
+    def get_all(**query):
+        response = app.lambda_handler(api_event("GET", "/plantilla", query=query), None)
+        assert response["statusCode"] == 200, response["body"]
+        return body(response)["Data"]
+
+    # contenido is projected out before $group
+    stages = [next(iter(stage)) for stage in app.crud_plantilla_app.latest_stages({"projection": {"contenido": 0}})]
+    assert stages.index("$project") < stages.index("$group")
+
+    latest = get_all(latest="true", sortby="version", order="desc")
+    assert [(item["grupo_id"], item["version"]) for item in latest] == [(grupos[0], 3), (grupos[1], 1)]
+    assert all("contenido" not in item for item in latest)
+    projected = get_all(latest="true", fields="nombre", sortby="version")
+    assert [set(item) for item in projected] == [{"_id", "nombre"}] * 2
+    assert [item["version"] for item in get_all(latest="true", query=f"grupo_id:{grupos[0]}")] == [3]
+    assert get_all(latest="true", include="contenido")[0]["contenido"] == "<p>Hola {{ nombre }}</p>"
+    assert len(get_all(latest="true", limit="1", offset="1", sortby="version")) == 1
+
+    history = get_all(history=grupos[1])
+    assert [(item["version"], item["activo"]) for item in history] == [(2, False), (1, True)]
+    assert all("contenido" not in item for item in history)
+    assert [item["version"] for item in get_all(history=grupos[0], query="version__gte:2")] == [3, 2]
+    # Invalid parameters are reported as 404, like the rest of get_all
+    response = app.lambda_handler(api_event("GET", "/plantilla", query={"latest": "true", "cursor": "true"}), None)
+    assert response["statusCode"] == 404
+
+
+def render(app, _id: str, **data) -> dict:
+    return app.lambda_handler(api_event("POST", f"/plantilla/{_id}/render", resource="/plantilla/{id}/render",
+                                        path_parameters={"id": _id}, body=data), None)
+
+
+def test_render_escapes_values_and_lists_missing(app):
+    _id = new_plantilla(app, new_tipo(app), contenido="<p>{{ nombre }} {{ cargo.area }} {{ firmas.1 }} {{ fecha }}</p>")
+    variables = {"nombre": "<b>Ana & Luis</b>", "cargo": {"area": '"TI"'}, "firmas": ["x", 7]}
+
+    escaped = body(render(app, _id, variables=variables))["Data"]
+    assert escaped == {"contenido": "<p>&lt;b&gt;Ana &amp; Luis&lt;/b&gt; &quot;TI&quot; 7 </p>", "Missing": ["fecha"]}
+    raw = body(render(app, _id, variables=variables, raw=True))["Data"]
+    assert raw["contenido"] == '<p><b>Ana & Luis</b> "TI" 7 </p>'
+    assert render(app, _id, variables=variables, raw="yes")["statusCode"] == 400
+
+    batch = body(render(app, _id, variables=[{"nombre": "A"}, {"nombre": "B", "fecha": "hoy", "cargo": {}}]))["Data"]
+    assert [item["Index"] for item in batch] == [0, 1]
+    assert batch[0]["Missing"] == ["cargo.area", "firmas.1", "fecha"]
+    assert batch[1]["contenido"] == "<p>B   hoy</p>"
+    assert batch[1]["Missing"] == ["cargo.area", "firmas.1"]
+    assert render(app, _id, variables=[{"nombre": "A"}, "B"])["statusCode"] == 400
+    assert render(app, _id, variables=[{}] * 501)["statusCode"] == 400
+
+
+def test_render_template_cache(monkeypatch, request):
+    monkeypatch.setenv("PLANTILLAS_CRUD_RENDER_CACHE_MAX_ENTRIES", "1")
+    app = request.getfixturevalue("app")
+    from crud_plantilla.render import template_cache
+
+    tipo_id = new_tipo(app)
+    first, second = new_plantilla(app, tipo_id), new_plantilla(app, tipo_id, contenido="<p>{{ x }}</p>")
+    assert body(render(app, first, variables={"nombre": "Ana"}))["Data"]["contenido"] == "<p>Hola Ana</p>"
+    render(app, first, variables={"nombre": "Luis"})
+    assert (template_cache.hits, template_cache.misses, template_cache.evictions) == (1, 1, 0)
+
+    # A PUT that changes contenido changes the key: the cached template is not used
+    app.lambda_handler(by_id("PUT", "plantilla", first, body=dict(bulk_item("A"), contenido="<i>{{ nombre }}</i>")),
+                       None)
+    assert body(render(app, first, variables={"nombre": "Ana"}))["Data"]["contenido"] == "<i>Ana</i>"
+    assert (template_cache.misses, template_cache.evictions) == (2, 1)
+
+    render(app, second, variables={"x": 1})
+    render(app, first, variables={"nombre": "Ana"})
+    assert (template_cache.hits, template_cache.misses, template_cache.evictions) == (1, 4, 3)
+
+
+# contenido_hash solo se usa para el ETag y plantilla_contenido: ningún body lo expone
+def test_responses_do_not_expose_contenido_hash(store_app):
+    tipo_id = new_tipo(store_app)
+    grupo_id = str(uuid.uuid4())
+    created = store_app.lambda_handler(api_event("POST", "/plantilla", body=dict(
+        bulk_item("A"), grupo_id=grupo_id, version=1)), None)
+    _id = body(created)["Data"]["_id"]
+    responses = [
+        created,
+        store_app.lambda_handler(by_id("PUT", "plantilla", _id, body=dict(bulk_item("A"), tipo_plantilla_id=tipo_id,
+                                                                          grupo_id=grupo_id, version=1)), None),
+        store_app.lambda_handler(api_event("POST", "/plantilla/version", body=dict(bulk_item("A"), grupo_id=grupo_id)),
+                                 None),
+    ]
+    for query in [None, {"content": "only"}, {"fields": "nombre,contenido"}]:
+        responses.append(store_app.lambda_handler(by_id("GET", "plantilla", _id, query=query), None))
+    for query in [None, {"include": "contenido"}, {"fields": "nombre,contenido"}, {"ids": _id},
+                  {"latest": "true", "include": "contenido"}, {"history": grupo_id}, {"cursor": "true"}]:
+        responses.append(store_app.lambda_handler(api_event("GET", "/plantilla", query=query), None))
+
+    for response in responses:
+        assert response["statusCode"] in (200, 201), response["body"]
+        data = body(response)["Data"]
+        for document in data if isinstance(data, list) else [data]:
+            assert "contenido_hash" not in document
+    assert body(responses[3])["Data"]["contenido"] == "<p>A</p>"
+    assert body(responses[4])["Data"] == {"_id": _id, "contenido": "<p>A</p>"}
+
+    export = store_app.lambda_handler(api_event("GET", "/plantilla/export"), None)
+    assert export["statusCode"] == 200
+    assert all("contenido_hash" not in json.loads(line) for line in export["body"].splitlines())
+
+
+# migrate_contenido: reporte, dry-run, documentos cambiados durante la migración y lecturas iguales después
+def test_migrate_contenido(app, monkeypatch):
+    from crud_plantilla import content
+
+    tipo_id = new_tipo(app)
+    shared, unique = "<p>Compartido á</p>", "<p>Único</p>"
+    ids = [new_plantilla(app, tipo_id, nombre=f"P{i}", contenido=shared) for i in range(3)]
+    ids.append(new_plantilla(app, tipo_id, nombre="U", contenido=unique))
+    changed = new_plantilla(app, tipo_id, nombre="C", contenido=unique)
+    collection = plantilla_collection(app)
+    store = collection.database[content.CONTENT_COLLECTION]
+
+    def reads(router) -> list:
+        events = [by_id("GET", "plantilla", _id) for _id in ids] + [
+            api_event("GET", "/plantilla", query={"include": "contenido", "sortby": "_id"})]
+        responses = [router.lambda_handler(event, None) for event in events]
+        return [(body(response)["Data"], response["headers"].get("ETag")) for response in responses]
+
+    before = reads(app)
+    report = content.migrate_contenido(collection, dry_run=True)
+    shared_bytes, unique_bytes = len(shared.encode()), len(unique.encode())
+    assert report == {"documents": 5, "inline_bytes": 3 * shared_bytes + 2 * unique_bytes, "unique_contents": 2,
+                      "unique_bytes": shared_bytes + unique_bytes, "saved_bytes": 2 * shared_bytes + unique_bytes}
+    assert collection.count_documents({"contenido": {"$exists": True}}) == 5
+    assert store.count_documents({}) == 0
+
+    iter_batches = content.iter_batches
+
+    def edited_after_read(iterable, size):
+        for batch in iter_batches(iterable, size):
+            if any(str(document["_id"]) == changed for document in batch):
+                collection.update_one({"_id": ObjectId(changed)}, {"$set": {"contenido": "<p>Editado</p>"}})
+            yield batch
+
+    monkeypatch.setattr(content, "iter_batches", edited_after_read)
+    report = content.migrate_contenido(collection, batch_size=2)
+    assert {key: report[key] for key in ("documents", "unique_contents", "saved_bytes")} == {
+        "documents": 5, "unique_contents": 2, "saved_bytes": 2 * shared_bytes + unique_bytes}
+    assert {"size_before", "size_after"} <= set(report)
+    assert store.count_documents({}) == 2
+    migrated = collection.count_documents({"contenido_hash": {"$exists": True}, "contenido": {"$exists": False}})
+    assert migrated == 4
+    assert collection.find_one({"_id": ObjectId(changed)})["contenido"] == "<p>Editado</p>"
+
+    monkeypatch.setenv("PLANTILLAS_CRUD_CONTENT_STORE", "true")
+    after = reads(load_router())
+    list_before, list_after = before.pop(), after.pop()
+    assert after == before
+    assert [d for d in list_after[0] if d["_id"] != changed] == [d for d in list_before[0] if d["_id"] != changed]
+
+
+def post_version(app, grupo_id: str, **query) -> dict:
+    return app.lambda_handler(api_event("POST", "/plantilla/version", query=query or None,
+                                        body=dict(bulk_item("V"), grupo_id=grupo_id)), None)
+
+
+def test_version_allocation(app):
+    grupo_id = str(uuid.uuid4())
+    collection = plantilla_collection(app)
+
+    unknown = post_version(app, grupo_id)
+    assert unknown["statusCode"] == 404
+    assert collection.count_documents({}) == 0
+    assert collection.database["plantilla_version"].count_documents({}) == 0
+
+    # Explicit versions from POST /plantilla and the bulk raise the counter
+    for version in (1, 5):
+        new_plantilla(app, "t", grupo_id=grupo_id, version=version)
+    assert body(post_version(app, grupo_id))["Data"]["version"] == 6
+    bulk = app.lambda_handler(api_event("POST", "/plantilla/bulk", body=[dict(bulk_item("B"), grupo_id=grupo_id,
+                                                                              version=9)]), None)
+    assert [item["Status"] for item in body(bulk)["Data"]] == [201]
+    assert body(post_version(app, grupo_id))["Data"]["version"] == 10
+
+    deactivated = body(post_version(app, grupo_id, deactivate_previous="true"))
+    assert deactivated["Data"]["version"] == 11
+    assert deactivated["Deactivated"] == 5
+    active = [d["version"] for d in collection.find({"grupo_id": uuid.UUID(grupo_id), "activo": True})]
+    assert active == [11]
+
+
+def test_version_concurrent_seeding(app, monkeypatch):
+    from crud_plantilla import versions
+
+    grupo_id = uuid.uuid4()
+    new_plantilla(app, "t", grupo_id=str(grupo_id), version=3)
+    collection = plantilla_collection(app)
+    increment_version = versions.increment_version
+    other = []
+
+    def racing_increment(grupo, counters):
+        # Another writer seeds the counter and allocates between this writer's $inc and its seed
+        if not other:
+            other.append(None)
+            other[0] = versions.next_version(grupo, collection)
+            return None
+        return increment_version(grupo, counters)
+
+    monkeypatch.setattr(versions, "increment_version", racing_increment)
+    mine = versions.next_version(grupo_id, collection)
+    assert (other[0], mine) == (4, 5)
+
+
+# Versiones guardadas antes de plantilla_version: el contador que crea POST /plantilla (o el bulk) con la
+# version por defecto parte de la más alta guardada, y grupo_id_1_version_1 rechaza una versión repetida
+@pytest.mark.parametrize("path", ["/plantilla", "/plantilla/bulk"])
+def test_version_counter_seeded_from_stored_versions(app, path):
+    from crud_plantilla.app import PLANTILLA_INDEXES
+
+    collection = plantilla_collection(app)
+    collection.create_indexes([index for index in PLANTILLA_INDEXES
+                               if index.document["name"] == "grupo_id_1_version_1"])
+    grupo_id = uuid.uuid4()
+    collection.insert_many([dict(bulk_item(f"L{version}"), grupo_id=grupo_id, version=version)
+                            for version in range(1, 6)])
+
+    item = dict(bulk_item("N"), grupo_id=str(grupo_id))
+    created = app.lambda_handler(api_event("POST", path, body=[item] if path.endswith("bulk") else item), None)
+    assert created["statusCode"] == 201, created["body"]
+    assert body(post_version(app, str(grupo_id)))["Data"]["version"] == 6
+    stored = sorted(d["version"] for d in collection.find({"grupo_id": grupo_id}))
+    assert stored == [0, 1, 2, 3, 4, 5, 6]
+
+    repeated = dict(bulk_item("R"), grupo_id=str(grupo_id), version=3)
+    if path.endswith("bulk"):
+        response = app.lambda_handler(api_event("POST", path, body=[repeated]), None)
+        assert [item["Status"] for item in body(response)["Data"]] == [409]
+    else:
+        assert app.lambda_handler(api_event("POST", path, body=repeated), None)["statusCode"] == 409
+    assert collection.count_documents({"grupo_id": grupo_id}) == 7
+
+
+# Compresión según Accept-Encoding: gzip ida y vuelta, umbral PLANTILLAS_CRUD_COMPRESSION_MIN_BYTES y q=0
+def test_gzip_compression(app):
+    from crud_plantilla.compression import PLANTILLAS_CRUD_COMPRESSION_MIN_BYTES, brotli
+
+    tipo_id = new_tipo(app)
+    small = new_plantilla(app, tipo_id, contenido="<p>corto</p>")
+    large = new_plantilla(app, tipo_id, contenido="<p>Texto de la plantilla á é</p>" * 200)
+
+    def get(_id, accept_encoding=None):
+        headers = {"Accept-Encoding": accept_encoding} if accept_encoding is not None else None
+        return app.lambda_handler(by_id("GET", "plantilla", _id, headers=headers), None)
+
+    plain = get(large)
+    assert "Content-Encoding" not in plain.get("headers", {}) and not plain.get("isBase64Encoded")
+    for accept_encoding in ["gzip", "deflate, gzip;q=0.5", "*"] + (["br;q=1, gzip;q=0.5"] if brotli is None else []):
+        compressed = get(large, accept_encoding)
+        assert compressed["isBase64Encoded"] is True
+        assert compressed["headers"]["Content-Encoding"] == "gzip"
+        assert compressed["headers"]["Vary"] == "Accept-Encoding"
+        assert compressed["headers"]["ETag"] == plain["headers"]["ETag"]
+        assert gzip.decompress(base64.b64decode(compressed["body"])).decode("utf-8") == plain["body"]
+
+    below_threshold = get(small, "gzip")
+    assert len(below_threshold["body"].encode("utf-8")) < PLANTILLAS_CRUD_COMPRESSION_MIN_BYTES
+    assert not below_threshold.get("isBase64Encoded")
+    for accept_encoding in ["gzip;q=0", "identity", "*;q=0", "gzip;q=0, br;q=0"]:
+        response = get(large, accept_encoding)
+        assert response["body"] == plain["body"] and not response.get("isBase64Encoded")
+
+
+# count y facets: el total y los conteos cubren todas las páginas, también con cursor
+def test_count_and_facets(app):
+    tipo_id = new_tipo(app)
+    ids = [new_plantilla(app, tipo_id, sistema_id=1 if i < 3 else 2, nombre=f"P{i}") for i in range(5)]
+    assert app.lambda_handler(by_id("DELETE", "plantilla", ids[0]), None)["statusCode"] == 200
+
+    def get_all(**query):
+        response = app.lambda_handler(api_event("GET", "/plantilla", query=query), None)
+        assert response["statusCode"] == 200, response["body"]
+        return body(response)
+
+    page = get_all(count="exact", query="sistema_id:1", limit="2", sortby="nombre")
+    assert page["Total"] == 3
+    assert [item["nombre"] for item in page["Data"]] == ["P0", "P1"]
+    assert "Facets" not in page
+
+    faceted = get_all(facets="sistema_id,activo", limit="1")
+    assert "Total" not in faceted and len(faceted["Data"]) == 1
+    assert faceted["Facets"] == {"sistema_id": [{"value": 1, "count": 3}, {"value": 2, "count": 2}],
+                                 "activo": [{"value": True, "count": 4}, {"value": False, "count": 1}]}
+    assert get_all(count="estimated")["Total"] == 5
+    assert get_all(count="estimated", query="activo:true")["Total"] == 4
+
+    seen, cursor = [], "true"
+    while cursor:
+        page = get_all(count="exact", facets="sistema_id", query="activo:true", limit="3", cursor=cursor)
+        assert page["Total"] == 4
+        assert page["Facets"]["sistema_id"] == [{"value": 1, "count": 2}, {"value": 2, "count": 2}]
+        seen.extend(item["_id"] for item in page["Data"])
+        cursor = page["Next"]
+    assert seen == ids[1:]
+
+    for query in [{"count": "all"}, {"facets": "nombre"}]:
+        assert app.lambda_handler(api_event("GET", "/plantilla", query=query), None)["statusCode"] == 404
+
+
+# Exportación por páginas: X-Next-Cursor continúa hasta recorrer todos los documentos una sola vez
+def test_export_pages_with_next_cursor(monkeypatch, request):
+    monkeypatch.setenv("PLANTILLAS_CRUD_EXPORT_MAX_BYTES", "1")
+    app = request.getfixturevalue("app")
+    tipo_id = new_tipo(app)
+    contenido = "<p>" + "x" * 100_000 + "</p>"
+    ids = [new_plantilla(app, tipo_id, sistema_id=i % 2, contenido=contenido) for i in range(7)]
+
+    def export(**query) -> list:
+        pages, cursor = [], None
+        while True:
+            params = dict(query, cursor=cursor) if cursor else query
+            response = app.lambda_handler(api_event("GET", "/plantilla/export", query=params or None), None)
+            assert response["statusCode"] == 200
+            assert response["headers"]["Content-Type"] == "application/x-ndjson"
+            pages.append([json.loads(line) for line in response["body"].splitlines()])
+            cursor = response["headers"]["X-Next-Cursor"]
+            if not cursor:
+                return pages
+
+    pages = export()
+    # The page that exhausts the cursor has no X-Next-Cursor: no empty last page
+    assert len(pages) > 2 and all(pages)
+    assert [document["_id"] for page in pages for document in page] == ids
+    assert all(document["contenido"] == contenido for page in pages for document in page)
+
+    filtered = [document for page in export(query="sistema_id:1", fields="nombre") for document in page]
+    assert [document["_id"] for document in filtered] == ids[1::2]
+    assert all(set(document) == {"_id", "nombre"} for document in filtered)
+    response = app.lambda_handler(api_event("GET", "/plantilla/export", query={"cursor": "not-a-cursor"}), None)
+    assert response["statusCode"] == 400
+
+
+# PLANTILLAS_CRUD_EXPORT_MAX_BYTES cuenta bytes (contenido multibyte sin escapar con orjson) y la página que termina
+# el cursor no tiene X-Next-Cursor aunque alcance el límite
+@pytest.mark.parametrize("documents, page_sizes", [(3, [2, 1]), (2, [2])])
+def test_export_max_bytes_counts_bytes(monkeypatch, request, documents, page_sizes):
+    pytest.importorskip("orjson")
+    from crud_plantilla.export import EXPORT_CHUNK_BYTES
+
+    max_bytes = EXPORT_CHUNK_BYTES * 3 // 2
+    monkeypatch.setenv("PLANTILLAS_CRUD_EXPORT_MAX_BYTES", str(max_bytes))
+    monkeypatch.setenv("PLANTILLAS_CRUD_JSON_LIBRARY", "orjson")
+    app = request.getfixturevalue("app")
+    # One chunk per document: more bytes than EXPORT_CHUNK_BYTES, fewer characters
+    contenido = "á" * (EXPORT_CHUNK_BYTES * 3 // 5)
+    for i in range(documents):
+        new_plantilla(app, "t", nombre=f"P{i}", contenido=contenido)
+
+    sizes, cursor = [], None
+    while True:
+        query = {"cursor": cursor} if cursor else None
+        response = app.lambda_handler(api_event("GET", "/plantilla/export", query=query), None)
+        assert response["statusCode"] == 200
+        sizes.append(len(response["body"].splitlines()))
+        assert len(response["body"].encode()) < max_bytes + EXPORT_CHUNK_BYTES * 2
+        cursor = response["headers"]["X-Next-Cursor"]
+        if not cursor:
+            break
+    assert sizes == page_sizes
+
+
+# PLANTILLAS_CRUD_METRICS: una línea EMF por invocación con las fases medidas y los contadores
+def test_emf_line_shape(monkeypatch, request, capsys):
+    monkeypatch.setenv("PLANTILLAS_CRUD_METRICS", "true")
+    monkeypatch.setenv("PLANTILLAS_CRUD_METRICS_NAMESPACE", "PruebasCrud")
+    app = request.getfixturevalue("app")
+    tipo_id = new_tipo(app)
+    for _ in range(2):
+        new_plantilla(app, tipo_id)
+    capsys.readouterr()
+
+    def emf_line(event) -> tuple:
+        response = app.lambda_handler(event, type("Context", (), {"aws_request_id": "req-1"})())
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+        assert len(lines) == 1
+        return response, lines[0]
+
+    listing = api_event("GET", "/plantilla", query={"include": "contenido"})
+    response, line = emf_line(listing)
+    definition = line["_aws"]["CloudWatchMetrics"][0]
+    assert definition["Namespace"] == "PruebasCrud"
+    assert definition["Dimensions"] == [["Route"]]
+    assert isinstance(line["_aws"]["Timestamp"], int)
+    assert (line["Route"], line["StatusCode"], line["RequestId"]) == ("GET /plantilla", 200, "req-1")
+    assert (line["ResultCount"], line["ResponseBytes"], line["ColdStart"]) == (2, len(response["body"]), 0)
+    assert (line["QueryCacheMisses"], "QueryCacheHits" in line) == (1, False)
+    units = {metric["Name"]: metric["Unit"] for metric in definition["Metrics"]}
+    assert set(units) == set(line) - {"_aws", "Route", "StatusCode", "RequestId"}
+    assert {"ParseMs", "ConnectMs", "DbMs", "SerializeMs", "CompressMs", "DurationMs"} <= set(units)
+    assert all(units[name] == "Milliseconds" for name in units if name.endswith("Ms"))
+    assert (units["ResponseBytes"], units["ResultCount"], units["QueryCacheMisses"]) == ("Bytes", "Count", "Count")
+    assert line["DurationMs"] >= sum(line[name] for name in units if name.endswith("Ms") and name != "DurationMs")
+
+    _, cached = emf_line(listing)
+    assert (cached["QueryCacheHits"], "QueryCacheMisses" in cached) == (1, False)
+    _, missing = emf_line(by_id("GET", "plantilla", str(ObjectId())))
+    assert (missing["Route"], missing["StatusCode"], missing["ResultCount"]) == ("GET /plantilla/{id}", 404, 0)
+
+
+# ColdStart es del contenedor: con el router, una invocación de /tipo_plantilla ya lo calienta
+@pytest.mark.parametrize("first", ["/tipo_plantilla", "/plantilla"])
+def test_emf_cold_start_is_per_container(monkeypatch, request, capsys, first):
+    monkeypatch.setenv("PLANTILLAS_CRUD_METRICS", "true")
+    app = request.getfixturevalue("app")
+    cold_starts = []
+    for path in [first, "/plantilla"]:
+        assert app.lambda_handler(api_event("GET", path), None)["statusCode"] == 200
+        lines = [json.loads(line) for line in capsys.readouterr().out.splitlines() if line.startswith("{")]
+        cold_starts += [line["ColdStart"] for line in lines]
+    assert cold_starts == ([0] if first == "/tipo_plantilla" else [1, 0])
+
+
+# FIELD_TYPES (query= sin pydantic) debe seguir a los modelos; _id lo asigna MongoDB y grupo_id se guarda como UUID
+def test_field_types_match_models(app):
+    plantilla = app.crud_plantilla_app
+    models = plantilla.get_models()
+    stored_as = {"_id": ObjectId, "grupo_id": uuid.UUID}
+    assert plantilla.FIELD_TYPES == dict(model_field_types(models.PlantillaCreationModel), **stored_as)
+    assert set(model_field_types(models.PlantillaModel)) == set(plantilla.FIELD_TYPES) - {"_id", "fecha_creacion"}
+
@@ -0,0 +1,81 @@
+import pytest
+from bson import ObjectId
+
+from conftest import api_event, body, by_id, load_router, model_field_types, new_tipo
+
+
+def test_tipo_plantilla_status_codes(app):
+    _id = new_tipo(app)
+    data = {"nombre": "Otro", "descripcion": "pruebas", "codigo_abreviacion": "O"}
+    missing = str(ObjectId())
+
+    def status(event):
+        return app.lambda_handler(event, None)["statusCode"]
+
+    assert status(api_event("POST", "/tipo_plantilla", body={"nombre": "sin descripcion"})) == 500
+    assert status(by_id("GET", "tipo_plantilla", _id)) == 200
+    assert status(by_id("GET", "tipo_plantilla", missing)) == 404
+    assert status(api_event("GET", "/tipo_plantilla", query={"query": "nombre__gt:x"})) == 200
+    assert status(api_event("GET", "/tipo_plantilla", query={"query": "descripcion__startswith:x"})) == 404
+    assert status(api_event("GET", "/tipo_plantilla", query={"ids": f"{_id},{missing}"})) == 200
+    assert status(by_id("PUT", "tipo_plantilla", _id, body=data)) == 200
+    assert status(by_id("PUT", "tipo_plantilla", _id, body=data)) == 400
+    assert status(by_id("DELETE", "tipo_plantilla", _id)) == 200
+    # Borrado físico: el registro ya no existe
+    assert status(by_id("DELETE", "tipo_plantilla", _id)) == 400
+    assert status(by_id("GET", "tipo_plantilla", _id)) == 404
+
+
+def test_tipo_plantilla_cursor_pages(app):
+    ids = [new_tipo(app, nombre=f"Tipo {i}") for i in range(5)]
+    seen, cursor = [], "true"
+    while cursor:
+        page = body(app.lambda_handler(api_event("GET", "/tipo_plantilla", query={"limit": "2", "cursor": cursor}),
+                                       None))
+        seen.extend(item["_id"] for item in page["Data"])
+        cursor = page["Next"]
+    assert seen == ids
+
+
+def test_tipo_plantilla_cache_sees_writes(app):
+    new_tipo(app, nombre="Antes")
+    first = body(app.lambda_handler(api_event("GET", "/tipo_plantilla"), None))["Data"]
+    new_tipo(app, nombre="Despues")
+    second = body(app.lambda_handler(api_event("GET", "/tipo_plantilla"), None))["Data"]
+    assert [item["nombre"] for item in first] == ["Antes"]
+    assert [item["nombre"] for item in second] == ["Antes", "Despues"]
+
+
+# Entre contenedores el catálogo consulta su generación cada PLANTILLAS_CRUD_TIPO_PLANTILLA_GENERATION_CHECK_SECONDS
+@pytest.mark.parametrize("check_seconds, fresh", [(None, False), ("0", True)])
+def test_tipo_plantilla_cache_generation_check_interval(monkeypatch, request, check_seconds, fresh):
+    if check_seconds is not None:
+        monkeypatch.setenv("PLANTILLAS_CRUD_TIPO_PLANTILLA_GENERATION_CHECK_SECONDS", check_seconds)
+    reader = request.getfixturevalue("app")
+    writer = load_router()
+    listing = api_event("GET", "/tipo_plantilla")
+    new_tipo(writer, nombre="Antes")
+    assert [item["nombre"] for item in body(reader.lambda_handler(listing, None))["Data"]] == ["Antes"]
+    new_tipo(writer, nombre="Despues")
+    expected = ["Antes", "Despues"] if fresh else ["Antes"]
+    assert [item["nombre"] for item in body(reader.lambda_handler(listing, None))["Data"]] == expected
+
+
+def test_router_unknown_resource(app):
+    response = app.lambda_handler(api_event("GET", "/sistema"), None)
+    assert response["statusCode"] == 404
+    assert body(response)["Message"] == "Resource not found"
+
+
+def test_router_registers_both_resources(app):
+    from crud_plantilla import app as plantilla_app
+    from crud_tipo_plantilla import app as tipo_plantilla_app
+
+    assert plantilla_app.engine is tipo_plantilla_app.engine is app.engine
+    assert set(app.engine.RESOURCES) == {"plantilla", "tipo_plantilla"}
+
+
+def test_field_types_match_model(app):
+    tipo_plantilla = app.crud_tipo_plantilla_app
+    assert tipo_plantilla.FIELD_TYPES == dict(model_field_types(tipo_plantilla.get_model()), _id=ObjectId)
+
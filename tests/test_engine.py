@@ -0,0 +1,186 @@
+import json
+import sys
+import uuid
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pymongo import ASCENDING, DESCENDING
+
+from conftest import api_event, body, load_router, new_plantilla, new_tipo
+from crud_common import engine
+
+FIELD_TYPES = {"_id": ObjectId, "sistema_id": int, "nombre": str, "grupo_id": uuid.UUID, "activo": bool,
+               "fecha_creacion": datetime}
+PREFIX_FIELDS = ["nombre"]
+
+
+def compile_query(query_str: str) -> dict:
+    return engine.compile_query(query_str, FIELD_TYPES, PREFIX_FIELDS)
+
+
+# keyset_filter: null va antes que cualquier valor en orden ascendente y después en descendente
+def test_keyset_filter_ascending_value():
+    assert engine.keyset_filter([("nombre", ASCENDING)], ["b"]) == {"nombre": {"$gt": "b"}}
+
+
+def test_keyset_filter_ascending_null_continues_with_values():
+    assert engine.keyset_filter([("nombre", ASCENDING)], [None]) == {"nombre": {"$ne": None}}
+
+
+def test_keyset_filter_descending_value_includes_nulls():
+    assert engine.keyset_filter([("nombre", DESCENDING)], ["b"]) == {"$or": [{"nombre": {"$lt": "b"}},
+                                                                            {"nombre": None}]}
+
+
+def test_keyset_filter_descending_null_is_last_position():
+    assert engine.keyset_filter([("nombre", DESCENDING)], [None]) == {"_id": {"$in": []}}
+
+
+def test_keyset_filter_ties_on_null_continue_by_id():
+    _id = ObjectId()
+    assert engine.keyset_filter([("nombre", DESCENDING), ("_id", ASCENDING)], [None, _id]) == {
+        "nombre": None, "_id": {"$gt": _id}}
+
+
+@pytest.mark.parametrize("order", ["asc", "desc"])
+def test_cursor_pages_with_nulls_match_full_sort(app, order):
+    tipo_id = new_tipo(app)
+    for nombre in ["c", None, "a", None, "b", "a", None]:
+        new_plantilla(app, tipo_id, nombre=nombre)
+    query = {"sortby": "nombre", "order": order, "limit": "2"}
+    expected = [item["_id"] for item in body(app.lambda_handler(
+        api_event("GET", "/plantilla", query=dict(query, limit="100")), None))["Data"]]
+
+    seen, cursor = [], "true"
+    while cursor:
+        page = body(app.lambda_handler(api_event("GET", "/plantilla", query=dict(query, cursor=cursor)), None))
+        seen.extend(item["_id"] for item in page["Data"])
+        cursor = page["Next"]
+    assert seen == expected
+    assert len(seen) == 7
+
+
+def test_cursor_round_trip_keeps_types():
+    values = ["nombre", ObjectId(), uuid.UUID(int=7), datetime(2024, 1, 2, 3, 4, 5), None]
+    sort = [(f"k{i}", ASCENDING) for i in range(len(values))]
+    assert engine.decode_cursor(engine.encode_cursor(sort, values)) == (sort, values)
+
+
+# compile_query: varias condiciones sobre el mismo campo se combinan en un solo documento de operadores
+def test_compile_query_equality_and_types():
+    _id = ObjectId()
+    grupo_id = uuid.UUID(int=1)
+    assert compile_query(f"_id:{_id},sistema_id:2,grupo_id:{grupo_id},activo:true,nombre:x") == {
+        "_id": _id, "sistema_id": 2, "grupo_id": grupo_id, "activo": True, "nombre": "x"}
+
+
+def test_compile_query_merges_range_operators():
+    assert compile_query("sistema_id__gte:1,sistema_id__lt:5") == {"sistema_id": {"$gte": 1, "$lt": 5}}
+
+
+def test_compile_query_merges_equality_before_operator():
+    assert compile_query("sistema_id:3,sistema_id__ne:4") == {"sistema_id": {"$eq": 3, "$ne": 4}}
+
+
+def test_compile_query_merges_equality_after_operator():
+    assert compile_query("sistema_id__ne:4,sistema_id:3") == {"sistema_id": {"$ne": 4, "$eq": 3}}
+
+
+def test_compile_query_in_and_startswith():
+    assert compile_query("sistema_id__in:1|2,nombre__startswith:a.b") == {
+        "sistema_id": {"$in": [1, 2]}, "nombre": {"$regex": r"^a\.b"}}
+
+
+@pytest.mark.parametrize("query_str", ["sistema_id__like:1", "descripcion__startswith:x", "activo:si",
+                                       "sistema_id:uno"])
+def test_compile_query_rejects_invalid_conditions(query_str):
+    with pytest.raises(ValueError):
+        compile_query(query_str)
+
+
+def test_resource_get_query_returns_copies(app):
+    resource = app.crud_plantilla_app.RESOURCE
+    first = resource.get_query("sistema_id__gte:1")
+    first["sistema_id"]["$lt"] = 9
+    assert resource.get_query("sistema_id__gte:1") == {"sistema_id": {"$gte": 1}}
+
+
+# PLANTILLAS_CRUD_QUERY_GUARD: explain (simulado sobre mongomock) una vez por forma de consulta; COLLSCAN se
+# registra (log) o se rechaza con 400 (reject)
+@pytest.mark.parametrize("guard, statuses, explains", [
+    ("off", [200, 200, 200, 200], 0),
+    ("log", [200, 200, 200, 200], 2),
+    ("reject", [400, 400, 200, 200], 2),
+])
+def test_check_query_plan_modes(monkeypatch, request, capsys, guard, statuses, explains):
+    import mongomock.collection
+
+    monkeypatch.setenv("PLANTILLAS_CRUD_QUERY_GUARD", guard)
+    app = request.getfixturevalue("app")
+    explained = []
+
+    def explain(cursor):
+        explained.append(cursor._spec)
+        stage = "COLLSCAN" if "descripcion" in cursor._spec else "IXSCAN"
+        return {"queryPlanner": {"winningPlan": {"stage": "FETCH", "inputStage": {"stage": stage}}}}
+
+    monkeypatch.setattr(mongomock.collection.Cursor, "explain", explain, raising=False)
+    new_tipo(app)
+    # Same shape with other values: not in the response cache, the verdict is reused
+    queries = ["descripcion:a", "descripcion:b", "nombre:a", "nombre:b"]
+    responses = [app.lambda_handler(api_event("GET", "/tipo_plantilla", query={"query": query}), None)
+                 for query in queries]
+    assert [response["statusCode"] for response in responses] == statuses
+    assert len(explained) == explains
+    logged = "Query shape without index on tipo_plantilla" in capsys.readouterr().out
+    assert logged == (guard != "off")
+    if guard == "reject":
+        assert "COLLSCAN" in body(responses[0])["Message"]
+
+
+# format_response: la salida json es byte a byte la de la ruta anterior (format_specific_values + json.dumps)
+def legacy_body(result, message: str, status_code: int, success: bool) -> str:
+    def format_specific_values(document):
+        for field in ("_id", "fecha_creacion", "grupo_id"):
+            if document.get(field):
+                document[field] = str(document[field])
+        return document
+
+    body = {"Success": success, "Status": status_code, "Message": message}
+    if isinstance(result, list):
+        body["Data"] = [format_specific_values(dict(item)) for item in result]
+    elif success and result is not None:
+        body["Data"] = format_specific_values(dict(result))
+    return json.dumps(body)
+
+
+DOCUMENT = {"_id": ObjectId(), "nombre": "Plantilla ñ á \"citada\"", "contenido": "<p>{{ x }}</p>\n", "sistema_id": 1,
+            "grupo_id": uuid.uuid4(), "version": 2, "uid": None, "activo": True, "metadatos": {"tags": ["a", 1.5]},
+            "fecha_creacion": datetime(2024, 1, 2, 3, 4, 5, 123000)}
+
+
+@pytest.mark.parametrize("result", [DOCUMENT, [DOCUMENT, dict(DOCUMENT, _id=ObjectId())], []])
+def test_format_response_is_byte_compatible_with_legacy_output(result):
+    response = engine.format_response(result, "Request successful", 200, True)
+    assert response["body"] == legacy_body(result, "Request successful", 200, True)
+    failed = engine.format_response(None, "Request unsuccessful", 404, False)
+    assert failed["body"] == legacy_body(None, "Request unsuccessful", 404, False)
+    # Documents are not modified
+    assert isinstance(DOCUMENT["_id"], ObjectId)
+
+
+# orjson es opcional: con la librería por defecto no se importa
+def test_format_response_json_does_not_import_orjson(monkeypatch):
+    for module_name in [m for m in sys.modules if m.split(".")[0] == "orjson"]:
+        monkeypatch.delitem(sys.modules, module_name)
+    router = load_router()
+    router.engine.format_response([DOCUMENT], "Request successful", 200, True)
+    assert "orjson" not in sys.modules
+
+
+def test_format_response_orjson_is_equivalent(monkeypatch):
+    pytest.importorskip("orjson")
+    monkeypatch.setattr(engine, "PLANTILLAS_CRUD_JSON_LIBRARY", "orjson")
+    response = engine.format_response([DOCUMENT], "Request successful", 200, True)
+    assert json.loads(response["body"]) == json.loads(legacy_body([DOCUMENT], "Request successful", 200, True))
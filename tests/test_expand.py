@@ -0,0 +1,87 @@
+# expand=tipo_plantilla usa $lookup con let/pipeline y $convert, que mongomock no implementa: requiere mongod
+# (PLANTILLAS_CRUD_TEST_MONGOD=true, ver conftest.py)
+import pytest
+from bson import ObjectId
+
+from conftest import api_event, body, by_id, new_plantilla, new_tipo
+
+EXPANDED_FIELDS = {"_id", "nombre", "codigo_abreviacion"}
+
+
+@pytest.fixture
+def plantillas(mongod):
+    """Una plantilla por caso de tipo_plantilla_id: existente, inexistente y que no es un ObjectId"""
+    tipo_id = new_tipo(mongod, nombre="Carta", codigo_abreviacion="CA")
+    return {
+        "tipo_id": tipo_id,
+        "existing": new_plantilla(mongod, tipo_id, nombre="a"),
+        "missing": new_plantilla(mongod, str(ObjectId()), nombre="b"),
+        "invalid": new_plantilla(mongod, "no-es-un-id", nombre="c"),
+    }
+
+
+def get(app, event) -> dict:
+    response = app.lambda_handler(event, None)
+    assert response["statusCode"] == 200, response["body"]
+    return body(response)
+
+
+def by_name(data: list) -> dict:
+    return {item["nombre"]: item for item in data}
+
+
+def test_get_all_expand(mongod, plantillas):
+    data = by_name(get(mongod, api_event("GET", "/plantilla", query={"expand": "tipo_plantilla",
+                                                                     "sortby": "nombre"}))["Data"])
+    tipo_plantilla = data["a"]["tipo_plantilla"]
+    assert set(tipo_plantilla) == EXPANDED_FIELDS
+    assert tipo_plantilla["_id"] == plantillas["tipo_id"]
+    assert tipo_plantilla["nombre"] == "Carta"
+    assert data["b"]["tipo_plantilla"] is None
+    assert data["c"]["tipo_plantilla"] is None
+    assert all("contenido" not in item for item in data.values())
+
+
+def test_get_all_expand_with_fields_count_and_cursor(mongod, plantillas):
+    page = get(mongod, api_event("GET", "/plantilla", query={
+        "expand": "tipo_plantilla", "fields": "nombre", "count": "exact", "sortby": "nombre", "limit": "2",
+        "cursor": "true"}))
+    assert page["Total"] == 3
+    assert [item["nombre"] for item in page["Data"]] == ["a", "b"]
+    assert page["Data"][0]["tipo_plantilla"]["_id"] == plantillas["tipo_id"]
+    assert set(page["Data"][0]) == {"_id", "nombre", "tipo_plantilla_id", "tipo_plantilla"}
+
+    last = get(mongod, api_event("GET", "/plantilla", query={
+        "expand": "tipo_plantilla", "fields": "nombre", "sortby": "nombre", "limit": "2", "cursor": page["Next"]}))
+    assert [item["nombre"] for item in last["Data"]] == ["c"]
+    assert last["Data"][0]["tipo_plantilla"] is None
+
+
+def test_get_one_and_ids_expand(mongod, plantillas):
+    one = get(mongod, by_id("GET", "plantilla", plantillas["existing"], query={"expand": "tipo_plantilla"}))
+    assert one["Data"]["tipo_plantilla"]["nombre"] == "Carta"
+    assert "contenido" in one["Data"]
+
+    ids = [plantillas["invalid"], plantillas["existing"]]
+    many = get(mongod, api_event("GET", "/plantilla", query={"ids": ",".join(ids), "expand": "tipo_plantilla"}))
+    assert [item["_id"] for item in many["Data"]] == ids
+    assert many["Data"][0]["tipo_plantilla"] is None
+    assert many["Data"][1]["tipo_plantilla"]["codigo_abreviacion"] == "CA"
+
+
+def test_expand_reflects_tipo_plantilla_updates(mongod, plantillas):
+    list_event = api_event("GET", "/plantilla", query={"expand": "tipo_plantilla", "query": "nombre:a"})
+    one_event = by_id("GET", "plantilla", plantillas["existing"], query={"expand": "tipo_plantilla"})
+    before = get(mongod, list_event)
+    etag = mongod.lambda_handler(one_event, None)["headers"]["ETag"]
+
+    response = mongod.lambda_handler(by_id("PUT", "tipo_plantilla", plantillas["tipo_id"], body={
+        "nombre": "Oficio", "descripcion": "pruebas", "codigo_abreviacion": "OF"}), None)
+    assert response["statusCode"] == 200
+
+    after = get(mongod, list_event)
+    assert before["Data"][0]["tipo_plantilla"]["nombre"] == "Carta"
+    assert after["Data"][0]["tipo_plantilla"]["nombre"] == "Oficio"
+    conditional = mongod.lambda_handler(dict(one_event, headers={"If-None-Match": etag}), None)
+    assert conditional["statusCode"] == 200
+    assert body(conditional)["Data"]["tipo_plantilla"]["codigo_abreviacion"] == "OF"
@@ -0,0 +1,44 @@
+# Scripts de operación (scripts/) contra la BD en memoria del fixture app
+import json
+import os
+import sys
+
+from conftest import new_plantilla, new_tipo
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+import ensure_indexes  # noqa: E402
+import migrate_contenido  # noqa: E402
+
+
+def index_information(app) -> dict:
+    db = app.engine.connect_db_client()[os.environ["PLANTILLAS_CRUD_DB"]]
+    return {name: db[name].index_information() for name in ("plantilla", "tipo_plantilla")}
+
+
+def test_ensure_indexes_is_idempotent(app):
+    new_plantilla(app, new_tipo(app))
+    assert ensure_indexes.main() == 0
+    first = index_information(app)
+    declared = {resource.name: {index.document["name"] for models in resource.indexes.values() for index in models}
+                for resource in app.engine.RESOURCES.values()}
+    assert all(declared[name] <= set(first[name]) for name in first)
+
+    assert ensure_indexes.main() == 0
+    assert index_information(app) == first
+
+
+def test_migrate_contenido_script(app, monkeypatch, capsys):
+    tipo_id = new_tipo(app)
+    for i in range(3):
+        new_plantilla(app, tipo_id, nombre=f"P{i}")
+    collection = app.crud_plantilla_app.RESOURCE.get_collection(app.engine.connect_db_client())
+
+    for argv, inline in [(["--dry-run"], 3), (["--batch-size", "2"], 0)]:
+        monkeypatch.setattr(sys, "argv", ["migrate_contenido.py"] + argv)
+        assert migrate_contenido.main() == 0
+        # The report is printed between the connection logs
+        out = capsys.readouterr().out
+        report = json.loads(out[out.index("{\n"):out.rindex("}") + 1])
+        assert (report["documents"], report["unique_contents"]) == (3, 1)
+        assert collection.count_documents({"contenido": {"$exists": True}}) == inline
@@ -0,0 +1,103 @@
+# search= usa $text, $meta y $unionWith, que mongomock no implementa: requiere mongod
+# (PLANTILLAS_CRUD_TEST_MONGOD=true, ver conftest.py); sin él solo se revisa la forma del pipeline
+import os
+
+import pytest
+
+from conftest import api_event, body, load_router, new_plantilla, new_tipo
+
+
+def with_indexes(router):
+    """Índices de texto de cada recurso, como scripts/ensure_indexes.py"""
+    client = router.engine.connect_db_client()
+    for resource in router.engine.RESOURCES.values():
+        assert resource.ensure_indexes(client[os.environ["PLANTILLAS_CRUD_DB"]])
+    return router
+
+
+@pytest.fixture
+def content_store(mongod, monkeypatch):
+    """Router con PLANTILLAS_CRUD_CONTENT_STORE (contenido en plantilla_contenido) sobre la BD del fixture mongod"""
+    monkeypatch.setenv("PLANTILLAS_CRUD_CONTENT_STORE", "true")
+    return with_indexes(load_router())
+
+
+def seed(app) -> dict:
+    tipo_id = new_tipo(app)
+    return {
+        "nombre": new_plantilla(app, tipo_id, nombre="Certificado laboral", sistema_id=1,
+                                contenido="<p>Se expide el presente documento</p>"),
+        "contenido": new_plantilla(app, tipo_id, nombre="Constancia", sistema_id=1,
+                                   contenido="<p>Texto inicial. El certificado se firma digitalmente</p>"),
+        "ambos": new_plantilla(app, tipo_id, nombre="Certificado de notas", sistema_id=2,
+                               contenido="<p>Certificado de notas del certificado académico</p>"),
+        "ninguno": new_plantilla(app, tipo_id, nombre="Oficio", sistema_id=1, contenido="<p>Oficio</p>"),
+    }
+
+
+def search(app, **params) -> list:
+    response = app.lambda_handler(api_event("GET", "/plantilla", query=params), None)
+    assert response["statusCode"] == 200, response["body"]
+    return body(response)["Data"]
+
+
+def assert_search(app, ids: dict):
+    data = search(app, search="certificado")
+    assert [item["_id"] for item in data][0] == ids["ambos"]
+    assert {item["_id"] for item in data} == {ids["nombre"], ids["contenido"], ids["ambos"]}
+    assert [item["score"] for item in data] == sorted((item["score"] for item in data), reverse=True)
+    assert all("contenido" not in item for item in data)
+    snippets = {item["_id"]: item["snippet"] for item in data}
+    assert "certificado se firma" in snippets[ids["contenido"]]
+
+    filtered = search(app, search="certificado", query="sistema_id:1", fields="nombre")
+    assert {item["_id"] for item in filtered} == {ids["nombre"], ids["contenido"]}
+    assert set(filtered[0]) == {"_id", "nombre", "score", "snippet"}
+
+    page = search(app, search="certificado", limit="1", offset="1")
+    assert [item["_id"] for item in page] == [item["_id"] for item in data][1:2]
+    assert search(app, search="inexistente") == []
+
+
+def test_search(mongod):
+    assert_search(mongod, seed(with_indexes(mongod)))
+
+
+def test_search_content_store(content_store):
+    ids = seed(content_store)
+    assert_search(content_store, ids)
+    # Las coincidencias solo por contenido vienen de plantilla_contenido
+    only_content = search(content_store, search="firma")
+    assert [item["_id"] for item in only_content] == [ids["contenido"]]
+    assert "firma digitalmente" in only_content[0]["snippet"]
+
+
+# Restricciones de MongoDB sobre el pipeline: $text solo en el primer $match, textScore antes de $unionWith y
+# la relectura de las plantillas ($lookup por _id) solo para la página
+@pytest.mark.parametrize("content_store", [False, True])
+def test_search_stages_order(app, monkeypatch, content_store):
+    from crud_plantilla import search as search_module
+
+    monkeypatch.setattr(search_module, "PLANTILLAS_CRUD_CONTENT_STORE", content_store)
+    monkeypatch.setattr(search_module, "content_matches", lambda text, collection: (["d1", "d2"], [2.0, 1.0]))
+    collection = app.crud_plantilla_app.RESOURCE.get_collection(app.engine.connect_db_client())
+    stages = search_module.search_stages({"search": "certificado -borrador", "filter": {"sistema_id": 1},
+                                          "skip": 10, "limit": 5, "projection": ["nombre"]}, collection)
+    names = [next(iter(stage)) for stage in stages]
+
+    assert stages[0] == {"$match": {"$and": [{"$text": {"$search": "certificado -borrador"}}, {"sistema_id": 1}]}}
+    assert "$text" not in str(stages[1:])
+    assert names.index("$sort") < names.index("$skip") < names.index("$limit")
+    assert stages[-1] == {"$project": {"nombre": 1, "score": 1, "snippet": 1}}
+    snippet = next(stage for stage in stages if "snippet" in stage.get("$addFields", {}))
+    assert "certificado" in str(snippet) and "borrador" not in str(snippet)
+    if content_store:
+        assert names[1:4] == ["$project", "$unionWith", "$group"]
+        union = stages[2]["$unionWith"]
+        assert union["coll"] == collection.name
+        assert union["pipeline"][0] == {"$match": {"$and": [{"contenido_hash": {"$in": ["d1", "d2"]}},
+                                                            {"sistema_id": 1}]}}
+        assert names.index("$limit") < names.index("$lookup")
+    else:
+        assert names[:3] == ["$match", "$addFields", "$sort"]
+        assert "$lookup" not in names